@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analyse par lot de fichiers vidéo sur un pool de processus
+Par Dady Akrou Cyrille - Data Scientist
+
+Point d'entrée sans affichage pour les traitements hors ligne :
+- Répartition des vidéos sur un pool de processus (un modèle Holistic par processus)
+- Découpage des longues vidéos en segments avec un court chevauchement pour
+  laisser le suivi se réinitialiser au début de chaque segment
+- Fusion des résultats dans l'ordre des frames
+- Rapport de débit global et par cœur
+- Cache d'inférence partagé entre les processus (cache_inference.py) :
+  une nouvelle passe sur les mêmes clips ne refait pas l'inférence ; la clé
+  inclut la taille de segment et le chevauchement, et les frames qui précèdent
+  une frame absente du cache sont inférées pour réchauffer le suivi
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from cache_inference import CacheInference, rechauffage_requis
+from stockage_landmarks import TOTAL_LANDMARKS, PARTIES, StockageLandmarks, exporter_csv, extraire_landmarks
+
+EXTENSIONS_VIDEO = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+# Modèle holistique propre à chaque processus du pool
+_holistic = None
+_cache = None
+_parametres = None
+
+
+def _initialiser_processus(min_detection_confidence, min_tracking_confidence,
+                           chemin_cache=None, taille_cache_mo=1024):
+    """Crée le modèle Holistic (et la connexion au cache) une seule fois par processus"""
+    global _holistic, _cache, _parametres
+    import mediapipe as mp
+
+    _parametres = {
+        'min_detection_confidence': min_detection_confidence,
+        'min_tracking_confidence': min_tracking_confidence,
+        'model_complexity': 1,
+    }
+    _holistic = mp.solutions.holistic.Holistic(**_parametres)
+    if chemin_cache:
+        _cache = CacheInference(chemin_cache, taille_cache_mo)
+
+
+def lister_videos(entrees):
+    """Renvoie la liste des fichiers vidéo à partir de dossiers et/ou de fichiers"""
+    videos = []
+    for entree in entrees:
+        if os.path.isdir(entree):
+            for nom in sorted(os.listdir(entree)):
+                if nom.lower().endswith(EXTENSIONS_VIDEO):
+                    videos.append(os.path.join(entree, nom))
+        elif os.path.isfile(entree):
+            videos.append(entree)
+        else:
+            print(f"Entrée ignorée (introuvable): {entree}")
+    return videos
+
+
+def compter_frames(chemin):
+    """Nombre de frames annoncé par le conteneur vidéo"""
+    cap = cv2.VideoCapture(chemin)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    cap.release()
+    return max(total, 0)
+
+
+def decouper_segments(chemin, total_frames, taille_segment=900):
+    """Découpe une vidéo en segments [debut, fin) d'au plus taille_segment frames"""
+    if total_frames <= 0:
+        # Nombre de frames inconnu: un seul segment lu jusqu'à la fin
+        return [(chemin, 0, None)]
+    return [
+        (chemin, debut, min(debut + taille_segment, total_frames))
+        for debut in range(0, total_frames, taille_segment)
+    ]
+
+
+def positionner(cap, chemin, index):
+    """
+    Place la capture avant la frame `index` (à partir de 0) et renvoie (capture, position réelle)
+    Un positionnement sur l'image clé la plus proche est corrigé par grab()
+    """
+    if index <= 0:
+        return cap, 0
+    cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if position == index:
+        return cap, index
+    if not 0 <= position < index:
+        # Position inconnue ou dépassée : relecture depuis le début
+        cap.release()
+        cap = cv2.VideoCapture(chemin)
+        position = 0
+    while position < index and cap.grab():
+        position += 1
+    return cap, position
+
+
+def analyser_segment(chemin, debut, fin, chevauchement=15, taille_segment=900):
+    """
+    Traite les frames [debut, fin) d'une vidéo dans le processus courant
+    Les frames de chevauchement avant `debut` servent uniquement à réchauffer le suivi
+    """
+    debut_chrono = time.perf_counter()
+    stockage = StockageLandmarks()
+    frames_traitees = 0
+
+    # Frames déjà inférées lors d'une passe précédente (numéros de frame à partir de 1)
+    cle = None
+    en_cache = {}
+    if _cache is not None:
+        compteurs_avant = (_cache.succes, _cache.echecs)
+        cle = _cache.cle(chemin, segmentation=f"segments:{taille_segment}+{chevauchement}", **_parametres)
+        if fin is not None:
+            en_cache = _cache.lire_intervalle(cle, debut + 1, fin + 1)
+
+    if fin is not None and len(en_cache) == fin - debut:
+        # Segment entièrement en cache : ni décodage ni inférence
+        for numero in range(debut + 1, fin + 1):
+            stockage.ajouter_tableau(*en_cache[numero], numero)
+    else:
+        # Numérotation à partir de la position réellement atteinte, pas de celle demandée
+        cap, index = positionner(cv2.VideoCapture(chemin), chemin, max(0, debut - chevauchement))
+
+        landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+        presence = np.zeros(len(PARTIES), dtype=bool)
+
+        while cap.isOpened() and (fin is None or index < fin):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            numero = index + 1
+            index += 1
+
+            utile = numero > debut
+            if utile and numero in en_cache:
+                stockage.ajouter_tableau(*en_cache[numero], numero)
+            # Frame en cache ou de chevauchement : inférée seulement si une frame
+            # absente du cache suit de près (le suivi doit la voir arriver)
+            if (not utile or numero in en_cache) and not rechauffage_requis(
+                    numero, en_cache, chevauchement, premiere=debut + 1, derniere=fin):
+                continue
+
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            results = _holistic.process(image)
+            frames_traitees += 1
+
+            # Les frames de réchauffage ne sont pas conservées
+            if utile and numero not in en_cache:
+                extraire_landmarks(results, landmarks, presence)
+                stockage.ajouter_tableau(landmarks, presence, numero)
+                if cle is not None:
+                    _cache.ecrire(cle, numero, landmarks, presence)
+
+        cap.release()
+
+    cache = None
+    if _cache is not None:
+        _cache.vider_tampon()
+        cache = {'succes': _cache.succes - compteurs_avant[0], 'echecs': _cache.echecs - compteurs_avant[1]}
+    return {
+        'video': chemin,
+        'debut': debut,
+        'frames': stockage,
+        'frames_traitees': frames_traitees,
+        'duree': time.perf_counter() - debut_chrono,
+        'pid': os.getpid(),
+        'cache': cache,
+    }
+
+
+def analyser_lot(entrees, processus=None, taille_segment=900, chevauchement=15,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 chemin_cache=None, taille_cache_mo=1024):
+    """
+    Analyse une liste de vidéos sur un pool de processus
+    Renvoie les landmarks fusionnés par vidéo et un rapport de débit
+    chemin_cache : base du cache d'inférence partagée par tous les processus
+    """
+    videos = lister_videos(entrees)
+    if not videos:
+        print("Aucune vidéo à analyser")
+        return {}, None
+
+    processus = processus or os.cpu_count() or 1
+    segments = []
+    for chemin in videos:
+        segments.extend(decouper_segments(chemin, compter_frames(chemin), taille_segment))
+
+    print(f"{len(videos)} vidéo(s), {len(segments)} segment(s), {processus} processus")
+
+    debut = time.perf_counter()
+    # 'spawn' évite de dupliquer l'état interne de MediaPipe par fork
+    contexte = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(
+        max_workers=processus,
+        mp_context=contexte,
+        initializer=_initialiser_processus,
+        initargs=(min_detection_confidence, min_tracking_confidence, chemin_cache, taille_cache_mo)
+    ) as pool:
+        futures = [
+            pool.submit(analyser_segment, chemin, seg_debut, seg_fin, chevauchement, taille_segment)
+            for chemin, seg_debut, seg_fin in segments
+        ]
+        resultats_segments = [future.result() for future in futures]
+    duree = time.perf_counter() - debut
+
+    # Fusion dans l'ordre des frames pour chaque vidéo
+    resultats = {}
+    for chemin in videos:
+        segments_video = sorted(
+            (s for s in resultats_segments if s['video'] == chemin),
+            key=lambda s: s['debut']
+        )
+        resultats[chemin] = StockageLandmarks.concatener(s['frames'] for s in segments_video)
+
+    rapport = construire_rapport(resultats_segments, resultats, duree, processus)
+    return resultats, rapport
+
+
+def construire_rapport(resultats_segments, resultats, duree, processus):
+    """Débit global et par cœur, pour vérifier la mise à l'échelle"""
+    frames_utiles = sum(len(frames) for frames in resultats.values())
+    frames_traitees = sum(s['frames_traitees'] for s in resultats_segments)
+    caches = [s['cache'] for s in resultats_segments if s['cache']]
+    frames_cache = sum(c['succes'] for c in caches)
+
+    par_processus = {}
+    for segment in resultats_segments:
+        stats = par_processus.setdefault(segment['pid'], {'frames': 0, 'duree': 0.0})
+        stats['frames'] += segment['frames_traitees']
+        stats['duree'] += segment['duree']
+
+    return {
+        'processus': processus,
+        'duree_s': round(duree, 3),
+        'frames_utiles': frames_utiles,
+        'frames_traitees': frames_traitees,
+        'frames_cache': frames_cache,
+        'frames_rechauffage': frames_traitees - (frames_utiles - frames_cache),
+        'fps_global': round(frames_utiles / duree, 2) if duree > 0 else 0.0,
+        # Frames réellement inférées : les succès du cache ne comptent pas comme du calcul
+        'fps_par_coeur': round(frames_traitees / duree / processus, 2) if duree > 0 else 0.0,
+        'fps_par_processus': {
+            pid: round(stats['frames'] / stats['duree'], 2) if stats['duree'] > 0 else 0.0
+            for pid, stats in par_processus.items()
+        },
+        'cache': {
+            'succes': frames_cache,
+            'echecs': sum(c['echecs'] for c in caches),
+        } if caches else None,
+    }
+
+
+def afficher_rapport(rapport):
+    """Affiche le rapport de débit de l'analyse par lot"""
+    if rapport is None:
+        return
+    print("=== Analyse par lot ===")
+    print(f"Processus: {rapport['processus']} - Durée: {rapport['duree_s']} s")
+    print(f"Frames analysées: {rapport['frames_utiles']} "
+          f"(+{rapport['frames_rechauffage']} de réchauffage)")
+    print(f"FPS global: {rapport['fps_global']} - FPS par cœur: {rapport['fps_par_coeur']}")
+    if rapport['cache']:
+        print(f"Cache d'inférence: {rapport['cache']['succes']} succès, {rapport['cache']['echecs']} échecs")
+    for pid, fps in rapport['fps_par_processus'].items():
+        print(f"  Processus {pid}: {fps} fps")
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse holistique par lot de fichiers vidéo")
+    parser.add_argument('entrees', nargs='+', help="Dossiers et/ou fichiers vidéo")
+    parser.add_argument('--processus', type=int, default=None, help="Taille du pool (défaut: nombre de cœurs)")
+    parser.add_argument('--segment', type=int, default=900, help="Taille des segments en frames")
+    parser.add_argument('--chevauchement', type=int, default=15, help="Frames de réchauffage par segment")
+    parser.add_argument('--sortie', default=None, help="Dossier d'export CSV des landmarks")
+    parser.add_argument('--cache', default=None, help="Base du cache d'inférence (ex. cache_inference.sqlite)")
+    parser.add_argument('--cache-mo', type=float, default=1024, help="Taille maximale du cache en Mo")
+    args = parser.parse_args()
+
+    resultats, rapport = analyser_lot(
+        args.entrees,
+        processus=args.processus,
+        taille_segment=args.segment,
+        chevauchement=args.chevauchement,
+        chemin_cache=args.cache,
+        taille_cache_mo=args.cache_mo
+    )
+    afficher_rapport(rapport)
+
+    if args.sortie:
+        os.makedirs(args.sortie, exist_ok=True)
+        for chemin, frames in resultats.items():
+            nom = os.path.splitext(os.path.basename(chemin))[0]
+            filename = os.path.join(args.sortie, f"{nom}_landmarks.csv")
+            exporter_csv(frames, filename)
+            print(f"Données exportées vers {filename}")
+
+
+if __name__ == "__main__":
+    main()
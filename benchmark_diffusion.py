@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la diffusion des landmarks (diffusion.py)
+Par Dady Akrou Cyrille - Data Scientist
+
+Le processus principal publie des frames synthétiques (543 landmarks, toutes
+parties présentes) à cadence fixe ; un processus client ouvre N abonnements
+et mesure la latence de bout en bout (horodatage de publication -> réception)
+et le nombre de messages reçus par seconde. Le coût de publier() côté boucle
+de détection est mesuré en même temps.
+
+    python benchmark_diffusion.py                    # 1, 10 et 100 abonnés à 30 FPS
+    python benchmark_diffusion.py --fps 120 --abonnes 1 50 200
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+
+import numpy as np
+
+from diffusion import DiffuseurLandmarks, mesurer_abonnes
+from stockage_landmarks import TOTAL_LANDMARKS, PARTIES
+
+
+def _client(port, abonnes, duree_s, mode, resultats):
+    resultats.put(asyncio.run(mesurer_abonnes(abonnes, duree_s, port=port, mode=mode)))
+
+
+def mesurer(abonnes, fps=30.0, duree_s=5.0, mode='file', composantes=4):
+    """Publie pendant la mesure du client ; renvoie les statistiques client et serveur"""
+    landmarks = np.random.default_rng(0).random((TOTAL_LANDMARKS, composantes), dtype=np.float32)
+    presence = np.ones(len(PARTIES), dtype=bool)
+
+    with DiffuseurLandmarks(port=0, mode=mode) as diffuseur:
+        contexte = multiprocessing.get_context('spawn')
+        resultats = contexte.Queue()
+        client = contexte.Process(target=_client, args=(diffuseur.port, abonnes, duree_s, mode, resultats))
+        client.start()
+        while diffuseur.nb_abonnes < abonnes and client.is_alive():
+            time.sleep(0.01)
+
+        couts = []
+        numero = 0
+        periode = 1.0 / fps
+        prochaine = time.perf_counter()
+        while client.is_alive() and resultats.empty():
+            numero += 1
+            debut = time.perf_counter()
+            diffuseur.publier(landmarks, presence, numero)
+            couts.append(time.perf_counter() - debut)
+            prochaine += periode
+            attente = prochaine - time.perf_counter()
+            if attente > 0:
+                time.sleep(attente)
+        stats = resultats.get()
+        client.join()
+        stats.update(diffuseur.statistiques())
+    stats['publier_us'] = round(1e6 * float(np.mean(couts)), 1) if couts else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la diffusion des landmarks")
+    parser.add_argument('--abonnes', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--fps', type=float, default=30.0, help="Cadence de publication")
+    parser.add_argument('--duree', type=float, default=5.0, help="Durée de chaque mesure en secondes")
+    parser.add_argument('--mode', choices=('file', 'dernier'), default='file')
+    args = parser.parse_args()
+
+    print(f"Publication à {args.fps:.0f} FPS, mode '{args.mode}', {args.duree:.0f} s par mesure")
+    print(f"{'Abonnés':>8} {'msg/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'publier µs':>11} {'jetés':>7}")
+    for abonnes in args.abonnes:
+        stats = mesurer(abonnes, args.fps, args.duree, args.mode)
+        print(f"{abonnes:>8} {stats.get('messages_par_s', 0):>9} {stats.get('latence_p50_ms', 0):>8} "
+              f"{stats.get('latence_p95_ms', 0):>8} {stats.get('latence_p99_ms', 0):>8} "
+              f"{stats['publier_us']:>11} {stats['messages_jetes']:>7}")
+
+
+if __name__ == "__main__":
+    main()
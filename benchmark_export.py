@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des formats d'export des landmarks : CSV contre flux binaire .lmk
+Par Dady Akrou Cyrille - Data Scientist
+
+Compare sur des données synthétiques :
+- le débit d'écriture (frames/s)
+- la taille du fichier produit
+- le temps d'accès à un intervalle de frames en relecture
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from format_binaire import EcrivainLandmarks, LecteurLandmarks
+from stockage_landmarks import TOTAL_LANDMARKS, PARTIES, StockageLandmarks, exporter_csv
+
+
+def generer_session(nb_frames, graine=0):
+    """Session synthétique: visage, pose et main droite détectés, main gauche absente"""
+    rng = np.random.default_rng(graine)
+    stockage = StockageLandmarks(composantes=3, taille_bloc=nb_frames)
+    presence = np.array([True, True, False, True])
+    landmarks = rng.random((TOTAL_LANDMARKS, 3), dtype=np.float32)
+    debut_ns = time.time_ns()
+    for i in range(nb_frames):
+        landmarks += rng.normal(0, 0.001, landmarks.shape).astype(np.float32)
+        stockage.ajouter_tableau(landmarks, presence, i + 1, debut_ns + i * 33_000_000)
+    stockage.landmarks[:, 501:522] = np.nan
+    return stockage
+
+
+def mesurer_csv(stockage, chemin):
+    debut = time.perf_counter()
+    exporter_csv(stockage, chemin)
+    return time.perf_counter() - debut
+
+
+def mesurer_binaire(stockage, chemin):
+    """Écriture frame par frame, comme pendant une capture"""
+    debut = time.perf_counter()
+    with EcrivainLandmarks(chemin, composantes=stockage.composantes) as ecrivain:
+        for ligne in range(len(stockage)):
+            ecrivain.ajouter_tableau(
+                stockage.landmarks[ligne], stockage.presence[ligne],
+                stockage.frames[ligne], stockage.timestamps[ligne]
+            )
+    return time.perf_counter() - debut
+
+
+def mesurer_relecture_binaire(chemin, debut_ligne, fin_ligne):
+    debut = time.perf_counter()
+    lecteur = LecteurLandmarks(chemin)
+    landmarks = lecteur.lire(debut_ligne, fin_ligne)[0]
+    float(np.nansum(landmarks))
+    return time.perf_counter() - debut
+
+
+def mesurer_relecture_csv(chemin, debut_ligne, fin_ligne):
+    """Le CSV doit être parcouru depuis le début pour atteindre un intervalle"""
+    debut = time.perf_counter()
+    selection = []
+    with open(chemin, encoding='utf-8') as fichier:
+        next(fichier)
+        for ligne in fichier:
+            frame = int(ligne.split(',', 1)[0])
+            if frame > fin_ligne:
+                break
+            if frame > debut_ligne:
+                selection.append(ligne)
+    return time.perf_counter() - debut
+
+
+def main(nb_frames=1000):
+    print(f"Génération d'une session synthétique de {nb_frames} frames "
+          f"({TOTAL_LANDMARKS} landmarks, {len(PARTIES)} parties)...")
+    stockage = generer_session(nb_frames)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin_csv = os.path.join(dossier, 'session.csv')
+        chemin_lmk = os.path.join(dossier, 'session.lmk')
+
+        duree_csv = mesurer_csv(stockage, chemin_csv)
+        duree_lmk = mesurer_binaire(stockage, chemin_lmk)
+        taille_csv = os.path.getsize(chemin_csv)
+        taille_lmk = os.path.getsize(chemin_lmk)
+
+        # Relecture d'un intervalle de 100 frames en fin de session
+        debut_ligne, fin_ligne = max(nb_frames - 100, 0), nb_frames
+        relecture_csv = mesurer_relecture_csv(chemin_csv, debut_ligne, fin_ligne)
+        relecture_lmk = mesurer_relecture_binaire(chemin_lmk, debut_ligne, fin_ligne)
+
+    print("=== Écriture ===")
+    print(f"{'Format':<8} {'Durée (s)':>10} {'Frames/s':>10} {'Taille (Mo)':>12}")
+    print(f"{'CSV':<8} {duree_csv:>10.3f} {nb_frames / duree_csv:>10.0f} {taille_csv / 1e6:>12.2f}")
+    print(f"{'.lmk':<8} {duree_lmk:>10.3f} {nb_frames / duree_lmk:>10.0f} {taille_lmk / 1e6:>12.2f}")
+    print(f"Accélération écriture: x{duree_csv / duree_lmk:.1f} - "
+          f"Réduction taille: x{taille_csv / taille_lmk:.1f}")
+    print("=== Relecture des 100 dernières frames ===")
+    print(f"CSV: {relecture_csv * 1000:.1f} ms - .lmk: {relecture_lmk * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
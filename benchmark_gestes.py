@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du moteur de gestes vectorisé
+Par Dady Akrou Cyrille - Data Scientist
+
+Mesure le coût par frame (deux mains) avec les gestes par défaut puis avec
+plus de 20 gestes actifs, en direct (une frame à la fois) et en lot sur une
+session enregistrée. Sert de référence l'ancienne vérification landmark par
+landmark en Python sur les protobufs MediaPipe, dont le coût croît avec
+chaque geste ajouté.
+"""
+
+import sys
+import time
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from gestes import Geste, MoteurGestes
+
+DOIGTS = [(4, 3, 2), (8, 6, 5), (12, 10, 9), (16, 14, 13), (20, 18, 17)]
+
+
+def gestes_synthetiques(nombre, graine=0):
+    """Gestes aléatoires de 4 à 6 conditions sur les extrémités/PIP/MCP"""
+    rng = np.random.default_rng(graine)
+    gestes = []
+    for i in range(nombre):
+        conditions = []
+        for _ in range(rng.integers(4, 7)):
+            extremite, pip, mcp = DOIGTS[rng.integers(len(DOIGTS))]
+            autre = pip if rng.random() < 0.5 else mcp
+            conditions.append((str(rng.choice(['x', 'y'])), extremite, str(rng.choice(['<', '>'])), autre))
+        gestes.append(Geste(f"geste_{i}", conditions, minimum=len(conditions) - 1))
+    return gestes
+
+
+def evaluer_en_python(gestes, main):
+    """Référence : une comparaison Python par condition, comme les anciennes méthodes detecter_geste_*"""
+    for geste in gestes:
+        satisfaites = 0
+        for axe, a, operateur, b in geste.conditions:
+            va = getattr(main[a], axe)
+            vb = getattr(main[b], axe)
+            if (va < vb) if operateur == '<' else (va > vb):
+                satisfaites += 1
+        if satisfaites >= geste.minimum:
+            return geste.nom
+    return None
+
+
+def vers_protobuf(main):
+    """Main (21, 3) vers une NormalizedLandmarkList, comme dans les résultats MediaPipe"""
+    liste = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in main.tolist():
+        point = liste.landmark.add()
+        point.x, point.y, point.z = x, y, z
+    return liste.landmark
+
+
+def chronometrer(fonction, repetitions):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        fonction()
+    return (time.perf_counter() - debut) / repetitions
+
+
+def main(nb_gestes=24, nb_frames=10000):
+    rng = np.random.default_rng(1)
+    session = rng.random((nb_frames, 2, 21, 3), dtype=np.float32)
+    deux_mains = session[0]
+    points = [vers_protobuf(main) for main in deux_mains]
+
+    print(f"{'Configuration':<34} {'µs/frame':>10}")
+    for titre, gestes in (("gestes par défaut", None), (f"{nb_gestes} gestes", gestes_synthetiques(nb_gestes))):
+        moteur = MoteurGestes(gestes)
+        liste = moteur.gestes
+
+        direct = chronometrer(lambda: moteur.classifier(deux_mains), 2000)
+        lot = chronometrer(lambda: moteur.evaluer(session.reshape(-1, 21, 3)), 5) / nb_frames
+        python = chronometrer(lambda: [evaluer_en_python(liste, main) for main in points], 2000)
+
+        print(f"{'Moteur direct, ' + titre:<34} {direct * 1e6:>10.2f}")
+        print(f"{'Moteur en lot, ' + titre:<34} {lot * 1e6:>10.3f}")
+        print(f"{'Python pur, ' + titre:<34} {python * 1e6:>10.2f}")
+
+    # Vérification : même verdict que la référence Python
+    moteur = MoteurGestes(gestes_synthetiques(nb_gestes))
+    echantillon = session[:200].reshape(-1, 21, 3)
+    attendus = [evaluer_en_python(moteur.gestes, vers_protobuf(m)) for m in echantillon]
+    assert moteur.classifier(echantillon) == attendus
+    print("Verdicts identiques à la référence Python ✅")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 24)
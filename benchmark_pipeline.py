@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suite de benchmarks de la détection holistique avec détection de régressions
+Par Dady Akrou Cyrille - Data Scientist
+
+Exécute le traitement hors ligne (hors_ligne.py) sur un ensemble fixe de
+clips locaux et sur un clip synthétique généré, pour plusieurs configurations :
+sous-modèle (holistic, pose, mains, visage), image complète / ROI, model_complexity 0/1/2, refine_face_landmarks,
+dessin activé ou non, export aucun / CSV / .lmk.
+
+Par défaut chaque dimension varie seule autour d'une configuration de
+référence ; --complet parcourt toutes les combinaisons. Chaque configuration
+tourne dans un processus neuf pour que le pic de mémoire (RSS) lui soit propre.
+
+Mesures enregistrées en JSON : FPS, percentiles de latence par étape,
+pic RSS, utilisation CPU. Avec --reference, les résultats sont comparés à
+une exécution précédente et le script sort en erreur au-delà des seuils.
+
+    python benchmark_pipeline.py --clips clips/ --sortie resultats.json
+    python benchmark_pipeline.py --clips clips/ --reference reference.json --seuil-fps 0.1
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows : pas de pic RSS
+    resource = None
+
+from analyse_lot import lister_videos
+
+CONFIGURATION_REFERENCE = {
+    'mode': 'holistic',
+    'roi': False,
+    'complexite': 1,
+    'raffiner_visage': False,
+    'dessin': False,
+    'export': 'aucun',
+}
+
+VARIANTES = {
+    'mode': ['holistic', 'pose', 'mains', 'visage'],
+    'roi': [False, True],
+    'complexite': [0, 1, 2],
+    'raffiner_visage': [False, True],
+    'dessin': [False, True],
+    'export': ['aucun', 'csv', 'lmk'],
+}
+
+SEUILS_PAR_DEFAUT = {'fps': 0.10, 'latence_p95': 0.15, 'rss': 0.20}
+
+
+def generer_clip_synthetique(chemin, frames=120, taille=(640, 480), graine=0):
+    """Clip déterministe : silhouette simplifiée en mouvement sur fond bruité"""
+    rng = np.random.default_rng(graine)
+    largeur, hauteur = taille
+    fond = rng.integers(0, 60, (hauteur, largeur, 3), dtype=np.uint8)
+    writer = cv2.VideoWriter(chemin, cv2.VideoWriter_fourcc(*'mp4v'), 30, taille)
+    for i in range(frames):
+        image = fond.copy()
+        cx = int(largeur * (0.3 + 0.4 * (i % 60) / 60))
+        cv2.circle(image, (cx, hauteur // 4), 40, (180, 200, 230), -1)
+        cv2.rectangle(image, (cx - 50, hauteur // 4 + 45), (cx + 50, hauteur // 4 + 220), (60, 90, 160), -1)
+        for cote in (-1, 1):
+            cv2.line(image, (cx + cote * 50, hauteur // 4 + 60),
+                     (cx + cote * 110, hauteur // 4 + 150 + (i % 20) * cote), (180, 200, 230), 18)
+        writer.write(image)
+    writer.release()
+    return chemin
+
+
+def lister_configurations(complet=False):
+    """Variation d'une dimension à la fois, ou produit cartésien complet"""
+    if complet:
+        noms = list(VARIANTES)
+        return [dict(zip(noms, valeurs)) for valeurs in itertools.product(*VARIANTES.values())]
+    configurations = [dict(CONFIGURATION_REFERENCE)]
+    for nom, valeurs in VARIANTES.items():
+        for valeur in valeurs:
+            if valeur != CONFIGURATION_REFERENCE[nom]:
+                configurations.append({**CONFIGURATION_REFERENCE, nom: valeur})
+    return configurations
+
+
+def nom_configuration(configuration):
+    # Les noms des configurations holistic restent ceux des résultats de référence existants
+    mode = configuration.get('mode', 'holistic')
+    return (f"{'' if mode == 'holistic' else mode + '_'}"
+            f"{'roi' if configuration['roi'] else 'complet'}"
+            f"_c{configuration['complexite']}"
+            f"{'_iris' if configuration['raffiner_visage'] else ''}"
+            f"{'_dessin' if configuration['dessin'] else ''}"
+            f"_{configuration['export']}")
+
+
+def executer_configuration(clip, configuration, max_frames, rechauffage, dossier):
+    """Exécuté dans un processus dédié : renvoie les mesures d'une configuration"""
+    from hors_ligne import traiter_hors_ligne
+
+    sortie_landmarks = None
+    if configuration['export'] != 'aucun':
+        sortie_landmarks = os.path.join(dossier, f"landmarks.{configuration['export']}")
+
+    debut_cpu = time.process_time()
+    debut = time.perf_counter()
+    rapport = traiter_hors_ligne(
+        clip,
+        sortie_landmarks=sortie_landmarks,
+        max_frames=max_frames,
+        rechauffage=rechauffage,
+        complexite=configuration['complexite'],
+        mode_roi=configuration['roi'],
+        raffiner_visage=configuration['raffiner_visage'],
+        dessin=configuration['dessin'],
+        mode=configuration.get('mode', 'holistic'),
+    )
+    duree = time.perf_counter() - debut
+    cpu = time.process_time() - debut_cpu
+
+    latences = rapport['latences_ms']
+    return {
+        'clip': os.path.basename(clip),
+        'configuration': nom_configuration(configuration),
+        'parametres': configuration,
+        'frames': rapport['frames_mesurees'],
+        'fps': rapport['fps'],
+        'latences_ms': {etape: valeurs for etape, valeurs in latences.items() if valeurs['max'] > 0},
+        # Sur Linux ru_maxrss est en kilo-octets
+        'pic_rss_mo': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None,
+        # Peut dépasser 100 % : MediaPipe utilise plusieurs threads
+        'cpu_pourcent': round(100 * cpu / duree, 1) if duree > 0 else 0.0,
+    }
+
+
+def executer_suite(clips, configurations, max_frames=300, rechauffage=10):
+    contexte = multiprocessing.get_context('spawn')
+    resultats = []
+    with tempfile.TemporaryDirectory() as dossier:
+        for clip in clips:
+            for configuration in configurations:
+                # Un processus neuf par mesure : pic RSS et caches non partagés
+                with ProcessPoolExecutor(max_workers=1, mp_context=contexte) as executeur:
+                    futur = executeur.submit(executer_configuration, clip, configuration,
+                                             max_frames, rechauffage, dossier)
+                    try:
+                        resultat = futur.result()
+                    except Exception as e:
+                        # Par exemple un modèle model_complexity 0/2 non téléchargeable hors ligne
+                        print(f"{os.path.basename(clip):<24} {nom_configuration(configuration):<28} échec: {e}")
+                        resultats.append({'clip': os.path.basename(clip),
+                                          'configuration': nom_configuration(configuration),
+                                          'parametres': configuration, 'erreur': str(e)})
+                        continue
+                print(f"{resultat['clip']:<24} {resultat['configuration']:<28} "
+                      f"{resultat['fps']:>7.2f} fps  p95 {resultat['latences_ms']['total']['p95']:>7.2f} ms  "
+                      f"RSS {resultat['pic_rss_mo']} Mo  CPU {resultat['cpu_pourcent']} %")
+                resultats.append(resultat)
+    return resultats
+
+
+def environnement():
+    import mediapipe as mp
+    return {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'plateforme': platform.platform(),
+        'processeur': platform.processor() or platform.machine(),
+        'coeurs': os.cpu_count(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'mediapipe': mp.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def comparer(resultats, reference, seuils):
+    """Liste des régressions au-delà des seuils relatifs par rapport à la référence"""
+    anciens = {(r['clip'], r['configuration']): r for r in reference['resultats']}
+    regressions = []
+    for resultat in resultats:
+        ancien = anciens.get((resultat['clip'], resultat['configuration']))
+        if ancien is None or 'erreur' in ancien or 'erreur' in resultat:
+            continue
+        mesures = [
+            ('fps', ancien['fps'], resultat['fps'], -1),
+            ('latence_p95', ancien['latences_ms']['total']['p95'], resultat['latences_ms']['total']['p95'], 1),
+            ('rss', ancien['pic_rss_mo'], resultat['pic_rss_mo'], 1),
+        ]
+        for nom, avant, apres, sens in mesures:
+            if not avant or apres is None:
+                continue
+            # sens = -1 : une baisse est une régression (FPS)
+            ecart = sens * (apres - avant) / avant
+            if ecart > seuils[nom]:
+                regressions.append({
+                    'clip': resultat['clip'],
+                    'configuration': resultat['configuration'],
+                    'mesure': nom,
+                    'reference': avant,
+                    'actuel': apres,
+                    'ecart_pourcent': round(100 * ecart, 1),
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de la détection holistique")
+    parser.add_argument('--clips', nargs='*', default=[], help="Dossiers et/ou fichiers vidéo de référence")
+    parser.add_argument('--sans-synthetique', action='store_true', help="N'ajoute pas le clip généré")
+    parser.add_argument('--complet', action='store_true', help="Toutes les combinaisons de configurations")
+    parser.add_argument('--max-frames', type=int, default=300, help="Frames traitées par clip")
+    parser.add_argument('--rechauffage', type=int, default=10, help="Frames exclues de la mesure")
+    parser.add_argument('--sortie', default='benchmark_resultats.json', help="Fichier de résultats JSON")
+    parser.add_argument('--reference', default=None, help="Résultats de référence à comparer")
+    parser.add_argument('--seuil-fps', type=float, default=SEUILS_PAR_DEFAUT['fps'],
+                        help="Baisse relative de FPS tolérée")
+    parser.add_argument('--seuil-latence', type=float, default=SEUILS_PAR_DEFAUT['latence_p95'],
+                        help="Hausse relative tolérée de la latence p95")
+    parser.add_argument('--seuil-rss', type=float, default=SEUILS_PAR_DEFAUT['rss'],
+                        help="Hausse relative tolérée du pic RSS")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        clips = lister_videos(args.clips) if args.clips else []
+        if not args.sans_synthetique:
+            clips.append(generer_clip_synthetique(os.path.join(dossier, 'synthetique.mp4')))
+        if not clips:
+            parser.error("aucun clip à mesurer")
+
+        configurations = lister_configurations(args.complet)
+        print(f"{len(clips)} clips x {len(configurations)} configurations")
+        resultats = executer_suite(clips, configurations, args.max_frames, args.rechauffage)
+
+    sortie = {'environnement': environnement(), 'max_frames': args.max_frames, 'resultats': resultats}
+    with open(args.sortie, 'w') as f:
+        json.dump(sortie, f, indent=2)
+    print(f"Résultats écrits dans {args.sortie}")
+
+    if args.reference:
+        with open(args.reference) as f:
+            reference = json.load(f)
+        seuils = {'fps': args.seuil_fps, 'latence_p95': args.seuil_latence, 'rss': args.seuil_rss}
+        regressions = comparer(resultats, reference, seuils)
+        if regressions:
+            print(f"❌ {len(regressions)} régression(s) par rapport à {args.reference}:")
+            for r in regressions:
+                print(f"  {r['clip']} {r['configuration']} {r['mesure']}: "
+                      f"{r['reference']} -> {r['actuel']} ({r['ecart_pourcent']:+.1f} %)")
+            raise SystemExit(1)
+        print(f"✅ Aucune régression par rapport à {args.reference}")
+
+
+if __name__ == "__main__":
+    main()
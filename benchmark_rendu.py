@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du dessin des landmarks
+Par Dady Akrou Cyrille - Data Scientist
+
+Compare le temps de dessin par frame (image 1280x720, visage + pose + deux mains) :
+- mp_drawing.draw_landmarks (dessiner_landmarks de detection_pose_holistic.py)
+- RenduLandmarks à partir des résultats MediaPipe, pour chaque niveau de détail
+- RenduLandmarks à partir d'un tableau déjà extrait (stockage, rejeu)
+"""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from detection_pose_holistic import dessiner_landmarks
+from rendu import NIVEAUX, RenduLandmarks
+from stockage_landmarks import NB_LANDMARKS, TOTAL_LANDMARKS, PARTIES, ATTRIBUTS_RESULTATS, extraire_landmarks
+
+
+def resultats_synthetiques(graine=0):
+    """Résultats au format MediaPipe avec toutes les parties détectées"""
+    rng = np.random.default_rng(graine)
+    champs = {}
+    for partie in PARTIES:
+        liste = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z in rng.uniform(0.2, 0.8, (NB_LANDMARKS[partie], 3)).tolist():
+            point = liste.landmark.add()
+            point.x, point.y, point.z = x, y, z
+            if partie == 'pose':
+                point.visibility = 0.9
+        champs[ATTRIBUTS_RESULTATS[partie]] = liste
+    return SimpleNamespace(**champs)
+
+
+def chronometrer(fonction, repetitions=200):
+    fonction()
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        fonction()
+    return 1000 * (time.perf_counter() - debut) / repetitions
+
+
+def main():
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    results = resultats_synthetiques()
+    landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+    presence = np.zeros(len(PARTIES), dtype=bool)
+    extraire_landmarks(results, landmarks, presence)
+
+    reference = chronometrer(lambda: dessiner_landmarks(image, results))
+    print(f"{'Méthode':<40} {'ms/frame':>9} {'gain':>7}")
+    print(f"{'mp_drawing.draw_landmarks':<40} {reference:>9.3f} {'x1.0':>7}")
+
+    for niveau in NIVEAUX:
+        rendu = RenduLandmarks(niveau)
+        depuis_resultats = chronometrer(lambda: rendu.dessiner_resultats(image, results))
+        depuis_tableau = chronometrer(lambda: rendu.dessiner(image, landmarks, presence))
+        print(f"{'RenduLandmarks ' + niveau + ' (résultats)':<40} {depuis_resultats:>9.3f} "
+              f"{'x%.1f' % (reference / depuis_resultats):>7}")
+        print(f"{'RenduLandmarks ' + niveau + ' (tableau)':<40} {depuis_tableau:>9.3f} "
+              f"{'x%.1f' % (reference / depuis_tableau):>7}")
+
+
+if __name__ == "__main__":
+    main()
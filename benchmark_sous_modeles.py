@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'exécution sélective des sous-modèles
+Par Dady Akrou Cyrille - Data Scientist
+
+Compare la latence de process() pour chaque mode (holistic, pose, mains,
+visage) sur les mêmes frames RGB, décodées une seule fois à l'avance. Les
+premières frames réchauffent le modèle et sont exclues de la mesure.
+
+    python benchmark_sous_modeles.py                # clip synthétique généré
+    python benchmark_sous_modeles.py clip.mp4 300   # clip local, 300 frames
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from sous_modeles import MODES, creer_session
+from stockage_landmarks import TOTAL_LANDMARKS, PARTIES, extraire_landmarks
+
+
+def charger_frames(chemin, max_frames):
+    """Frames RGB du clip, décodées avant toute mesure"""
+    cap = cv2.VideoCapture(chemin)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def mesurer_mode(mode, frames, rechauffage=10):
+    """Latences (ms) de process() et nombre de frames où chaque partie est détectée"""
+    landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+    presence = np.zeros(len(PARTIES), dtype=bool)
+    detections = np.zeros(len(PARTIES), dtype=int)
+    latences = []
+    with creer_session(mode) as session:
+        for i, image in enumerate(frames):
+            debut = time.perf_counter()
+            results = session.process(image)
+            duree = time.perf_counter() - debut
+            if i < rechauffage:
+                continue
+            latences.append(1000 * duree)
+            extraire_landmarks(results, landmarks, presence)
+            detections += presence
+    return np.array(latences), detections
+
+
+def main(chemin=None, max_frames=200):
+    with tempfile.TemporaryDirectory() as dossier:
+        if chemin is None:
+            from benchmark_pipeline import generer_clip_synthetique
+            chemin = generer_clip_synthetique(os.path.join(dossier, 'synthetique.mp4'), frames=max_frames)
+        frames = charger_frames(chemin, max_frames)
+    if not frames:
+        raise SystemExit(f"Aucune frame lue dans {chemin}")
+
+    print(f"{len(frames)} frames {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"{'Mode':<10} {'p50 ms':>8} {'p95 ms':>8} {'moyenne':>8} {'vs holistic':>12}  détections")
+    reference = None
+    for mode in reversed(MODES):
+        latences, detections = mesurer_mode(mode, frames)
+        moyenne = latences.mean()
+        if reference is None:
+            reference = moyenne
+        detail = ' '.join(f"{partie}={n}" for partie, n in zip(PARTIES, detections) if partie in MODES[mode])
+        print(f"{mode:<10} {np.percentile(latences, 50):>8.2f} {np.percentile(latences, 95):>8.2f} "
+              f"{moyenne:>8.2f} {reference / moyenne:>11.2f}x  {detail}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 200)
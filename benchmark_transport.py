@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du transport de frames entre processus
+Par Dady Akrou Cyrille - Data Scientist
+
+Compare multiprocessing.Queue (frame sérialisée à chaque envoi) et l'anneau
+de mémoire partagée de transport_partage.py, sans modèle : le processus
+travailleur lit la frame et renvoie un tableau de landmarks factice. Mesure
+le débit et la latence aller-retour (soumission -> résultat) en 1080p.
+
+    python benchmark_transport.py              # 1080p, 300 frames
+    python benchmark_transport.py 720 600      # 720p, 600 frames
+"""
+
+import multiprocessing
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from stockage_landmarks import TOTAL_LANDMARKS, PARTIES
+from transport_partage import DTYPE_RESULTAT, FIN_TRAVAIL, TransportFrames
+
+
+def _travailleur_file(entree, sortie):
+    """Reçoit des frames sérialisées, renvoie des landmarks factices"""
+    landmarks = np.zeros((TOTAL_LANDMARKS, 4), dtype=np.float32)
+    presence = np.ones(len(PARTIES), dtype=bool)
+    while True:
+        message = entree.get()
+        if message == FIN_TRAVAIL:
+            break
+        numero, frame = message
+        landmarks[0, 0] = frame[::64, ::64].mean()
+        sortie.put((numero, landmarks, presence))
+
+
+def _travailleur_partage(nom_frames, nom_resultats, forme, emplacements, a_inferer, inferees, options):
+    """Même travail que _travailleur_file, frames et résultats lus et écrits en place"""
+    segment_frames = shared_memory.SharedMemory(name=nom_frames)
+    segment_resultats = shared_memory.SharedMemory(name=nom_resultats)
+    frames = np.ndarray((emplacements,) + forme, dtype=np.uint8, buffer=segment_frames.buf)
+    resultats = np.ndarray((emplacements,), dtype=DTYPE_RESULTAT, buffer=segment_resultats.buf)
+    while True:
+        message = a_inferer.get()
+        if message == FIN_TRAVAIL:
+            break
+        emplacement, numero = message
+        resultats['landmarks'][emplacement, 0, 0] = frames[emplacement, ::64, ::64].mean()
+        resultats['presence'][emplacement] = True
+        resultats['numero'][emplacement] = numero
+        inferees.put(emplacement)
+    del frames, resultats
+    segment_frames.close()
+    segment_resultats.close()
+
+
+def mesurer_file(source, frames, en_vol):
+    """Transport par multiprocessing.Queue avec `en_vol` frames en cours au plus"""
+    contexte = multiprocessing.get_context('spawn')
+    entree, sortie = contexte.Queue(), contexte.Queue()
+    processus = contexte.Process(target=_travailleur_file, args=(entree, sortie), daemon=True)
+    processus.start()
+    # Réchauffage : démarrage du processus exclu de la mesure
+    entree.put((0, source))
+    sortie.get()
+
+    soumissions = {}
+    latences = []
+    numero = 0
+    debut = time.perf_counter()
+    while len(latences) < frames:
+        while numero < frames and len(soumissions) < en_vol:
+            numero += 1
+            soumissions[numero] = time.perf_counter()
+            entree.put((numero, source))
+        recu, landmarks, presence = sortie.get()
+        latences.append(time.perf_counter() - soumissions.pop(recu))
+    duree = time.perf_counter() - debut
+
+    entree.put(FIN_TRAVAIL)
+    processus.join()
+    return duree, latences
+
+
+def mesurer_partage(source, frames, en_vol):
+    """Transport par l'anneau de mémoire partagée (`en_vol` emplacements)"""
+    with TransportFrames(source.shape, en_vol, travailleur=_travailleur_partage) as transport:
+        emplacement, vue = transport.reserver()
+        vue[...] = source
+        transport.soumettre(emplacement, 0)
+        transport.liberer(transport.recevoir()[0])
+
+        soumissions = {}
+        latences = []
+        numero = 0
+        debut = time.perf_counter()
+        while len(latences) < frames:
+            while numero < frames:
+                emplacement, vue = transport.reserver()
+                if emplacement is None:
+                    break
+                numero += 1
+                soumissions[emplacement] = time.perf_counter()
+                # La capture écrit la frame une seule fois, directement dans l'emplacement
+                vue[...] = source
+                transport.soumettre(emplacement, numero)
+            emplacement, frame, landmarks, presence = transport.recevoir()
+            latences.append(time.perf_counter() - soumissions.pop(emplacement))
+            transport.liberer(emplacement)
+        duree = time.perf_counter() - debut
+    return duree, latences
+
+
+def main(hauteur=1080, frames=300, en_vol=4):
+    largeur = hauteur * 16 // 9
+    source = np.random.default_rng(0).integers(0, 256, (hauteur, largeur, 3), dtype=np.uint8)
+    print(f"Transport de {frames} frames {largeur}x{hauteur} ({source.nbytes / 1e6:.1f} Mo), "
+          f"{en_vol} frames en vol")
+    print(f"{'Transport':<22} {'FPS':>8} {'latence moy.':>14} {'latence p95':>13}")
+
+    resultats = {}
+    for nom, mesurer in (('multiprocessing.Queue', mesurer_file), ('mémoire partagée', mesurer_partage)):
+        duree, latences = mesurer(source, frames, en_vol)
+        latences_ms = np.array(latences) * 1000
+        resultats[nom] = frames / duree
+        print(f"{nom:<22} {frames / duree:>8.1f} {latences_ms.mean():>11.2f} ms "
+              f"{np.percentile(latences_ms, 95):>10.2f} ms")
+
+    gain = resultats['mémoire partagée'] / resultats['multiprocessing.Queue']
+    print(f"\nGain de débit de la mémoire partagée: x{gain:.1f}")
+    return resultats
+
+
+if __name__ == "__main__":
+    hauteur = int(sys.argv[1]) if len(sys.argv) > 1 else 1080
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    main(hauteur, frames)
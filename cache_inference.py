@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache persistant des résultats d'inférence, adressé par le contenu
+Par Dady Akrou Cyrille - Data Scientist
+
+Les traitements par lot repassent souvent les mêmes clips avec d'autres
+réglages en aval : chaque passe refaisait tous les holistic.process().
+Ce cache conserve sur disque les landmarks de chaque frame :
+- clé = empreinte SHA-256 du contenu du fichier source + numéro de frame
+  + empreinte des paramètres du modèle (seuils de confiance, complexité...)
+- une frame présente dans le cache n'est ni convertie ni inférée
+- taille bornée, éviction des frames les moins récemment lues (LRU)
+- statistiques de succès / échecs
+- base SQLite en mode WAL : plusieurs processus (analyse_lot.py) peuvent
+  lire et écrire en même temps
+
+En mode suivi, le résultat d'une frame dépend des frames précédentes :
+- le découpage fait partie de la clé (`segmentation` : 'continu' pour
+  hors_ligne.py, taille de segment et chevauchement pour analyse_lot.py), une
+  passe par segments ne sert donc pas ses frames à une passe continue
+- une frame en cache n'est pas inférée, mais les RECHAUFFAGE_SUIVI frames qui
+  précèdent une frame absente le sont quand même (résultat ignoré) : le suivi
+  n'arrive pas sur la frame manquante avec l'état d'une frame lointaine
+- le cache garde le premier résultat calculé pour une clé donnée
+
+    python cache_inference.py cache_inference.sqlite            # statistiques
+    python cache_inference.py cache_inference.sqlite --vider
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from stockage_landmarks import TOTAL_LANDMARKS, PARTIES
+
+CHEMIN_PAR_DEFAUT = 'cache_inference.sqlite'
+TAILLE_LANDMARKS = TOTAL_LANDMARKS * 4 * 4  # (543, 4) float32
+# Frames inférées avant une frame absente du cache pour réchauffer le suivi
+RECHAUFFAGE_SUIVI = 15
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resultats (
+    source TEXT NOT NULL,
+    parametres TEXT NOT NULL,
+    frame INTEGER NOT NULL,
+    landmarks BLOB NOT NULL,
+    presence BLOB NOT NULL,
+    acces REAL NOT NULL,
+    PRIMARY KEY (source, parametres, frame)
+);
+CREATE INDEX IF NOT EXISTS resultats_acces ON resultats (acces);
+CREATE TABLE IF NOT EXISTS empreintes (
+    chemin TEXT PRIMARY KEY,
+    taille INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    empreinte TEXT NOT NULL
+);
+"""
+
+
+# Options sans effet sur la clé quand elles gardent leur valeur par défaut :
+# un appelant qui ne les précise pas partage les entrées de celui qui les précise
+OPTIONS_NEUTRES = {
+    'mode': 'holistic',
+    'static_image_mode': False,
+    'smooth_landmarks': True,
+    'refine_face_landmarks': False,
+    'mode_roi': False,
+    'resolution_max': None,
+}
+
+
+def empreinte_parametres(**parametres):
+    """Empreinte courte et stable des paramètres du modèle"""
+    parametres = {nom: valeur for nom, valeur in parametres.items()
+                  if nom not in OPTIONS_NEUTRES or OPTIONS_NEUTRES[nom] != valeur}
+    texte = json.dumps(parametres, sort_keys=True, default=str)
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()[:16]
+
+
+def rechauffage_requis(numero, en_cache, fenetre=RECHAUFFAGE_SUIVI, premiere=1, derniere=None):
+    """
+    Vrai si une frame utile absente du cache suit la frame `numero` de moins de `fenetre` frames
+    Seules les frames [premiere, derniere] sont utiles (derniere=None : pas de limite)
+    """
+    fin = numero + fenetre if derniere is None else min(numero + fenetre, derniere)
+    return any(suivante not in en_cache for suivante in range(max(numero + 1, premiere), fin + 1))
+
+
+class CacheInference:
+    """Cache LRU sur disque des landmarks (543, 4) et de la présence (4,) par frame"""
+
+    def __init__(self, chemin=CHEMIN_PAR_DEFAUT, taille_max_mo=1024, frames_par_transaction=256):
+        self.chemin = chemin
+        self.taille_max_octets = int(taille_max_mo * 1024 * 1024)
+        self.frames_par_transaction = frames_par_transaction
+        # Attente jusqu'à 30 s si un autre processus écrit
+        self._connexion = sqlite3.connect(chemin, timeout=30, isolation_level=None)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute("PRAGMA synchronous=NORMAL")
+        self._connexion.executescript(SCHEMA)
+
+        self._a_ecrire = []
+        self._lus = []
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def empreinte_source(self, chemin):
+        """SHA-256 du contenu du fichier, recalculé seulement si taille ou date changent"""
+        chemin = os.path.abspath(chemin)
+        etat = os.stat(chemin)
+        ligne = self._connexion.execute(
+            "SELECT empreinte FROM empreintes WHERE chemin = ? AND taille = ? AND mtime_ns = ?",
+            (chemin, etat.st_size, etat.st_mtime_ns)).fetchone()
+        if ligne:
+            return ligne[0]
+
+        sha = hashlib.sha256()
+        with open(chemin, 'rb') as fichier:
+            for morceau in iter(lambda: fichier.read(1024 * 1024), b''):
+                sha.update(morceau)
+        empreinte = sha.hexdigest()
+        self._connexion.execute(
+            "INSERT OR REPLACE INTO empreintes VALUES (?, ?, ?, ?)",
+            (chemin, etat.st_size, etat.st_mtime_ns, empreinte))
+        return empreinte
+
+    def cle(self, chemin, **parametres):
+        """Clé (source, paramètres) d'un fichier traité avec ces paramètres"""
+        return self.empreinte_source(chemin), empreinte_parametres(**parametres)
+
+    def frames_presentes(self, cle):
+        """Numéros des frames en cache pour cette clé (sans compter de succès)"""
+        lignes = self._connexion.execute(
+            "SELECT frame FROM resultats WHERE source = ? AND parametres = ?", cle).fetchall()
+        return {frame for frame, in lignes}
+
+    def lire(self, cle, frame, landmarks, presence):
+        """
+        Remplit landmarks (543, 3 ou 4) et presence (4,) si la frame est en cache
+        Renvoie True en cas de succès
+        """
+        ligne = self._connexion.execute(
+            "SELECT landmarks, presence FROM resultats WHERE source = ? AND parametres = ? AND frame = ?",
+            cle + (frame,)).fetchone()
+        if ligne is None:
+            self.echecs += 1
+            return False
+        self._decoder(ligne, landmarks, presence)
+        self._noter_lecture(cle, frame)
+        return True
+
+    def lire_intervalle(self, cle, debut, fin):
+        """Frames [debut, fin) en cache : {frame: (landmarks (543, 4), presence (4,))}"""
+        lignes = self._connexion.execute(
+            "SELECT frame, landmarks, presence FROM resultats "
+            "WHERE source = ? AND parametres = ? AND frame >= ? AND frame < ?",
+            cle + (debut, fin)).fetchall()
+        trouvees = {}
+        for frame, *donnees in lignes:
+            landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+            presence = np.empty(len(PARTIES), dtype=bool)
+            self._decoder(donnees, landmarks, presence)
+            trouvees[frame] = (landmarks, presence)
+            self._noter_lecture(cle, frame)
+        self.echecs += (fin - debut) - len(trouvees)
+        return trouvees
+
+    @staticmethod
+    def _decoder(ligne, landmarks, presence):
+        tableau = np.frombuffer(ligne[0], dtype='<f4').reshape(TOTAL_LANDMARKS, 4)
+        landmarks[...] = tableau[:, :landmarks.shape[-1]]
+        presence[...] = np.frombuffer(ligne[1], dtype=np.bool_)
+
+    def _noter_lecture(self, cle, frame):
+        self.succes += 1
+        self._lus.append(cle + (frame,))
+        if len(self._lus) >= self.frames_par_transaction:
+            self.vider_tampon()
+
+    def ecrire(self, cle, frame, landmarks, presence):
+        """Met une frame en attente d'écriture (écrite par paquets, en une transaction)"""
+        tableau = np.full((TOTAL_LANDMARKS, 4), np.nan, dtype='<f4')
+        tableau[:, :landmarks.shape[-1]] = landmarks
+        self._a_ecrire.append(cle + (frame, tableau.tobytes(), np.asarray(presence, dtype=np.bool_).tobytes()))
+        if len(self._a_ecrire) >= self.frames_par_transaction:
+            self.vider_tampon()
+
+    def vider_tampon(self):
+        """Écrit les frames en attente, met à jour les dates d'accès puis évince si besoin"""
+        if not self._a_ecrire and not self._lus:
+            return
+        maintenant = time.time()
+        with self._transaction():
+            if self._a_ecrire:
+                # Première valeur conservée si un autre processus a déjà écrit la frame
+                self._connexion.executemany(
+                    "INSERT OR IGNORE INTO resultats VALUES (?, ?, ?, ?, ?, ?)",
+                    [ligne + (maintenant,) for ligne in self._a_ecrire])
+            if self._lus:
+                self._connexion.executemany(
+                    "UPDATE resultats SET acces = ? WHERE source = ? AND parametres = ? AND frame = ?",
+                    [(maintenant,) + lu for lu in self._lus])
+            self._evincer()
+        self._a_ecrire.clear()
+        self._lus.clear()
+
+    @contextmanager
+    def _transaction(self):
+        """Transaction à verrou d'écriture immédiat (pas d'interblocage entre processus)"""
+        self._connexion.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connexion.execute("ROLLBACK")
+            raise
+        self._connexion.execute("COMMIT")
+
+    def _evincer(self):
+        """Supprime les frames les moins récemment lues au-delà de la taille maximale"""
+        taille_frame = TAILLE_LANDMARKS + len(PARTIES)
+        nombre = self._connexion.execute("SELECT COUNT(*) FROM resultats").fetchone()[0]
+        excedent = nombre - self.taille_max_octets // taille_frame
+        if excedent <= 0:
+            return
+        self._connexion.execute(
+            "DELETE FROM resultats WHERE rowid IN (SELECT rowid FROM resultats ORDER BY acces LIMIT ?)",
+            (excedent,))
+        self.evictions += excedent
+
+    def statistiques(self):
+        """Succès, échecs et occupation du cache"""
+        nombre = self._connexion.execute("SELECT COUNT(*) FROM resultats").fetchone()[0]
+        total = self.succes + self.echecs
+        return {
+            'succes': self.succes,
+            'echecs': self.echecs,
+            'taux_succes': round(self.succes / total, 3) if total else 0.0,
+            'evictions': self.evictions,
+            'frames_en_cache': nombre,
+            'taille_mo': round(nombre * (TAILLE_LANDMARKS + len(PARTIES)) / (1024 * 1024), 1),
+        }
+
+    def vider(self):
+        """Efface tout le cache"""
+        self._a_ecrire.clear()
+        self._lus.clear()
+        with self._transaction():
+            self._connexion.execute("DELETE FROM resultats")
+            self._connexion.execute("DELETE FROM empreintes")
+        self._connexion.execute("VACUUM")
+
+    def fermer(self):
+        self.vider_tampon()
+        self._connexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistiques et maintenance du cache d'inférence")
+    parser.add_argument('chemin', nargs='?', default=CHEMIN_PAR_DEFAUT, help="Base SQLite du cache")
+    parser.add_argument('--vider', action='store_true', help="Efface tout le cache")
+    args = parser.parse_args()
+
+    with CacheInference(args.chemin) as cache:
+        if args.vider:
+            cache.vider()
+            print(f"Cache {args.chemin} vidé")
+        stats = cache.statistiques()
+        print(f"Cache {args.chemin}: {stats['frames_en_cache']} frames ({stats['taille_mo']} Mo)")
+
+
+if __name__ == "__main__":
+    main()
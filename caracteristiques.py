@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moteur de caractéristiques dérivées des landmarks (distances, angles, vitesses)
+Par Dady Akrou Cyrille - Data Scientist
+
+Comme pour les gestes, les caractéristiques sont déclarées (angle articulaire,
+distance entre deux points, distance normalisée par la largeur des épaules,
+vitesse ou accélération d'un point) puis compilées en tableaux d'indices :
+- en direct, toutes les caractéristiques d'une frame sont calculées en un
+  passage NumPy, de façon incrémentale pour les vitesses et accélérations
+- en lot, un enregistrement (N, 543, c) complet est traité d'un coup
+- le résultat de la dernière frame est mis en cache : gestes, HUD et export
+  partagent un seul calcul par frame
+
+Les points sont désignés par (partie, indice) ou par leur indice global (0-542).
+Une partie absente, ou un point de pose peu visible, donne NaN.
+
+    python caracteristiques.py enregistrement.lmk caracteristiques.csv
+"""
+
+import argparse
+import csv
+
+import numpy as np
+
+from stockage_landmarks import PARTIES, INDICES_PARTIES
+
+# Indices MediaPipe des points de pose utilisés par les caractéristiques par défaut
+POSE = {
+    'epaule_gauche': 11, 'epaule_droite': 12,
+    'coude_gauche': 13, 'coude_droit': 14,
+    'poignet_gauche': 15, 'poignet_droit': 16,
+    'hanche_gauche': 23, 'hanche_droite': 24,
+    'genou_gauche': 25, 'genou_droit': 26,
+    'cheville_gauche': 27, 'cheville_droite': 28,
+}
+
+NATURES = ('distance', 'angle', 'vitesse', 'acceleration')
+NOMBRE_POINTS = {'distance': 2, 'angle': 3, 'vitesse': 1, 'acceleration': 1}
+
+
+def indice_global(point):
+    """(partie, indice) ou nom de POSE -> indice dans le tableau (543, c)"""
+    if isinstance(point, str):
+        return INDICES_PARTIES['pose'].start + POSE[point]
+    if isinstance(point, tuple):
+        partie, indice = point
+        zone = INDICES_PARTIES[partie]
+        if not 0 <= indice < zone.stop - zone.start:
+            raise ValueError(f"Indice {indice} hors de la partie {partie}")
+        return zone.start + indice
+    return int(point)
+
+
+class Caracteristique:
+    """Caractéristique déclarative : un nom, une nature et les points concernés"""
+
+    def __init__(self, nom, nature, points, dimensions=2, normaliser=False):
+        if nature not in NATURES:
+            raise ValueError(f"Nature de caractéristique inconnue: {nature} (choix: {', '.join(NATURES)})")
+        if len(points) != NOMBRE_POINTS[nature]:
+            raise ValueError(f"La caractéristique '{nom}' ({nature}) attend {NOMBRE_POINTS[nature]} point(s)")
+        if dimensions not in (2, 3):
+            raise ValueError("dimensions doit valoir 2 (x, y) ou 3 (x, y, z)")
+        self.nom = nom
+        self.nature = nature
+        self.points = [indice_global(p) for p in points]
+        # z est moins fiable que x et y : calculs dans le plan image par défaut
+        self.dimensions = dimensions
+        self.normaliser = normaliser
+
+    def __repr__(self):
+        return f"Caracteristique({self.nom!r}, {self.nature}, points={self.points})"
+
+
+def distance(nom, a, b, dimensions=2, normaliser=False):
+    """Distance entre deux points ; normaliser=True la divise par la largeur des épaules"""
+    return Caracteristique(nom, 'distance', (a, b), dimensions, normaliser)
+
+
+def angle(nom, a, sommet, c, dimensions=2):
+    """Angle (degrés) au sommet entre les segments sommet-a et sommet-c"""
+    return Caracteristique(nom, 'angle', (a, sommet, c), dimensions)
+
+
+def vitesse(nom, point, dimensions=2, normaliser=False):
+    """Norme de la vitesse d'un point (unités normalisées par seconde)"""
+    return Caracteristique(nom, 'vitesse', (point,), dimensions, normaliser)
+
+
+def acceleration(nom, point, dimensions=2, normaliser=False):
+    """Norme de l'accélération d'un point (unités normalisées par seconde²)"""
+    return Caracteristique(nom, 'acceleration', (point,), dimensions, normaliser)
+
+
+def caracteristiques_par_defaut():
+    """Angles des coudes et genoux, écart des poignets, vitesse des poignets"""
+    return [
+        angle('angle_coude_gauche', 'epaule_gauche', 'coude_gauche', 'poignet_gauche'),
+        angle('angle_coude_droit', 'epaule_droite', 'coude_droit', 'poignet_droit'),
+        angle('angle_genou_gauche', 'hanche_gauche', 'genou_gauche', 'cheville_gauche'),
+        angle('angle_genou_droit', 'hanche_droite', 'genou_droit', 'cheville_droite'),
+        distance('largeur_epaules', 'epaule_gauche', 'epaule_droite'),
+        distance('ecart_poignets', 'poignet_gauche', 'poignet_droit', normaliser=True),
+        vitesse('vitesse_poignet_gauche', 'poignet_gauche', normaliser=True),
+        vitesse('vitesse_poignet_droit', 'poignet_droit', normaliser=True),
+    ]
+
+
+class MoteurCaracteristiques:
+    """Registre de caractéristiques compilé pour un calcul vectorisé, avec cache par frame"""
+
+    def __init__(self, caracteristiques=None, fps=30.0, visibilite_min=0.5):
+        self.fps = fps
+        self.visibilite_min = visibilite_min
+        self.caracteristiques = []
+        for caracteristique in (caracteristiques if caracteristiques is not None
+                                else caracteristiques_par_defaut()):
+            self.enregistrer(caracteristique)
+
+    def enregistrer(self, caracteristique):
+        """Ajoute une caractéristique ; l'ordre d'enregistrement fixe l'ordre des colonnes"""
+        if any(c.nom == caracteristique.nom for c in self.caracteristiques):
+            raise ValueError(f"Caractéristique déjà enregistrée: {caracteristique.nom}")
+        self.caracteristiques.append(caracteristique)
+        self._compiler()
+        return caracteristique
+
+    def retirer(self, nom):
+        self.caracteristiques = [c for c in self.caracteristiques if c.nom != nom]
+        self._compiler()
+
+    @property
+    def noms(self):
+        return [c.nom for c in self.caracteristiques]
+
+    def _compiler(self):
+        """Regroupe les caractéristiques par nature en tableaux d'indices et de colonnes"""
+        epaules = [indice_global('epaule_gauche'), indice_global('epaule_droite')]
+        # Seuls les landmarks utilisés sont extraits à chaque frame ; les indices
+        # des groupes sont exprimés dans ce sous-ensemble
+        self._utilises = np.array(sorted(set(epaules).union(*(c.points for c in self.caracteristiques))),
+                                  dtype=np.intp)
+        debuts = [INDICES_PARTIES[partie].start for partie in PARTIES]
+        self._parties = np.searchsorted(debuts, self._utilises, side='right') - 1
+        self._pose = self._parties == PARTIES.index('pose')
+        self._epaules = np.searchsorted(self._utilises, epaules)
+
+        self._groupes = {}
+        for nature in NATURES:
+            colonnes = [i for i, c in enumerate(self.caracteristiques) if c.nature == nature]
+            choisies = [self.caracteristiques[i] for i in colonnes]
+            self._groupes[nature] = {
+                'colonnes': np.array(colonnes, dtype=np.intp),
+                'points': np.searchsorted(self._utilises, np.array(
+                    [c.points for c in choisies], dtype=np.intp).reshape(len(choisies), NOMBRE_POINTS[nature])),
+                'trois_d': np.array([c.dimensions == 3 for c in choisies], dtype=bool),
+                'normaliser': np.array([c.normaliser for c in choisies], dtype=bool),
+            }
+        # Points dont le mouvement est suivi (vitesses et accélérations)
+        self._suivis = np.unique(np.concatenate([self._groupes[nature]['points'][:, 0]
+                                                 for nature in ('vitesse', 'acceleration')]))
+        for nature in ('vitesse', 'acceleration'):
+            groupe = self._groupes[nature]
+            groupe['suivis'] = np.searchsorted(self._suivis, groupe['points'][:, 0])
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        """Oublie l'historique des vitesses et la frame en cache"""
+        self._position = np.full((len(self._suivis), 3), np.nan, dtype=np.float32)
+        self._vitesse = np.full((len(self._suivis), 3), np.nan, dtype=np.float32)
+        self._instant = None
+        self._numero = None
+        self.valeurs = np.full(len(self.caracteristiques), np.nan, dtype=np.float32)
+        self.calculs = 0
+
+    def _points(self, landmarks, presence):
+        """Points utilisés (N, U, 3), NaN pour les parties absentes et les points de pose peu visibles"""
+        extraits = landmarks[:, self._utilises]
+        points = extraits[..., :3].astype(np.float32)
+        if presence is not None:
+            points[~presence[:, self._parties]] = np.nan
+        if landmarks.shape[-1] > 3 and self.visibilite_min:
+            points[(extraits[..., 3] < self.visibilite_min) & self._pose] = np.nan
+        return points
+
+    @staticmethod
+    def _norme(vecteurs, trois_d):
+        """Norme sur (x, y) ou (x, y, z) selon la caractéristique (dernier axe = coordonnées)"""
+        carres = vecteurs[..., 0] ** 2 + vecteurs[..., 1] ** 2
+        return np.sqrt(carres + np.where(trois_d, vecteurs[..., 2] ** 2, 0.0))
+
+    @np.errstate(divide='ignore', invalid='ignore')
+    def _statiques(self, points, sortie):
+        """Distances et angles pour (N, U, 3) -> colonnes de sortie (N, F)"""
+        echelle = self._norme(points[:, self._epaules[0]] - points[:, self._epaules[1]], False)
+
+        groupe = self._groupes['distance']
+        if len(groupe['colonnes']):
+            ecarts = points[:, groupe['points'][:, 0]] - points[:, groupe['points'][:, 1]]
+            valeurs = self._norme(ecarts, groupe['trois_d'])
+            sortie[:, groupe['colonnes']] = np.where(groupe['normaliser'], valeurs / echelle[:, None], valeurs)
+
+        groupe = self._groupes['angle']
+        if len(groupe['colonnes']):
+            sommets = points[:, groupe['points'][:, 1]]
+            u = points[:, groupe['points'][:, 0]] - sommets
+            v = points[:, groupe['points'][:, 2]] - sommets
+            trois_d = groupe['trois_d']
+            produit = u[..., 0] * v[..., 0] + u[..., 1] * v[..., 1] + np.where(trois_d, u[..., 2] * v[..., 2], 0.0)
+            cosinus = produit / (self._norme(u, trois_d) * self._norme(v, trois_d))
+            sortie[:, groupe['colonnes']] = np.degrees(np.arccos(np.clip(cosinus, -1.0, 1.0)))
+        return echelle
+
+    @np.errstate(divide='ignore', invalid='ignore')
+    def _mouvement(self, vitesses, accelerations, echelle, sortie):
+        """Normes des vitesses/accélérations (N, P, 3) des points suivis -> colonnes de sortie"""
+        for nature, valeurs in (('vitesse', vitesses), ('acceleration', accelerations)):
+            groupe = self._groupes[nature]
+            if not len(groupe['colonnes']):
+                continue
+            normes = self._norme(valeurs[:, groupe['suivis']], groupe['trois_d'])
+            sortie[:, groupe['colonnes']] = np.where(groupe['normaliser'], normes / echelle[:, None], normes)
+
+    def mettre_a_jour(self, landmarks, presence, numero=None, instant_s=None):
+        """
+        Calcule les caractéristiques d'une frame (543, c) ; renvoie un tableau (F,)
+        Un second appel avec le même numéro de frame renvoie le résultat en cache
+        """
+        if numero is not None and numero == self._numero:
+            return self.valeurs
+        if instant_s is None:
+            instant_s = (self._instant or 0.0) + 1.0 / self.fps
+        dt = instant_s - self._instant if self._instant is not None else None
+
+        points = self._points(landmarks[np.newaxis], None if presence is None else presence[np.newaxis])
+        sortie = np.full((1, len(self.caracteristiques)), np.nan, dtype=np.float32)
+        echelle = self._statiques(points, sortie)
+
+        if len(self._suivis):
+            position = points[0, self._suivis]
+            if dt and dt > 0:
+                # Perte de détection : NaN dans l'historique, le calcul repart seul au retour
+                vitesse = (position - self._position) / dt
+                acceleration = (vitesse - self._vitesse) / dt
+            else:
+                vitesse = np.full_like(position, np.nan)
+                acceleration = vitesse
+            self._mouvement(vitesse[np.newaxis], acceleration[np.newaxis], echelle, sortie)
+            self._position, self._vitesse = position, vitesse
+
+        self._instant = instant_s
+        self._numero = numero
+        self.valeurs = sortie[0]
+        self.calculs += 1
+        return self.valeurs
+
+    def valeur(self, nom):
+        """Valeur de la dernière frame calculée"""
+        return float(self.valeurs[self.noms.index(nom)])
+
+    def en_dict(self):
+        return dict(zip(self.noms, self.valeurs.tolist()))
+
+    def calculer_lot(self, landmarks, presence=None, instants_s=None):
+        """Toutes les caractéristiques d'un enregistrement (N, 543, c) -> (N, F)"""
+        n = len(landmarks)
+        points = self._points(landmarks, presence)
+        sortie = np.full((n, len(self.caracteristiques)), np.nan, dtype=np.float32)
+        echelle = self._statiques(points, sortie)
+
+        if len(self._suivis) and n:
+            if instants_s is None:
+                instants_s = np.arange(n) / self.fps
+            dt = np.diff(np.asarray(instants_s, dtype=np.float64)).astype(np.float32)[:, None, None]
+            position = points[:, self._suivis]
+            vitesses = np.full_like(position, np.nan)
+            accelerations = np.full_like(position, np.nan)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                vitesses[1:] = np.diff(position, axis=0) / dt
+                accelerations[2:] = np.diff(vitesses[1:], axis=0) / dt[1:]
+            self._mouvement(vitesses, accelerations, echelle, sortie)
+        return sortie
+
+
+def exporter_caracteristiques_csv(noms, valeurs, frames, chemin):
+    """Une ligne par frame : numéro de frame puis une colonne par caractéristique"""
+    with open(chemin, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['frame'] + list(noms))
+        for frame, ligne in zip(np.asarray(frames).tolist(), np.asarray(valeurs).tolist()):
+            writer.writerow([frame] + ligne)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caractéristiques dérivées d'un enregistrement .lmk")
+    parser.add_argument('entree', help="Enregistrement .lmk")
+    parser.add_argument('sortie', help="Fichier CSV des caractéristiques")
+    parser.add_argument('--fps', type=float, default=30.0, help="Cadence de la capture")
+    args = parser.parse_args()
+
+    from format_binaire import LecteurLandmarks
+
+    lecteur = LecteurLandmarks(args.entree)
+    landmarks, presence, frames, _ = lecteur.lire()
+    moteur = MoteurCaracteristiques(fps=args.fps)
+    valeurs = moteur.calculer_lot(landmarks, presence, frames / args.fps)
+    exporter_caracteristiques_csv(moteur.noms, valeurs, frames, args.sortie)
+    print(f"{len(moteur.noms)} caractéristiques pour {len(frames)} frames écrites dans {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
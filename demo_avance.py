@@ -6,115 +6,186 @@ Par Dady Akrou Cyrille - Data Scientist
 
 Ce script montre des fonctionnalités avancées :
 - Sauvegarde des coordonnées des landmarks
-- Calcul de distances entre points
-- Détection de gestes simples
-- Enregistrement vidéo avec détection
+- Calcul de distances entre points, d'angles articulaires et de vitesses
+- Détection de gestes simples (landmarks lissés One-Euro/Kalman en option)
+- Enregistrement vidéo avec détection (encodage sur un thread de fond)
+- Session à mémoire bornée pour les bornes allumées en continu
 """
 
 import cv2
 import mediapipe as mp
 import numpy as np
-import csv
 import os
 from datetime import datetime
 import math
+import time
+
+from stockage_landmarks import (
+    StockageLandmarks, NB_LANDMARKS, TOTAL_LANDMARKS, PARTIES, INDICES_PARTIES,
+    exporter_csv, extraire_landmarks, landmarks_vers_tableau, tableau_vers_resultats
+)
+from format_binaire import EcrivainLandmarks
+from roi import RecadrageROI, ConversionRGB
+from gestes import MoteurGestes
+from rendu import RenduLandmarks
+from planificateur import FrameEmise, PlanificateurInference
+from instrumentation import ETAPES, MesureLatences
+from lissage import creer_filtre
+from caracteristiques import MoteurCaracteristiques
+from enregistrement import EnregistreurVideo
+from sessions import POOL_SESSIONS
+from session_circulaire import SessionCirculaire, DeversementRotatif
+from diffusion import DiffuseurLandmarks
 
 # Initialisation de MediaPipe
 mp_holistic = mp.solutions.holistic
 mp_drawing = mp.solutions.drawing_utils
 
+# Styles de dessin créés une seule fois : (attribut, connexions, points, connexions)
+STYLES_DESSIN = [
+    ('face_landmarks', mp_holistic.FACEMESH_CONTOURS,
+     mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=1, circle_radius=1),
+     mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=1)),
+    ('pose_landmarks', mp_holistic.POSE_CONNECTIONS,
+     mp_drawing.DrawingSpec(color=(0, 255, 255), thickness=2, circle_radius=4),
+     mp_drawing.DrawingSpec(color=(0, 240, 240), thickness=2)),
+    ('left_hand_landmarks', mp_holistic.HAND_CONNECTIONS,
+     mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=4),
+     mp_drawing.DrawingSpec(color=(0, 240, 0), thickness=2)),
+    ('right_hand_landmarks', mp_holistic.HAND_CONNECTIONS,
+     mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2, circle_radius=4),
+     mp_drawing.DrawingSpec(color=(240, 0, 0), thickness=2)),
+]
+
 class DetectionAvancee:
-    def __init__(self):
-        self.landmarks_data = []
+    def __init__(self, export_binaire=False, enregistrement_brut=False, politique_enregistrement='dernier',
+                 capacite_session=None, dossier_session=None, rotation_s=None, rotation_mo=None,
+                 port_diffusion=None):
+        # Session bornée : seules les `capacite_session` dernières frames restent en mémoire,
+        # les plus anciennes sont déversées dans `dossier_session` (fichiers .lmk en rotation)
+        if capacite_session:
+            deversement = None
+            if dossier_session:
+                deversement = DeversementRotatif(dossier_session, rotation_s=rotation_s, rotation_mo=rotation_mo)
+            self.landmarks_data = SessionCirculaire(capacite_session, deversement=deversement)
+        else:
+            self.landmarks_data = StockageLandmarks()
         self.recording = False
         self.video_writer = None
         
+        # Enregistrement asynchrone : frames annotées, ou frames brutes + landmarks (.lmk)
+        # pour redessiner la surimpression plus tard
+        self.enregistrement_brut = enregistrement_brut
+        self.politique_enregistrement = politique_enregistrement
+        self.enregistreurs_en_cours = []
+        
+        # Écriture en flux au format binaire .lmk pendant la capture
+        self.export_binaire = export_binaire
+        self.flux_landmarks = None
+        
+        # Gestes reconnus (poing, paix) ; d'autres peuvent être enregistrés
+        self.moteur_gestes = MoteurGestes()
+        
+        # Caractéristiques dérivées (angles, distances, vitesses), calculées une fois par frame
+        self.caracteristiques = MoteurCaracteristiques()
+        self.afficher_caracteristiques = False
+        
+        # Diffusion des landmarks en direct vers des consommateurs locaux (port TCP)
+        self.port_diffusion = port_diffusion
+        self.diffuseur = None
+        
     def calculer_distance(self, point1, point2):
         """Calcule la distance euclidienne entre deux points"""
         return math.sqrt((point1.x - point2.x)**2 + (point1.y - point2.y)**2)
     
+    def _tableau_main(self, hand_landmarks):
+        """Convertit les landmarks d'une main en tableau (21, 3)"""
+        return landmarks_vers_tableau(hand_landmarks)[:NB_LANDMARKS['right_hand']]
+    
     def detecter_geste_main_fermee(self, hand_landmarks):
         """Détecte si la main est fermée (poing)"""
         if not hand_landmarks:
             return False
-        
-        # Points des doigts (tips) et des articulations (pip)
-        finger_tips = [4, 8, 12, 16, 20]  # Pouce, Index, Majeur, Annulaire, Auriculaire
-        finger_pips = [3, 6, 10, 14, 18]
-        
-        fingers_down = 0
-        
-        # Vérifier chaque doigt (sauf le pouce qui a une logique différente)
-        for i in range(1, 5):
-            if hand_landmarks.landmark[finger_tips[i]].y > hand_landmarks.landmark[finger_pips[i]].y:
-                fingers_down += 1
-        
-        # Pour le pouce (logique différente car il bouge horizontalement)
-        if hand_landmarks.landmark[finger_tips[0]].x < hand_landmarks.landmark[finger_pips[0]].x:
-            fingers_down += 1
-        
-        return fingers_down >= 4  # Main fermée si au moins 4 doigts sont pliés
+        index = self.moteur_gestes.noms.index('Poing')
+        return bool(self.moteur_gestes.evaluer(self._tableau_main(hand_landmarks))[index])
     
     def detecter_geste_paix(self, hand_landmarks):
         """Détecte le geste de paix (V avec index et majeur)"""
         if not hand_landmarks:
             return False
+        index = self.moteur_gestes.noms.index('Paix')
+        return bool(self.moteur_gestes.evaluer(self._tableau_main(hand_landmarks))[index])
+    
+    def detecter_gestes(self, results):
+        """Classe les deux mains en un seul passage du moteur de gestes"""
+        mains = np.full((2, NB_LANDMARKS['right_hand'], 3), np.nan, dtype=np.float32)
+        libelles = ("Main gauche", "Main droite")
+        for i, hand_landmarks in enumerate((results.left_hand_landmarks, results.right_hand_landmarks)):
+            if hand_landmarks:
+                mains[i] = self._tableau_main(hand_landmarks)
         
-        # Index et majeur étendus, autres doigts pliés
-        index_up = hand_landmarks.landmark[8].y < hand_landmarks.landmark[6].y
-        middle_up = hand_landmarks.landmark[12].y < hand_landmarks.landmark[10].y
-        ring_down = hand_landmarks.landmark[16].y > hand_landmarks.landmark[14].y
-        pinky_down = hand_landmarks.landmark[20].y > hand_landmarks.landmark[18].y
-        
-        return index_up and middle_up and ring_down and pinky_down
+        return [
+            f"{libelle}: {geste}"
+            for libelle, geste in zip(libelles, self.moteur_gestes.classifier(mains))
+            if geste
+        ]
+    
+    def detecter_gestes_tableau(self, landmarks):
+        """Comme detecter_gestes, depuis le tableau (543, c) de la frame (mains absentes = NaN)"""
+        mains = np.stack([landmarks[INDICES_PARTIES['left_hand'], :3],
+                          landmarks[INDICES_PARTIES['right_hand'], :3]])
+        libelles = ("Main gauche", "Main droite")
+        return [
+            f"{libelle}: {geste}"
+            for libelle, geste in zip(libelles, self.moteur_gestes.classifier(mains))
+            if geste
+        ]
+    
+    def dessiner_caracteristiques(self, image, y_offset):
+        """Affiche les caractéristiques de la frame en cours (valeurs déjà calculées)"""
+        for nom, valeur in self.caracteristiques.en_dict().items():
+            texte = f"{nom}: -" if np.isnan(valeur) else f"{nom}: {valeur:.2f}"
+            cv2.putText(image, texte, (10, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+            y_offset += 20
+        return y_offset
     
     def sauvegarder_landmarks(self, results, frame_number):
-        """Sauvegarde les coordonnées des landmarks dans une liste"""
-        frame_data = {
-            'frame': frame_number,
-            'timestamp': datetime.now().isoformat(),
-            'face_landmarks': [],
-            'pose_landmarks': [],
-            'left_hand_landmarks': [],
-            'right_hand_landmarks': []
-        }
-        
-        # Landmarks du visage
-        if results.face_landmarks:
-            for landmark in results.face_landmarks.landmark:
-                frame_data['face_landmarks'].append({
-                    'x': landmark.x,
-                    'y': landmark.y,
-                    'z': landmark.z
-                })
-        
-        # Landmarks de la pose
-        if results.pose_landmarks:
-            for landmark in results.pose_landmarks.landmark:
-                frame_data['pose_landmarks'].append({
-                    'x': landmark.x,
-                    'y': landmark.y,
-                    'z': landmark.z
-                })
-        
-        # Landmarks des mains
-        if results.left_hand_landmarks:
-            for landmark in results.left_hand_landmarks.landmark:
-                frame_data['left_hand_landmarks'].append({
-                    'x': landmark.x,
-                    'y': landmark.y,
-                    'z': landmark.z
-                })
-        
-        if results.right_hand_landmarks:
-            for landmark in results.right_hand_landmarks.landmark:
-                frame_data['right_hand_landmarks'].append({
-                    'x': landmark.x,
-                    'y': landmark.y,
-                    'z': landmark.z
-                })
-        
-        self.landmarks_data.append(frame_data)
+        """Sauvegarde les coordonnées des landmarks dans le stockage colonnaire"""
+        if self.flux_landmarks is not None:
+            self.flux_landmarks.ajouter(results, frame_number)
+        else:
+            self.landmarks_data.ajouter(results, frame_number)
+    
+    def sauvegarder_tableau(self, landmarks, presence, frame_number, drapeaux=0):
+        """Sauvegarde le tableau (543, c) de la frame, déjà extrait : pas de second décodage"""
+        cible = self.flux_landmarks if self.flux_landmarks is not None else self.landmarks_data
+        cible.ajouter_tableau(landmarks, presence, frame_number, drapeaux=drapeaux)
+    
+    def sauvegarder_frame_emise(self, emission):
+        """Sauvegarde une frame du planificateur, marquée estimée si le modèle n'a pas tourné"""
+        self.sauvegarder_tableau(emission.landmarks, emission.presence, emission.numero, emission.drapeaux)
+    
+    def nombre_frames_sauvegardees(self):
+        """Nombre de frames en mémoire ou écrites dans le flux binaire"""
+        if self.flux_landmarks is not None:
+            return len(self.flux_landmarks)
+        return len(self.landmarks_data)
+    
+    def demarrer_flux_binaire(self, filename=None):
+        """Démarre l'écriture en flux des landmarks dans un fichier .lmk"""
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"landmarks_{timestamp}.lmk"
+        self.flux_landmarks = EcrivainLandmarks(filename)
+        print(f"Flux de landmarks démarré: {filename}")
+    
+    def arreter_flux_binaire(self):
+        """Écrit le dernier bloc et ferme le fichier .lmk"""
+        if self.flux_landmarks is not None:
+            self.flux_landmarks.fermer()
+            print(f"Flux de landmarks fermé: {self.flux_landmarks.chemin} "
+                  f"({len(self.flux_landmarks)} frames)")
+            self.flux_landmarks = None
     
     def exporter_donnees_csv(self, filename="landmarks_data.csv"):
         """Exporte les données des landmarks en CSV"""
@@ -122,86 +193,93 @@ class DetectionAvancee:
             print("Aucune donnée à exporter")
             return
         
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['frame', 'timestamp', 'type', 'landmark_id', 'x', 'y', 'z']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for frame_data in self.landmarks_data:
-                frame_num = frame_data['frame']
-                timestamp = frame_data['timestamp']
-                
-                # Écrire les landmarks du visage
-                for i, landmark in enumerate(frame_data['face_landmarks']):
-                    writer.writerow({
-                        'frame': frame_num,
-                        'timestamp': timestamp,
-                        'type': 'face',
-                        'landmark_id': i,
-                        'x': landmark['x'],
-                        'y': landmark['y'],
-                        'z': landmark['z']
-                    })
-                
-                # Écrire les landmarks de la pose
-                for i, landmark in enumerate(frame_data['pose_landmarks']):
-                    writer.writerow({
-                        'frame': frame_num,
-                        'timestamp': timestamp,
-                        'type': 'pose',
-                        'landmark_id': i,
-                        'x': landmark['x'],
-                        'y': landmark['y'],
-                        'z': landmark['z']
-                    })
-                
-                # Écrire les landmarks des mains
-                for i, landmark in enumerate(frame_data['left_hand_landmarks']):
-                    writer.writerow({
-                        'frame': frame_num,
-                        'timestamp': timestamp,
-                        'type': 'left_hand',
-                        'landmark_id': i,
-                        'x': landmark['x'],
-                        'y': landmark['y'],
-                        'z': landmark['z']
-                    })
-                
-                for i, landmark in enumerate(frame_data['right_hand_landmarks']):
-                    writer.writerow({
-                        'frame': frame_num,
-                        'timestamp': timestamp,
-                        'type': 'right_hand',
-                        'landmark_id': i,
-                        'x': landmark['x'],
-                        'y': landmark['y'],
-                        'z': landmark['z']
-                    })
-        
+        donnees = self.landmarks_data
+        if isinstance(donnees, SessionCirculaire):
+            # Une seule copie chronologique de l'anneau pour tout l'export
+            donnees = donnees.vers_stockage()
+        exporter_csv(donnees, filename)
         print(f"Données exportées vers {filename}")
     
+    def exporter_incident(self, secondes=30):
+        """Exporte les dernières secondes de la session bornée (capture d'incident)"""
+        if not isinstance(self.landmarks_data, SessionCirculaire):
+            print("Export d'incident disponible uniquement en session bornée")
+            return
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"incident_{timestamp}.csv"
+        n = self.landmarks_data.exporter_dernieres_secondes(secondes, filename)
+        print(f"{secondes} dernières secondes exportées vers {filename} ({n} frames)")
+    
     def demarrer_enregistrement(self, width, height, fps=20):
-        """Démarre l'enregistrement vidéo"""
+        """Démarre l'enregistrement vidéo sur un thread de fond"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"detection_pose_{timestamp}.mp4"
+        chemin_landmarks = None
+        if self.enregistrement_brut:
+            filename = f"capture_brute_{timestamp}.mp4"
+            chemin_landmarks = f"capture_brute_{timestamp}.lmk"
         
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        self.video_writer = cv2.VideoWriter(filename, fourcc, fps, (width, height))
+        self.video_writer = EnregistreurVideo(filename, fps, (width, height),
+                                              politique=self.politique_enregistrement,
+                                              chemin_landmarks=chemin_landmarks)
         self.recording = True
         print(f"Enregistrement démarré: {filename}")
+        if chemin_landmarks:
+            print(f"Landmarks de l'enregistrement: {chemin_landmarks}")
     
     def arreter_enregistrement(self):
-        """Arrête l'enregistrement vidéo"""
+        """Arrête l'enregistrement sans attendre la fin de l'encodage"""
         if self.video_writer:
-            self.video_writer.release()
+            self.video_writer.arreter()
+            self.enregistreurs_en_cours.append(self.video_writer)
+            print(f"Enregistrement arrêté ({self.video_writer.profondeur_file} frames encore en file)")
             self.video_writer = None
         self.recording = False
-        print("Enregistrement arrêté")
     
-    def detection_avancee(self):
-        """Fonction principale de détection avancée"""
+    def attendre_enregistrements(self):
+        """Attend l'écriture complète des enregistrements arrêtés"""
+        for enregistreur in self.enregistreurs_en_cours:
+            enregistreur.attendre()
+            stats = enregistreur.statistiques()
+            print(f"Vidéo écrite: {enregistreur.chemin} ({stats['frames_ecrites']} frames, "
+                  f"{stats['frames_jetees']} jetées, {stats['ms_par_frame']} ms/frame)")
+        self.enregistreurs_en_cours = []
+    
+    def detection_avancee(self, mode_roi=False, resolution_max=None, niveau_rendu=None,
+                          intervalle_inference=1, budget_ms=None, estimation='extrapolation',
+                          hud=False, fichier_latences=None, mode='holistic', lissage=None):
+        """
+        Fonction principale de détection avancée
+        mode='mains' n'exécute que le modèle des mains (suffisant pour les gestes)
+        lissage ('one_euro' ou 'kalman') filtre les landmarks avant gestes, dessin et sauvegarde
+        """
         cap = cv2.VideoCapture(0)
         
+        # Recadrage ROI et/ou réduction de résolution avant inférence
+        recadrage = None
+        if mode_roi or resolution_max:
+            recadrage = RecadrageROI(resolution_max=resolution_max, actif=mode_roi)
+        
+        # Rendu rapide optionnel ('complet', 'reduit', 'pose'), sinon mp_drawing
+        rendu = RenduLandmarks(niveau_rendu) if niveau_rendu else None
+        
+        # Modèle sur les images clés uniquement, frames intermédiaires estimées
+        planificateur = None
+        if intervalle_inference > 1 or budget_ms:
+            planificateur = PlanificateurInference(intervalle_inference, budget_ms, methode=estimation)
+        
+        # Lissage temporel : les gestes ne clignotent plus sur le tremblement des points
+        filtre = creer_filtre(lissage) if lissage else None
+        landmarks_bruts = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+        presence_brute = np.zeros(len(PARTIES), dtype=bool)
+        
+        # Tampons d'image réutilisés : aucune image allouée par frame en régime établi
+        conversion = ConversionRGB()
+        frame = None
+        
+        # Latences par étape (toujours mesurées, HUD basculé avec 'h')
+        mesure = MesureLatences(etapes=ETAPES + ('lissage', 'caracteristiques'))
+        
         if not cap.isOpened():
             print("Erreur: Impossible d'ouvrir la webcam")
             return
@@ -212,20 +290,39 @@ class DetectionAvancee:
         
         frame_count = 0
         
-        with mp_holistic.Holistic(
+        if self.export_binaire:
+            self.demarrer_flux_binaire()
+        
+        if self.port_diffusion is not None:
+            self.diffuseur = DiffuseurLandmarks(port=self.port_diffusion).demarrer()
+        
+        # Session Holistic préchauffée, réutilisée d'un appel à l'autre
+        with POOL_SESSIONS.session(
+            mode=mode,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         ) as holistic:
             
+            def inferer(image):
+                if recadrage:
+                    return recadrage.traiter(holistic, image)
+                return holistic.process(image)
+            
             print("Détection avancée démarrée!")
             print("Commandes:")
             print("- 'q': Quitter")
             print("- 'r': Démarrer/Arrêter l'enregistrement")
             print("- 's': Sauvegarder les données")
             print("- 'c': Effacer les données")
+            print("- 'h': Afficher/Masquer les latences")
+            print("- 'f': Afficher/Masquer les angles, distances et vitesses")
+            if isinstance(self.landmarks_data, SessionCirculaire):
+                print("- 'e': Exporter les 30 dernières secondes")
             
             while cap.isOpened():
-                ret, frame = cap.read()
+                mesure.nouvelle_frame()
+                ret, frame = cap.read(frame)
+                mesure.marquer('capture')
                 
                 if not ret:
                     break
@@ -233,54 +330,79 @@ class DetectionAvancee:
                 frame_count += 1
                 
                 # Traitement MediaPipe
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = holistic.process(image)
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+                if planificateur:
+                    emission = planificateur.traiter(frame, inferer)
+                    mesure.marquer('inference')
+                    if filtre:
+                        emission = FrameEmise(emission.numero,
+                                              filtre.filtrer(emission.landmarks, emission.presence,
+                                                             time.perf_counter()),
+                                              emission.presence, emission.inferee, emission.methode)
+                    frame_landmarks, frame_presence = emission.landmarks, emission.presence
+                    mesure.marquer('lissage')
+                    image = frame
+                    # Les frames estimées sont gardées : le flux exporté reste à cadence complète
+                    self.sauvegarder_frame_emise(emission)
+                else:
+                    image_rgb = conversion.convertir(frame)
+                    mesure.marquer('conversion')
+                    results = inferer(image_rgb)
+                    mesure.marquer('inference')
+                    # Tableau de la frame, partagé par gestes, caractéristiques, rendu et enregistrement
+                    extraire_landmarks(results, landmarks_bruts, presence_brute)
+                    frame_landmarks, frame_presence = landmarks_bruts, presence_brute
+                    if filtre:
+                        frame_landmarks = filtre.filtrer(landmarks_bruts, presence_brute, time.perf_counter())
+                        mesure.marquer('lissage')
+                    # Dessin directement sur la frame BGR d'origine : pas de reconversion
+                    image = frame
+                    
+                    # Sauvegarder les landmarks
+                    self.sauvegarder_tableau(frame_landmarks, frame_presence, frame_count)
                 
-                # Sauvegarder les landmarks
-                self.sauvegarder_landmarks(results, frame_count)
+                # La sauvegarde n'est attribuée à aucune étape
+                mesure.ignorer()
                 
-                # Dessiner les landmarks
-                if results.face_landmarks:
-                    mp_drawing.draw_landmarks(
-                        image, results.face_landmarks, mp_holistic.FACEMESH_CONTOURS,
-                        mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=1, circle_radius=1),
-                        mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=1)
-                    )
+                # Un seul calcul par frame, relu par l'affichage et les autres consommateurs
+                self.caracteristiques.mettre_a_jour(frame_landmarks, frame_presence, frame_count,
+                                                    time.perf_counter())
+                mesure.marquer('caracteristiques')
                 
-                if results.pose_landmarks:
-                    mp_drawing.draw_landmarks(
-                        image, results.pose_landmarks, mp_holistic.POSE_CONNECTIONS,
-                        mp_drawing.DrawingSpec(color=(0, 255, 255), thickness=2, circle_radius=4),
-                        mp_drawing.DrawingSpec(color=(0, 240, 240), thickness=2)
-                    )
+                # Publication sans attente : un abonné lent ne ralentit pas la boucle
+                if self.diffuseur:
+                    self.diffuseur.publier(frame_landmarks, frame_presence, frame_count,
+                                           drapeaux=emission.drapeaux if planificateur else 0)
                 
-                # Détection de gestes pour les mains
-                geste_texte = []
+                # Enregistrement brut : la frame avant dessin et ses landmarks
+                # (la frame va recevoir le dessin puis la capture suivante : copie pour le thread d'écriture)
+                if self.recording and self.enregistrement_brut:
+                    if planificateur:
+                        self.video_writer.ecrire(frame.copy(), emission.landmarks,
+                                                 emission.presence, emission.drapeaux)
+                    else:
+                        # Les tampons de landmarks sont réutilisés eux aussi
+                        self.video_writer.ecrire(frame.copy(), frame_landmarks.copy(), frame_presence.copy())
+                    mesure.marquer('ecriture_video')
                 
-                if results.left_hand_landmarks:
-                    mp_drawing.draw_landmarks(
-                        image, results.left_hand_landmarks, mp_holistic.HAND_CONNECTIONS,
-                        mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=4),
-                        mp_drawing.DrawingSpec(color=(0, 240, 0), thickness=2)
-                    )
-                    
-                    if self.detecter_geste_main_fermee(results.left_hand_landmarks):
-                        geste_texte.append("Main gauche: Poing")
-                    elif self.detecter_geste_paix(results.left_hand_landmarks):
-                        geste_texte.append("Main gauche: Paix")
+                # Dessiner les landmarks
+                if rendu:
+                    rendu.dessiner(image, frame_landmarks, frame_presence)
+                else:
+                    # Résultats MediaPipe reconstruits seulement pour mp_drawing
+                    # (frames estimées ou lissées ; sinon ceux du modèle)
+                    if planificateur:
+                        results = emission.results
+                    elif filtre:
+                        results = tableau_vers_resultats(frame_landmarks, frame_presence)
+                    for attribut, connexions, style_points, style_connexions in STYLES_DESSIN:
+                        landmarks = getattr(results, attribut)
+                        if landmarks:
+                            mp_drawing.draw_landmarks(
+                                image, landmarks, connexions, style_points, style_connexions
+                            )
                 
-                if results.right_hand_landmarks:
-                    mp_drawing.draw_landmarks(
-                        image, results.right_hand_landmarks, mp_holistic.HAND_CONNECTIONS,
-                        mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2, circle_radius=4),
-                        mp_drawing.DrawingSpec(color=(240, 0, 0), thickness=2)
-                    )
-                    
-                    if self.detecter_geste_main_fermee(results.right_hand_landmarks):
-                        geste_texte.append("Main droite: Poing")
-                    elif self.detecter_geste_paix(results.right_hand_landmarks):
-                        geste_texte.append("Main droite: Paix")
+                # Détection de gestes pour les deux mains en un seul passage
+                geste_texte = self.detecter_gestes_tableau(frame_landmarks)
                 
                 # Afficher les informations
                 y_offset = 30
@@ -288,12 +410,18 @@ class DetectionAvancee:
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
                 y_offset += 30
                 
-                cv2.putText(image, f"Donnees: {len(self.landmarks_data)} frames", (10, y_offset), 
+                cv2.putText(image, f"Donnees: {self.nombre_frames_sauvegardees()} frames", (10, y_offset), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
                 y_offset += 30
                 
+                if planificateur and not emission.inferee:
+                    cv2.putText(image, "ESTIME", (10, y_offset), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
+                    y_offset += 30
+                
                 if self.recording:
-                    cv2.putText(image, "ENREGISTREMENT", (10, y_offset), 
+                    cv2.putText(image, f"ENREGISTREMENT (file {self.video_writer.profondeur_file}, "
+                               f"jetees {self.video_writer.frames_jetees})", (10, y_offset), 
                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
                     y_offset += 30
                 
@@ -303,14 +431,24 @@ class DetectionAvancee:
                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
                     y_offset += 30
                 
-                # Enregistrer la frame si nécessaire
-                if self.recording and self.video_writer:
-                    self.video_writer.write(image)
+                if self.afficher_caracteristiques:
+                    y_offset = self.dessiner_caracteristiques(image, y_offset)
+                
+                if hud:
+                    mesure.dessiner_hud(image)
+                mesure.marquer('dessin')
+                
+                # Enregistrer la frame annotée si nécessaire (mise en file, encodage en fond) ;
+                # copie car le tampon de la frame est relu par la capture suivante
+                if self.recording and not self.enregistrement_brut:
+                    self.video_writer.ecrire(image.copy())
+                    mesure.marquer('ecriture_video')
                 
                 cv2.imshow('Detection Avancee - MediaPipe', image)
                 
                 # Gestion des touches
                 key = cv2.waitKey(1) & 0xFF
+                mesure.marquer('affichage')
                 if key == ord('q'):
                     break
                 elif key == ord('r'):
@@ -319,11 +457,27 @@ class DetectionAvancee:
                     else:
                         self.demarrer_enregistrement(width, height)
                 elif key == ord('s'):
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"landmarks_{timestamp}.csv"
-                    self.exporter_donnees_csv(filename)
+                    if self.flux_landmarks is not None:
+                        # Les données sont déjà sur le disque, on force l'écriture du bloc en cours
+                        self.flux_landmarks.vider_tampon()
+                        print(f"Données écrites dans {self.flux_landmarks.chemin}")
+                    else:
+                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                        filename = f"landmarks_{timestamp}.csv"
+                        self.exporter_donnees_csv(filename)
+                elif key == ord('h'):
+                    hud = not hud
+                elif key == ord('f'):
+                    self.afficher_caracteristiques = not self.afficher_caracteristiques
+                elif key == ord('e'):
+                    self.exporter_incident()
                 elif key == ord('c'):
-                    self.landmarks_data.clear()
+                    if self.flux_landmarks is not None:
+                        # Nouveau fichier, l'ancien reste intact sur le disque
+                        self.arreter_flux_binaire()
+                        self.demarrer_flux_binaire()
+                    else:
+                        self.landmarks_data.vider()
                     print("Données effacées")
         
         # Nettoyage
@@ -332,11 +486,36 @@ class DetectionAvancee:
         
         cap.release()
         cv2.destroyAllWindows()
+        self.attendre_enregistrements()
+        
+        if self.diffuseur:
+            stats = self.diffuseur.statistiques()
+            self.diffuseur.arreter()
+            self.diffuseur = None
+            print(f"Diffusion arrêtée: {stats['messages_publies']} frames publiées, "
+                  f"{stats['messages_jetes']} messages jetés")
+        
+        if self.flux_landmarks is not None:
+            frames_flux = len(self.flux_landmarks)
+            self.arreter_flux_binaire()
+            print(f"Session terminée. {frames_flux} frames analysés.")
+        
+        # Session bornée déversée : le reste de l'anneau rejoint les fichiers de session
+        if isinstance(self.landmarks_data, SessionCirculaire) and self.landmarks_data.deversement:
+            self.landmarks_data.fermer()
+            deversement = self.landmarks_data.deversement
+            print(f"Session terminée. {deversement.frames_deversees} frames dans "
+                  f"{len(deversement.fichiers)} fichier(s) de {deversement.dossier}")
         
         # Exporter les données finales
-        if self.landmarks_data:
+        elif self.landmarks_data:
             self.exporter_donnees_csv("landmarks_final.csv")
             print(f"Session terminée. {len(self.landmarks_data)} frames analysés.")
+        
+        mesure.nouvelle_frame()
+        mesure.afficher()
+        if fichier_latences:
+            mesure.exporter(fichier_latences)
 
 def main():
     print("="*60)
@@ -348,13 +527,34 @@ def main():
     print("- Détection de gestes (poing, paix)")
     print("- Sauvegarde des coordonnées des landmarks")
     print("- Enregistrement vidéo avec détection")
-    print("- Export des données en CSV")
+    print("- Export des données en CSV ou en flux binaire (.lmk)")
     print()
     
-    input("Appuyez sur Entrée pour commencer...")
+    choix = input("Écrire les landmarks en flux binaire .lmk pendant la capture? (o/n): ").lower()
+    export_binaire = choix in ['o', 'oui', 'y', 'yes']
+    
+    choix = input("Enregistrer les frames brutes + landmarks au lieu de la vidéo annotée? (o/n): ").lower()
+    enregistrement_brut = choix in ['o', 'oui', 'y', 'yes']
+    
+    choix = input("Détecter uniquement les mains (gestes seuls, plus rapide)? (o/n): ").lower()
+    mode = 'mains' if choix in ['o', 'oui', 'y', 'yes'] else 'holistic'
+    
+    choix = input("Session bornée : minutes gardées en mémoire (vide = tout garder): ").strip()
+    options_session = {}
+    if choix:
+        # Capture à ~30 FPS ; les frames plus anciennes vont dans sessions/ (un fichier toutes les 10 min)
+        options_session = {'capacite_session': int(float(choix) * 60 * 30),
+                           'dossier_session': 'sessions', 'rotation_s': 600}
+    
+    choix = input("Lisser les landmarks (gestes plus stables) - 'one_euro', 'kalman' ou vide: ").strip()
+    lissage = choix or None
+    
+    choix = input("Diffuser les landmarks en direct : port TCP (vide = pas de diffusion): ").strip()
+    port_diffusion = int(choix) if choix else None
     
-    detector = DetectionAvancee()
-    detector.detection_avancee()
+    detector = DetectionAvancee(export_binaire=export_binaire, enregistrement_brut=enregistrement_brut,
+                                port_diffusion=port_diffusion, **options_session)
+    detector.detection_avancee(mode=mode, lissage=lissage)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,136 +3,349 @@
 # Basé sur la vidéo YouTube: https://www.youtube.com/watch?v=pG4sUNDOZFg
 
 # Importation des dépendances
-import mediapipe as mp
-import cv2
+# mediapipe et cv2 ne sont importés qu'à la première utilisation
+# (charger_dependances) : le menu s'affiche sans attendre leur chargement
+import time
 
-# Configuration de MediaPipe
-mp_drawing = mp.solutions.drawing_utils
-mp_holistic = mp.solutions.holistic
+_DEBUT_PROGRAMME = time.perf_counter()
+
+mp = None
+cv2 = None
+mp_drawing = None
+mp_holistic = None
+_TEMPS_IMPORT = None
+
+def charger_dependances():
+    """
+    Importe mediapipe et cv2 puis crée les styles de dessin (une seule fois)
+    """
+    global mp, cv2, mp_drawing, mp_holistic, _TEMPS_IMPORT
+    global face_landmark_style, face_connection_style
+    global right_hand_landmark_style, right_hand_connection_style
+    global left_hand_landmark_style, left_hand_connection_style
+    global pose_landmark_style, pose_connection_style
+    
+    if mp_holistic is not None:
+        return
+    
+    debut = time.perf_counter()
+    import cv2 as module_cv2
+    import mediapipe as module_mp
+    cv2 = module_cv2
+    mp = module_mp
+    _TEMPS_IMPORT = time.perf_counter() - debut
+    
+    # Configuration de MediaPipe
+    mp_drawing = mp.solutions.drawing_utils
+    
+    # Définition des styles de dessin pour chaque type de landmark
+    # (créés une seule fois au chargement et non à chaque frame)
+    
+    # Style pour les landmarks du visage (rouge)
+    face_landmark_style = mp_drawing.DrawingSpec(
+        color=(0, 0, 255), thickness=1, circle_radius=1
+    )
+    face_connection_style = mp_drawing.DrawingSpec(
+        color=(0, 0, 255), thickness=1, circle_radius=1
+    )
+    
+    # Style pour la main droite (bleu)
+    right_hand_landmark_style = mp_drawing.DrawingSpec(
+        color=(255, 0, 0), thickness=2, circle_radius=4
+    )
+    right_hand_connection_style = mp_drawing.DrawingSpec(
+        color=(240, 0, 0), thickness=2, circle_radius=2
+    )
+    
+    # Style pour la main gauche (vert)
+    left_hand_landmark_style = mp_drawing.DrawingSpec(
+        color=(0, 255, 0), thickness=2, circle_radius=4
+    )
+    left_hand_connection_style = mp_drawing.DrawingSpec(
+        color=(0, 240, 0), thickness=2, circle_radius=2
+    )
+    
+    # Style pour la pose du corps (jaune)
+    pose_landmark_style = mp_drawing.DrawingSpec(
+        color=(0, 255, 255), thickness=2, circle_radius=4
+    )
+    pose_connection_style = mp_drawing.DrawingSpec(
+        color=(0, 240, 240), thickness=2, circle_radius=2
+    )
+    
+    # Dernier assigné : sert de témoin de chargement complet
+    mp_holistic = mp.solutions.holistic
+
+# Fonction de dessin des landmarks sur une image BGR
+def dessiner_landmarks(image, results):
+    """
+    Dessine les landmarks du visage, des mains et du corps sur l'image
+    Utilisée par la boucle classique et par le mode pipeline
+    """
+    charger_dependances()
+    
+    # Dessin des landmarks du visage
+    if results.face_landmarks:
+        mp_drawing.draw_landmarks(
+            image, 
+            results.face_landmarks, 
+            mp_holistic.FACEMESH_CONTOURS,
+            face_landmark_style,
+            face_connection_style
+        )
+    
+    # Dessin des landmarks de la main droite
+    if results.right_hand_landmarks:
+        mp_drawing.draw_landmarks(
+            image, 
+            results.right_hand_landmarks, 
+            mp_holistic.HAND_CONNECTIONS,
+            right_hand_landmark_style,
+            right_hand_connection_style
+        )
+    
+    # Dessin des landmarks de la main gauche
+    if results.left_hand_landmarks:
+        mp_drawing.draw_landmarks(
+            image, 
+            results.left_hand_landmarks, 
+            mp_holistic.HAND_CONNECTIONS,
+            left_hand_landmark_style,
+            left_hand_connection_style
+        )
+    
+    # Dessin des landmarks de la pose du corps
+    if results.pose_landmarks:
+        mp_drawing.draw_landmarks(
+            image, 
+            results.pose_landmarks, 
+            mp_holistic.POSE_CONNECTIONS,
+            pose_landmark_style,
+            pose_connection_style
+        )
+    
+    return image
+
+# Fonction de mesure du démarrage
+def afficher_demarrage(debut_appel, demarrage_session=None):
+    """
+    Affiche le temps écoulé jusqu'à la première frame traitée
+    """
+    maintenant = time.perf_counter()
+    print(f"Première frame traitée {maintenant - debut_appel:.2f} s après l'appel "
+          f"({maintenant - _DEBUT_PROGRAMME:.2f} s depuis le lancement du programme)")
+    if _TEMPS_IMPORT is not None:
+        print(f"  Import de cv2 et mediapipe: {_TEMPS_IMPORT:.2f} s")
+    if demarrage_session:
+        print(f"  Session Holistic: création {demarrage_session['creation_s']} s, "
+              f"réchauffage {demarrage_session['rechauffage_s']} s")
+
+# Options prises en charge uniquement par la boucle principale
+def options_ignorees(mode_pipeline, mode_processus, politique, mode_roi, resolution_max,
+                     intervalle_inference, budget_ms, hud, fichier_latences, mouvement):
+    """
+    Liste les options demandées que le mode pipeline ou multiprocessus n'appliquerait pas
+    """
+    ignorees = []
+    if mode_pipeline and mode_processus:
+        ignorees.append('mode_processus (avec mode_pipeline)')
+    if intervalle_inference > 1:
+        ignorees.append('intervalle_inference')
+    if budget_ms:
+        ignorees.append('budget_ms')
+    if mouvement:
+        ignorees.append('mouvement')
+    if hud:
+        ignorees.append('hud')
+    if fichier_latences:
+        ignorees.append('fichier_latences')
+    if mode_processus and not mode_pipeline:
+        if politique != 'dernier':
+            ignorees.append('politique')
+        if mode_roi:
+            ignorees.append('mode_roi')
+        if resolution_max:
+            ignorees.append('resolution_max')
+    return ignorees
 
 # Fonction principale pour la détection en temps réel
-def detection_pose_holistic():
+def detection_pose_holistic(source=0, mode_pipeline=False, politique='dernier',
+                            mode_roi=False, resolution_max=None, niveau_rendu=None,
+                            intervalle_inference=1, budget_ms=None, estimation='extrapolation',
+                            hud=False, fichier_latences=None, mode='holistic',
+                            mode_processus=False, emplacements=4, mouvement=None):
     """
     Fonction principale qui lance la détection de pose holistique en temps réel
     Détecte les landmarks du visage, des mains et du corps
+    La source peut être un index de webcam ou un chemin de fichier vidéo
+    Avec mode_pipeline=True, capture, inférence et rendu tournent en parallèle
+    Avec mode_roi=True, l'inférence se fait sur un recadrage autour du sujet
+    resolution_max limite le plus grand côté de l'image envoyée au modèle
+    niveau_rendu ('complet', 'reduit', 'pose') active le rendu rapide NumPy/OpenCV
+    intervalle_inference > 1 ou budget_ms n'exécute le modèle que sur des images clés,
+    les frames intermédiaires sont estimées ('extrapolation' ou 'flux_optique')
+    Les latences par étape sont toujours mesurées : hud=True les affiche sur l'image,
+    fichier_latences (.json ou .csv) les exporte à la sortie
+    La session Holistic vient du pool préchauffé (sessions.py)
+    mode ('holistic', 'pose', 'mains', 'visage') n'exécute que le sous-modèle utile
+    Avec mode_processus=True, l'inférence tourne dans un processus dédié et les frames
+    lui sont transmises par mémoire partagée (transport_partage.py)
+    mouvement ('difference' ou 'mog2') saute le modèle quand la scène ne bouge pas et
+    passe en veille (sondage espacé) quand personne n'est détecté (garde_mouvement.py)
+    Les modes pipeline et multiprocessus ne prennent pas en charge toutes ces options :
+    une combinaison non prise en charge lève ValueError au lieu d'être ignorée
     """
+    debut_appel = time.perf_counter()
+    
+    if mode_pipeline or mode_processus:
+        ignorees = options_ignorees(mode_pipeline, mode_processus, politique, mode_roi,
+                                    resolution_max, intervalle_inference, budget_ms, hud,
+                                    fichier_latences, mouvement)
+        if ignorees:
+            nom_mode = 'pipeline' if mode_pipeline else 'multiprocessus'
+            raise ValueError(f"Option(s) non prise(s) en charge en mode {nom_mode}: {', '.join(ignorees)}")
+    
+    if mode_pipeline:
+        from pipeline import detection_pipeline
+        return detection_pipeline(source, politique=politique, mode_roi=mode_roi,
+                                  resolution_max=resolution_max, niveau_rendu=niveau_rendu,
+                                  mode=mode)
+    
+    if mode_processus:
+        from transport_partage import detection_multiprocessus
+        return detection_multiprocessus(source, emplacements, niveau_rendu=niveau_rendu or 'complet',
+                                        mode=mode)
+    
+    charger_dependances()
+    from roi import RecadrageROI, ConversionRGB
+    from rendu import RenduLandmarks
+    from planificateur import PlanificateurInference
+    from garde_mouvement import GardeMouvement
+    from instrumentation import MesureLatences
+    from sessions import POOL_SESSIONS
     
     # Initialisation de la capture vidéo
-    cap = cv2.VideoCapture(0)
+    cap = cv2.VideoCapture(source)
+    
+    # Recadrage ROI et/ou réduction de résolution avant inférence
+    recadrage = None
+    if mode_roi or resolution_max:
+        recadrage = RecadrageROI(resolution_max=resolution_max, actif=mode_roi)
+    
+    # Rendu rapide optionnel (sinon mp_drawing)
+    rendu = RenduLandmarks(niveau_rendu) if niveau_rendu else None
+    
+    # Inférence sur images clés uniquement
+    planificateur = None
+    if mouvement:
+        # Même interface que le planificateur : frames sans mouvement réutilisées
+        planificateur = GardeMouvement(mouvement)
+    elif intervalle_inference > 1 or budget_ms:
+        planificateur = PlanificateurInference(intervalle_inference, budget_ms, methode=estimation)
     
-    # Configuration du modèle holistique
-    with mp_holistic.Holistic(
+    # Percentiles de latence par étape
+    mesure = MesureLatences()
+    
+    # Tampons réutilisés d'une frame à l'autre : aucune image allouée en régime établi
+    conversion = ConversionRGB()
+    frame = None
+    
+    premiere_frame = True
+    
+    # Configuration du modèle holistique (session déjà réchauffée si possible)
+    with POOL_SESSIONS.session(
+        mode=mode,
         min_detection_confidence=0.5,
         min_tracking_confidence=0.5
     ) as holistic:
         
+        def inferer(image):
+            if recadrage:
+                return recadrage.traiter(holistic, image)
+            return holistic.process(image)
+        
         while cap.isOpened():
-            # Lecture du frame de la webcam
-            ret, frame = cap.read()
+            mesure.nouvelle_frame()
+            
+            # Lecture du frame de la webcam, dans le tampon de la frame précédente
+            ret, frame = cap.read(frame)
+            mesure.marquer('capture')
             
             if not ret:
                 print("Impossible de lire le frame de la webcam")
                 break
             
-            # Conversion de BGR vers RGB (requis par MediaPipe)
-            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Traitement de l'image avec le modèle holistique
-            results = holistic.process(image)
-            
-            # Conversion de RGB vers BGR pour l'affichage avec OpenCV
-            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-            
-            # Définition des styles de dessin pour chaque type de landmark
-            
-            # Style pour les landmarks du visage (rouge)
-            face_landmark_style = mp_drawing.DrawingSpec(
-                color=(0, 0, 255), thickness=1, circle_radius=1
-            )
-            face_connection_style = mp_drawing.DrawingSpec(
-                color=(0, 0, 255), thickness=1, circle_radius=1
-            )
-            
-            # Style pour la main droite (bleu)
-            right_hand_landmark_style = mp_drawing.DrawingSpec(
-                color=(255, 0, 0), thickness=2, circle_radius=4
-            )
-            right_hand_connection_style = mp_drawing.DrawingSpec(
-                color=(240, 0, 0), thickness=2, circle_radius=2
-            )
-            
-            # Style pour la main gauche (vert)
-            left_hand_landmark_style = mp_drawing.DrawingSpec(
-                color=(0, 255, 0), thickness=2, circle_radius=4
-            )
-            left_hand_connection_style = mp_drawing.DrawingSpec(
-                color=(0, 240, 0), thickness=2, circle_radius=2
-            )
-            
-            # Style pour la pose du corps (jaune)
-            pose_landmark_style = mp_drawing.DrawingSpec(
-                color=(0, 255, 255), thickness=2, circle_radius=4
-            )
-            pose_connection_style = mp_drawing.DrawingSpec(
-                color=(0, 240, 240), thickness=2, circle_radius=2
-            )
-            
-            # Dessin des landmarks du visage
-            if results.face_landmarks:
-                mp_drawing.draw_landmarks(
-                    image, 
-                    results.face_landmarks, 
-                    mp_holistic.FACEMESH_CONTOURS,
-                    face_landmark_style,
-                    face_connection_style
-                )
-            
-            # Dessin des landmarks de la main droite
-            if results.right_hand_landmarks:
-                mp_drawing.draw_landmarks(
-                    image, 
-                    results.right_hand_landmarks, 
-                    mp_holistic.HAND_CONNECTIONS,
-                    right_hand_landmark_style,
-                    right_hand_connection_style
-                )
-            
-            # Dessin des landmarks de la main gauche
-            if results.left_hand_landmarks:
-                mp_drawing.draw_landmarks(
-                    image, 
-                    results.left_hand_landmarks, 
-                    mp_holistic.HAND_CONNECTIONS,
-                    left_hand_landmark_style,
-                    left_hand_connection_style
-                )
-            
-            # Dessin des landmarks de la pose du corps
-            if results.pose_landmarks:
-                mp_drawing.draw_landmarks(
-                    image, 
-                    results.pose_landmarks, 
-                    mp_holistic.POSE_CONNECTIONS,
-                    pose_landmark_style,
-                    pose_connection_style
-                )
+            if planificateur:
+                # Modèle sur les images clés, landmarks estimés entre les deux
+                emission = planificateur.traiter(frame, inferer)
+                mesure.marquer('inference')
+                image = frame
+                if rendu:
+                    rendu.dessiner(image, emission.landmarks, emission.presence)
+                else:
+                    dessiner_landmarks(image, emission.results)
+            else:
+                # Conversion de BGR vers RGB (requis par MediaPipe), dans un tampon persistant
+                image_rgb = conversion.convertir(frame)
+                mesure.marquer('conversion')
+                
+                # Traitement de l'image avec le modèle holistique
+                results = inferer(image_rgb)
+                mesure.marquer('inference')
+                
+                # Dessin directement sur la frame BGR d'origine : pas de reconversion
+                image = frame
+                
+                # Dessin des landmarks sur l'image
+                if rendu:
+                    rendu.dessiner_resultats(image, results)
+                else:
+                    dessiner_landmarks(image, results)
+            
+            if hud:
+                mesure.dessiner_hud(image)
+            mesure.marquer('dessin')
+            
+            if premiere_frame:
+                premiere_frame = False
+                afficher_demarrage(debut_appel, POOL_SESSIONS.dernier_demarrage)
             
             # Affichage du résultat
             cv2.imshow('Détection de Pose Holistique - MediaPipe', image)
             
             # Sortie avec la touche 'q'
-            if cv2.waitKey(10) & 0xFF == ord('q'):
+            touche = cv2.waitKey(10) & 0xFF
+            mesure.marquer('affichage')
+            if touche == ord('q'):
                 break
     
     # Libération des ressources
     cap.release()
     cv2.destroyAllWindows()
+    
+    if rendu:
+        print(f"Temps moyen de dessin: {rendu.temps_moyen_ms:.2f} ms/frame")
+    if mouvement:
+        stats = planificateur.statistiques()
+        print(f"Frames inférées: {stats['frames_inferees']}, réutilisées: {stats['frames_reutilisees']} "
+              f"({100 * stats['taux_filtrage']:.0f} %, dont {stats['frames_veille']} en veille)")
+        print(f"CPU économisé: {stats['cpu_economise_s']} s "
+              f"(inférence {stats['cpu_inference_ms']} ms, garde {stats['cpu_garde_ms']} ms par frame)")
+    elif planificateur:
+        stats = planificateur.statistiques()
+        print(f"Frames inférées: {stats['frames_inferees']}, estimées: {stats['frames_estimees']}")
+    
+    mesure.nouvelle_frame()
+    mesure.afficher()
+    if fichier_latences:
+        mesure.exporter(fichier_latences)
 
 # Fonction pour tester uniquement la webcam
 def test_webcam():
     """
     Fonction pour tester la webcam sans détection
     """
+    charger_dependances()
     cap = cv2.VideoCapture(0)
     
     while cap.isOpened():
@@ -164,6 +377,11 @@ def afficher_landmarks_info(results):
     
     if results.pose_landmarks:
         print(f"Landmarks de pose détectés: {len(results.pose_landmarks.landmark)} points")
+        # Seule la pose porte une visibilité (probabilité que le point soit visible)
+        visibilites = [point.visibility for point in results.pose_landmarks.landmark]
+        visibles = sum(visibilite > 0.5 for visibilite in visibilites)
+        print(f"  Visibilité moyenne: {sum(visibilites) / len(visibilites):.2f} "
+              f"({visibles}/{len(visibilites)} points visibles)")
     else:
         print("Aucun landmark de pose détecté")
     
@@ -179,6 +397,23 @@ def afficher_landmarks_info(results):
     
     print("="*50)
 
+# Fonction de vérification d'une dépendance sans l'importer
+def version_installee(module, *distributions):
+    """
+    Renvoie la version installée d'un module sans l'importer
+    """
+    import importlib.util
+    from importlib import metadata
+    
+    if importlib.util.find_spec(module) is None:
+        raise ImportError(f"Module {module} introuvable")
+    for distribution in distributions:
+        try:
+            return metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            continue
+    return "inconnue"
+
 # Fonction principale avec menu
 def main():
     """
@@ -192,21 +427,30 @@ def main():
         print("="*60)
         print()
         
-        # Vérification rapide des imports
+        # Vérification rapide des dépendances, sans les importer
         print("Vérification des dépendances...")
-        print(f"OpenCV version: {cv2.__version__}")
-        print(f"MediaPipe version: {mp.__version__}")
+        print(f"OpenCV version: {version_installee('cv2', 'opencv-python', 'opencv-contrib-python', 'opencv-python-headless')}")
+        print(f"MediaPipe version: {version_installee('mediapipe', 'mediapipe')}")
         print("✅ Toutes les dépendances sont OK!")
         print()
         
+        # Le modèle se charge et se réchauffe pendant que l'utilisateur choisit
+        from sessions import POOL_SESSIONS
+        POOL_SESSIONS.prechauffer_en_fond(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        
         print("Choisissez une option:")
         print("1. Lancer la détection de pose holistique complète")
         print("2. Tester uniquement la webcam")
         print("3. Quitter")
+        print("4. Lancer la détection en mode pipeline (capture/inférence/rendu parallèles)")
+        print("5. Lancer la détection sur images clés (frames intermédiaires estimées)")
+        print("6. Lancer la détection sélective (pose, mains ou visage uniquement)")
+        print("7. Lancer la détection multiprocessus (inférence dans un processus dédié)")
+        print("8. Lancer la détection avec veille (modèle sauté sur les scènes statiques)")
         print()
         
         while True:
-            choix = input("Votre choix (1-3): ")
+            choix = input("Votre choix (1-8): ")
             
             if choix == '1':
                 print("\nLancement de la détection de pose holistique...")
@@ -234,8 +478,58 @@ def main():
                 print("Au revoir!")
                 break
             
+            elif choix == '4':
+                print("\nLancement de la détection en mode pipeline...")
+                print("Appuyez sur 'q' pour quitter")
+                politique = input("Politique de file - 'dernier' ou 'bloquer' [dernier]: ").strip() or 'dernier'
+                try:
+                    detection_pose_holistic(mode_pipeline=True, politique=politique)
+                except Exception as e:
+                    print(f"Erreur lors de la détection: {e}")
+                break
+            
+            elif choix == '5':
+                print("\nLancement de la détection sur images clés...")
+                print("Appuyez sur 'q' pour quitter")
+                intervalle = int(input("Inférence toutes les N frames [2]: ").strip() or 2)
+                try:
+                    detection_pose_holistic(intervalle_inference=intervalle)
+                except Exception as e:
+                    print(f"Erreur lors de la détection: {e}")
+                break
+            
+            elif choix == '6':
+                print("\nLancement de la détection sélective...")
+                print("Appuyez sur 'q' pour quitter")
+                mode = input("Modèle - 'pose', 'mains' ou 'visage' [pose]: ").strip() or 'pose'
+                try:
+                    detection_pose_holistic(mode=mode)
+                except Exception as e:
+                    print(f"Erreur lors de la détection: {e}")
+                break
+            
+            elif choix == '7':
+                print("\nLancement de la détection multiprocessus...")
+                print("Appuyez sur 'q' pour quitter")
+                emplacements = int(input("Nombre d'emplacements de frames partagés [4]: ").strip() or 4)
+                try:
+                    detection_pose_holistic(mode_processus=True, emplacements=emplacements)
+                except Exception as e:
+                    print(f"Erreur lors de la détection: {e}")
+                break
+            
+            elif choix == '8':
+                print("\nLancement de la détection avec veille...")
+                print("Appuyez sur 'q' pour quitter")
+                methode = input("Détection de mouvement - 'difference' ou 'mog2' [difference]: ").strip()
+                try:
+                    detection_pose_holistic(mouvement=methode or 'difference')
+                except Exception as e:
+                    print(f"Erreur lors de la détection: {e}")
+                break
+            
             else:
-                print("Choix invalide. Veuillez choisir 1, 2 ou 3.")
+                print("Choix invalide. Veuillez choisir un nombre entre 1 et 8.")
                 
     except KeyboardInterrupt:
         print("\n\nProgramme interrompu par l'utilisateur.")
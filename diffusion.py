@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diffusion des landmarks en direct vers des consommateurs locaux (asyncio)
+Par Dady Akrou Cyrille - Data Scientist
+
+Les landmarks ne quittaient jamais le processus : dessinés, ou stockés puis
+exportés en CSV à la fin. DiffuseurLandmarks publie chaque frame dans un
+encodage binaire compact sur une socket locale (TCP ou socket Unix), vers
+un nombre quelconque d'abonnés :
+- la boucle asyncio tourne dans son propre thread ; publier() encode la
+  frame une seule fois et rend la main aussitôt, sans jamais attendre le réseau
+- chaque abonné a sa file bornée ('file' : les messages les plus anciens
+  sont jetés quand elle est pleine) ou ne reçoit que la dernière frame
+  ('dernier') : un consommateur lent ne ralentit ni les autres ni holistic.process()
+- l'ensemble des abonnés n'est touché que par le thread de la boucle ; les
+  autres threads ne lisent que des compteurs tenus à jour par cette boucle
+
+Message (petit-boutiste), précédé de sa longueur uint32 :
+    numéro de frame int64, horodatage int64 (time.time_ns), drapeaux uint8,
+    masque de présence uint8 (bit i = PARTIES[i]), composantes uint8,
+    puis float32[points des parties présentes, composantes]
+
+    python diffusion.py client --port 8765 --abonnes 50      # client de mesure
+"""
+
+import argparse
+import asyncio
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from stockage_landmarks import NB_LANDMARKS, TOTAL_LANDMARKS, PARTIES
+
+PORT_PAR_DEFAUT = 8765
+MODES_ABONNE = ('file', 'dernier')
+LONGUEUR = struct.Struct('<I')
+EN_TETE_FRAME = struct.Struct('<qqBBB')
+
+# Index de la partie de chaque landmark (543,)
+_PARTIE_PAR_POINT = np.repeat(np.arange(len(PARTIES)), [NB_LANDMARKS[p] for p in PARTIES])
+_BITS = 1 << np.arange(len(PARTIES))
+
+
+def encoder_frame(landmarks, presence, numero, timestamp_ns=None, drapeaux=0):
+    """Message binaire (longueur comprise) d'une frame (543, c) ; seules les parties présentes sont envoyées"""
+    presence = np.asarray(presence, dtype=bool)
+    if timestamp_ns is None:
+        timestamp_ns = time.time_ns()
+    points = landmarks[presence[_PARTIE_PAR_POINT]]
+    corps = (EN_TETE_FRAME.pack(numero, timestamp_ns, drapeaux, int(_BITS[presence].sum()), landmarks.shape[-1])
+             + points.astype('<f4', copy=False).tobytes())
+    return LONGUEUR.pack(len(corps)) + corps
+
+
+def decoder_frame(corps):
+    """Message sans sa longueur -> (landmarks (543, c), presence (4,), numéro, horodatage, drapeaux)"""
+    numero, timestamp_ns, drapeaux, masque, composantes = EN_TETE_FRAME.unpack_from(corps)
+    presence = (masque & _BITS) != 0
+    landmarks = np.full((TOTAL_LANDMARKS, composantes), np.nan, dtype=np.float32)
+    landmarks[presence[_PARTIE_PAR_POINT]] = np.frombuffer(
+        corps, dtype='<f4', offset=EN_TETE_FRAME.size).reshape(-1, composantes)
+    return landmarks, presence, numero, timestamp_ns, drapeaux
+
+
+class _Abonne:
+    """File bornée d'un abonné, vidée par sa propre tâche d'envoi"""
+
+    def __init__(self, writer, mode, taille_file):
+        self.writer = writer
+        self.mode = mode
+        self.file = deque(maxlen=1 if mode == 'dernier' else taille_file)
+        self.evenement = asyncio.Event()
+        self.envoyes = 0
+        self.jetes = 0
+        self.actif = True
+        self.tache = asyncio.current_task()
+
+    def deposer(self, message):
+        """Renvoie True si un message a été jeté pour faire de la place"""
+        # File pleine : le message le plus ancien est remplacé
+        jete = len(self.file) == self.file.maxlen
+        if jete:
+            self.jetes += 1
+        self.file.append(message)
+        self.evenement.set()
+        return jete
+
+    def fermer(self):
+        self.actif = False
+        self.evenement.set()
+
+    async def envoyer(self):
+        while self.actif:
+            await self.evenement.wait()
+            self.evenement.clear()
+            while self.file and self.actif:
+                self.writer.write(self.file.popleft())
+                self.envoyes += 1
+                await self.writer.drain()
+
+
+class DiffuseurLandmarks:
+    """
+    Serveur de diffusion des landmarks sur TCP (hote, port) ou socket Unix (chemin_unix)
+    À l'ouverture, un abonné peut envoyer b'D' (dernière frame seulement) ou b'F' (file)
+    """
+
+    def __init__(self, hote='127.0.0.1', port=PORT_PAR_DEFAUT, chemin_unix=None,
+                 taille_file=8, mode='file'):
+        if mode not in MODES_ABONNE:
+            raise ValueError(f"Mode d'abonné inconnu: {mode} (choix: {', '.join(MODES_ABONNE)})")
+        self.hote = hote
+        self.port = port
+        self.chemin_unix = chemin_unix
+        self.taille_file = taille_file
+        self.mode = mode
+
+        # Modifiés uniquement dans le thread de la boucle asyncio
+        self.abonnes = set()
+        self.nb_abonnes = 0
+        self.messages_jetes = 0
+        self.messages_publies = 0
+        self._boucle = None
+        self._serveur = None
+        self._thread = None
+        self._pret = threading.Event()
+
+    def demarrer(self):
+        """Lance la boucle asyncio et le serveur dans un thread dédié"""
+        self._thread = threading.Thread(target=self._executer, name='diffusion', daemon=True)
+        self._thread.start()
+        self._pret.wait()
+        adresse = self.chemin_unix or f"{self.hote}:{self.port}"
+        print(f"Diffusion des landmarks sur {adresse}")
+        return self
+
+    def _executer(self):
+        self._boucle = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._boucle)
+        if self.chemin_unix:
+            demarrage = asyncio.start_unix_server(self._accueillir, path=self.chemin_unix)
+        else:
+            demarrage = asyncio.start_server(self._accueillir, self.hote, self.port)
+        self._serveur = self._boucle.run_until_complete(demarrage)
+        if not self.chemin_unix and self.port == 0:
+            # Port choisi par le système
+            self.port = self._serveur.sockets[0].getsockname()[1]
+        self._pret.set()
+        self._boucle.run_forever()
+        self._boucle.close()
+
+    async def _accueillir(self, reader, writer):
+        mode = self.mode
+        try:
+            choix = await asyncio.wait_for(reader.read(1), timeout=0.5)
+            mode = {b'D': 'dernier', b'F': 'file'}.get(choix, mode)
+        except asyncio.TimeoutError:
+            pass
+        abonne = _Abonne(writer, mode, self.taille_file)
+        self.abonnes.add(abonne)
+        self.nb_abonnes = len(self.abonnes)
+        # Déconnexion de l'abonné détectée même s'il n'y a rien à lui envoyer
+        fin_lecture = asyncio.ensure_future(reader.read())
+        fin_lecture.add_done_callback(lambda _: abonne.fermer())
+        try:
+            await abonne.envoyer()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            fin_lecture.cancel()
+            self.abonnes.discard(abonne)
+            self.nb_abonnes = len(self.abonnes)
+            writer.close()
+
+    def _distribuer(self, message):
+        for abonne in self.abonnes:
+            if abonne.deposer(message):
+                self.messages_jetes += 1
+
+    def publier(self, landmarks, presence, numero, timestamp_ns=None, drapeaux=0):
+        """Publie une frame depuis n'importe quel thread, sans attendre les abonnés"""
+        if self._boucle is None or not self.nb_abonnes:
+            return
+        message = encoder_frame(landmarks, presence, numero, timestamp_ns, drapeaux)
+        self._boucle.call_soon_threadsafe(self._distribuer, message)
+        self.messages_publies += 1
+
+    def statistiques(self):
+        """Compteurs lisibles depuis n'importe quel thread (aucun parcours des abonnés)"""
+        return {
+            'abonnes': self.nb_abonnes,
+            'messages_publies': self.messages_publies,
+            'messages_jetes': self.messages_jetes,
+        }
+
+    def arreter(self):
+        """Ferme le serveur et les connexions des abonnés"""
+        if self._boucle is None:
+            return
+
+        async def fermer():
+            self._serveur.close()
+            taches = [abonne.tache for abonne in self.abonnes]
+            for abonne in list(self.abonnes):
+                abonne.fermer()
+            await asyncio.gather(*taches, return_exceptions=True)
+            await self._serveur.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(fermer(), self._boucle).result(timeout=5)
+        self._boucle.call_soon_threadsafe(self._boucle.stop)
+        self._thread.join(timeout=5)
+        self._boucle = None
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
+
+
+async def abonner(hote='127.0.0.1', port=PORT_PAR_DEFAUT, chemin_unix=None, mode='file'):
+    """Générateur asynchrone des frames diffusées (landmarks, presence, numéro, horodatage, drapeaux)"""
+    if chemin_unix:
+        reader, writer = await asyncio.open_unix_connection(chemin_unix)
+    else:
+        reader, writer = await asyncio.open_connection(hote, port)
+    writer.write(b'D' if mode == 'dernier' else b'F')
+    try:
+        while True:
+            longueur, = LONGUEUR.unpack(await reader.readexactly(LONGUEUR.size))
+            yield decoder_frame(await reader.readexactly(longueur))
+    except asyncio.IncompleteReadError:
+        return
+    finally:
+        writer.close()
+
+
+async def mesurer_abonnes(abonnes=10, duree_s=10.0, hote='127.0.0.1', port=PORT_PAR_DEFAUT,
+                          chemin_unix=None, mode='file'):
+    """Client de mesure : `abonnes` connexions, latence de bout en bout et messages/s"""
+    latences = [[] for _ in range(abonnes)]
+
+    async def consommer(i):
+        async for _, _, _, timestamp_ns, _ in abonner(hote, port, chemin_unix, mode):
+            latences[i].append(time.time_ns() - timestamp_ns)
+
+    taches = [asyncio.create_task(consommer(i)) for i in range(abonnes)]
+    await asyncio.sleep(duree_s)
+    for tache in taches:
+        tache.cancel()
+    await asyncio.gather(*taches, return_exceptions=True)
+
+    toutes = np.concatenate([np.asarray(l, dtype=np.float64) for l in latences]) / 1e6
+    if not len(toutes):
+        return {'abonnes': abonnes, 'messages': 0}
+    return {
+        'abonnes': abonnes,
+        'messages': len(toutes),
+        'messages_par_s': round(len(toutes) / duree_s, 1),
+        'messages_par_s_par_abonne': round(len(toutes) / duree_s / abonnes, 1),
+        'latence_p50_ms': round(float(np.percentile(toutes, 50)), 3),
+        'latence_p95_ms': round(float(np.percentile(toutes, 95)), 3),
+        'latence_p99_ms': round(float(np.percentile(toutes, 99)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Client de mesure de la diffusion des landmarks")
+    parser.add_argument('commande', choices=('client',), help="client : s'abonne et mesure")
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=PORT_PAR_DEFAUT)
+    parser.add_argument('--unix', default=None, help="Chemin de la socket Unix (à la place de TCP)")
+    parser.add_argument('--abonnes', type=int, default=10, help="Nombre de connexions simultanées")
+    parser.add_argument('--duree', type=float, default=10.0, help="Durée de la mesure en secondes")
+    parser.add_argument('--mode', choices=MODES_ABONNE, default='file')
+    args = parser.parse_args()
+
+    stats = asyncio.run(mesurer_abonnes(args.abonnes, args.duree, args.hote, args.port, args.unix, args.mode))
+    for nom, valeur in stats.items():
+        print(f"{nom}: {valeur}")
+
+
+if __name__ == "__main__":
+    main()
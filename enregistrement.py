@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Enregistrement vidéo asynchrone
+Par Dady Akrou Cyrille - Data Scientist
+
+L'encodage (cv2.VideoWriter) tourne sur un thread dédié alimenté par une
+file bornée : un ralentissement de l'encodeur ne bloque plus la boucle de
+détection. Politiques de débordement (voir pipeline.FileEtape) :
+- 'dernier' : la frame la plus ancienne en attente est jetée
+- 'bloquer' : la boucle attend qu'une place se libère (aucune frame perdue)
+
+Les landmarks peuvent être écrits par le même thread dans un fichier .lmk
+dont les numéros de frame correspondent aux positions dans la vidéo : on
+enregistre alors les frames brutes et on redessine la surimpression plus tard.
+"""
+
+import queue
+import threading
+import time
+
+import cv2
+
+from format_binaire import EcrivainLandmarks
+from pipeline import FileEtape
+
+
+class EnregistreurVideo:
+    """cv2.VideoWriter sur un thread de fond avec file bornée"""
+
+    def __init__(self, chemin, fps, taille, taille_file=64, politique='dernier',
+                 codec='mp4v', chemin_landmarks=None):
+        self.chemin = chemin
+        self.chemin_landmarks = chemin_landmarks
+        self.file = FileEtape(taille_file, politique)
+        self.taille_file = taille_file
+        self.frames_ecrites = 0
+        self.temps_encodage = 0.0
+
+        self._writer = cv2.VideoWriter(chemin, cv2.VideoWriter_fourcc(*codec), fps, taille)
+        self._landmarks = EcrivainLandmarks(chemin_landmarks) if chemin_landmarks else None
+        # Arrêt normal : la file est vidée puis le thread s'arrête, sans jeter de frame
+        self._fin = threading.Event()
+        # Arrêt forcé : les frames encore en file sont perdues
+        self._abandon = threading.Event()
+        self._thread = threading.Thread(target=self._ecrire, name='enregistrement')
+        self._thread.start()
+
+    def ecrire(self, image, landmarks=None, presence=None, drapeaux=0):
+        """
+        Met une frame en file sans attendre l'encodeur (sauf politique 'bloquer')
+        L'image ne doit plus être modifiée par l'appelant ensuite
+        """
+        self.file.deposer((image, landmarks, presence, drapeaux, time.time_ns()), self._abandon)
+
+    def _ecrire(self):
+        try:
+            while not self._abandon.is_set():
+                # Fin demandée avant cette lecture : file vide = toutes les frames écrites
+                fin = self._fin.is_set()
+                try:
+                    element = self.file.file.get(timeout=0.1)
+                except queue.Empty:
+                    if fin:
+                        break
+                    continue
+                image, landmarks, presence, drapeaux, timestamp_ns = element
+                debut = time.perf_counter()
+                self._writer.write(image)
+                self.frames_ecrites += 1
+                if self._landmarks is not None and landmarks is not None:
+                    self._landmarks.ajouter_tableau(landmarks, presence, self.frames_ecrites,
+                                                    timestamp_ns, drapeaux)
+                self.temps_encodage += time.perf_counter() - debut
+        finally:
+            self._writer.release()
+            if self._landmarks is not None:
+                self._landmarks.fermer()
+
+    @property
+    def profondeur_file(self):
+        return self.file.file.qsize()
+
+    @property
+    def frames_jetees(self):
+        return self.file.frames_jetees
+
+    @property
+    def actif(self):
+        return self._thread.is_alive()
+
+    def arreter(self):
+        """Demande la fin de l'enregistrement ; les frames en file sont encore écrites"""
+        # Aucun marqueur déposé dans la file : rien n'est jeté même si elle est pleine
+        self._fin.set()
+
+    def attendre(self, delai=None):
+        """Attend que toutes les frames en file soient écrites"""
+        self._thread.join(delai)
+        return not self._thread.is_alive()
+
+    def abandonner(self):
+        """Arrêt immédiat, les frames encore en file sont perdues"""
+        self._abandon.set()
+        self._thread.join()
+
+    def statistiques(self):
+        return {
+            'frames_ecrites': self.frames_ecrites,
+            'frames_jetees': self.frames_jetees,
+            'profondeur_file': self.profondeur_file,
+            'taille_file': self.taille_file,
+            'ms_par_frame': round(1000 * self.temps_encodage / self.frames_ecrites, 2) if self.frames_ecrites else 0.0,
+        }
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format binaire en flux pour les enregistrements de landmarks (.lmk)
+Par Dady Akrou Cyrille - Data Scientist
+
+Les frames sont ajoutées pendant la capture par blocs de tableaux float32,
+sans attendre la fin de la session. Structure du fichier :
+
+    en-tête (16 octets) : 'LMK1', version, composantes, nombre de landmarks
+    bloc*               : 'BLOC', n, puis frames int64[n], timestamps int64[n],
+                          landmarks float32[n, 543, composantes], presence uint8[n, 4],
+                          drapeaux uint8[n] (à partir de la version 2)
+
+Le lecteur projette le fichier en mémoire (memmap) et accède directement à
+n'importe quel intervalle de frames sans relire tout le fichier. Un bloc
+tronqué (arrêt brutal pendant l'écriture) est simplement ignoré.
+"""
+
+import os
+import struct
+
+import numpy as np
+
+from stockage_landmarks import (
+    PARTIES, INDICES_PARTIES, TOTAL_LANDMARKS, COMPOSANTES_PAR_DEFAUT, StockageLandmarks, exporter_csv
+)
+
+MAGIQUE = b'LMK1'
+VERSION = 2
+VERSIONS_LISIBLES = (1, 2)
+EN_TETE = struct.Struct('<4sHHI4x')
+MAGIQUE_BLOC = b'BLOC'
+EN_TETE_BLOC = struct.Struct('<4sI')
+
+
+def taille_bloc_octets(n, composantes, version=VERSION):
+    """Taille en octets des données d'un bloc de n frames (hors en-tête de bloc)"""
+    taille = n * (8 + 8 + 4 * TOTAL_LANDMARKS * composantes + len(PARTIES))
+    if version >= 2:
+        taille += n
+    return taille
+
+
+class EcrivainLandmarks:
+    """Écriture en flux des landmarks par blocs, en mode ajout"""
+
+    def __init__(self, chemin, composantes=COMPOSANTES_PAR_DEFAUT, frames_par_bloc=256):
+        self.chemin = chemin
+        self.composantes = composantes
+        self.frames_par_bloc = frames_par_bloc
+        self.frames_ecrites = 0
+        self.octets_ecrits = 0
+
+        # Tampon d'un bloc, réutilisé d'un bloc à l'autre
+        self.tampon = StockageLandmarks(composantes=composantes, taille_bloc=frames_par_bloc)
+
+        self.fichier = open(chemin, 'wb')
+        self.fichier.write(EN_TETE.pack(MAGIQUE, VERSION, composantes, TOTAL_LANDMARKS))
+        self.octets_ecrits += EN_TETE.size
+
+    def ajouter(self, results, frame_number, timestamp_ns=None, drapeaux=0):
+        """Ajoute les landmarks d'un résultat MediaPipe"""
+        self.tampon.ajouter(results, frame_number, timestamp_ns, drapeaux)
+        if len(self.tampon) >= self.frames_par_bloc:
+            self.vider_tampon()
+
+    def ajouter_tableau(self, landmarks, presence, frame_number, timestamp_ns=None, drapeaux=0):
+        """Ajoute une frame déjà sous forme de tableau (543, composantes)"""
+        self.tampon.ajouter_tableau(landmarks, presence, frame_number, timestamp_ns, drapeaux)
+        if len(self.tampon) >= self.frames_par_bloc:
+            self.vider_tampon()
+
+    def ajouter_stockage(self, stockage):
+        """Écrit le contenu d'un StockageLandmarks par blocs"""
+        self.vider_tampon()
+        for debut in range(0, len(stockage), self.frames_par_bloc):
+            fin = debut + self.frames_par_bloc
+            self._ecrire_bloc(*stockage.tranche(debut, fin), stockage.drapeaux[debut:fin])
+
+    def ajouter_bloc(self, landmarks, presence, frames, timestamps, drapeaux):
+        """Écrit directement un bloc de frames déjà rassemblées (tableaux de même longueur)"""
+        self.vider_tampon()
+        self._ecrire_bloc(landmarks, presence, frames, timestamps, drapeaux)
+        self.fichier.flush()
+
+    def vider_tampon(self):
+        """Écrit le bloc en cours sur le disque"""
+        if len(self.tampon) == 0:
+            return
+        self._ecrire_bloc(*self.tampon.tranche(), self.tampon.drapeaux)
+        self.tampon.vider()
+        self.fichier.flush()
+
+    def _ecrire_bloc(self, landmarks, presence, frames, timestamps, drapeaux):
+        n = len(frames)
+        if n == 0:
+            return
+        self.fichier.write(EN_TETE_BLOC.pack(MAGIQUE_BLOC, n))
+        self.fichier.write(np.ascontiguousarray(frames, dtype='<i8').tobytes())
+        self.fichier.write(np.ascontiguousarray(timestamps, dtype='<i8').tobytes())
+        if landmarks.shape[-1] < self.composantes:
+            # Bloc sans visibilité écrit dans un fichier qui en a : NaN
+            complet = np.full(landmarks.shape[:-1] + (self.composantes,), np.nan, dtype='<f4')
+            complet[..., :landmarks.shape[-1]] = landmarks
+            landmarks = complet
+        self.fichier.write(np.ascontiguousarray(landmarks[..., :self.composantes], dtype='<f4').tobytes())
+        self.fichier.write(np.ascontiguousarray(presence, dtype=np.uint8).tobytes())
+        self.fichier.write(np.ascontiguousarray(drapeaux, dtype=np.uint8).tobytes())
+        self.frames_ecrites += n
+        self.octets_ecrits += EN_TETE_BLOC.size + taille_bloc_octets(n, self.composantes)
+
+    def __len__(self):
+        return self.frames_ecrites + len(self.tampon)
+
+    def fermer(self):
+        """Écrit le dernier bloc et ferme le fichier"""
+        if self.fichier.closed:
+            return
+        self.vider_tampon()
+        self.fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+class LecteurLandmarks:
+    """Lecture par projection mémoire d'un fichier .lmk"""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        taille_fichier = os.path.getsize(chemin)
+
+        with open(chemin, 'rb') as fichier:
+            magique, version, composantes, nb_landmarks = EN_TETE.unpack(fichier.read(EN_TETE.size))
+            if magique != MAGIQUE:
+                raise ValueError(f"{chemin} n'est pas un fichier de landmarks .lmk")
+            if version not in VERSIONS_LISIBLES or nb_landmarks != TOTAL_LANDMARKS:
+                raise ValueError(f"Version ou nombre de landmarks non supporté: v{version}, {nb_landmarks}")
+            self.composantes = composantes
+            self.version = version
+
+            # Index des blocs : seuls les en-têtes de bloc sont lus
+            self.blocs = []
+            position = EN_TETE.size
+            ligne = 0
+            while position + EN_TETE_BLOC.size <= taille_fichier:
+                fichier.seek(position)
+                magique_bloc, n = EN_TETE_BLOC.unpack(fichier.read(EN_TETE_BLOC.size))
+                fin = position + EN_TETE_BLOC.size + taille_bloc_octets(n, composantes, version)
+                if magique_bloc != MAGIQUE_BLOC or fin > taille_fichier:
+                    break
+                self.blocs.append((ligne, n, position + EN_TETE_BLOC.size))
+                ligne += n
+                position = fin
+
+        self.taille = ligne
+        self._memoire = np.memmap(chemin, dtype=np.uint8, mode='r') if self.taille else None
+        self._debuts = np.array([bloc[0] for bloc in self.blocs] + [self.taille], dtype=np.int64)
+
+    def __len__(self):
+        return self.taille
+
+    def _vues_bloc(self, index):
+        """Vues sans copie (landmarks, presence, frames, timestamps, drapeaux) sur un bloc"""
+        _, n, offset = self.blocs[index]
+        c = self.composantes
+        m = self._memoire
+        frames = m[offset:offset + 8 * n].view('<i8')
+        offset += 8 * n
+        timestamps = m[offset:offset + 8 * n].view('<i8')
+        offset += 8 * n
+        taille_landmarks = 4 * n * TOTAL_LANDMARKS * c
+        landmarks = m[offset:offset + taille_landmarks].view('<f4').reshape(n, TOTAL_LANDMARKS, c)
+        offset += taille_landmarks
+        presence = m[offset:offset + n * len(PARTIES)].view(np.bool_).reshape(n, len(PARTIES))
+        offset += n * len(PARTIES)
+        if self.version >= 2:
+            drapeaux = m[offset:offset + n]
+        else:
+            drapeaux = np.zeros(n, dtype=np.uint8)
+        return landmarks, presence, frames, timestamps, drapeaux
+
+    def lire(self, debut=None, fin=None, partie=None):
+        """
+        Renvoie (landmarks, presence, frames, timestamps) pour les lignes [debut, fin)
+        Sans copie si l'intervalle tient dans un seul bloc
+        partie : seuls les landmarks de cette partie du corps sont lus (frames, n, composantes)
+        """
+        return self._lire(debut, fin, INDICES_PARTIES[partie] if partie else slice(None))[:4]
+
+    def lire_drapeaux(self, debut=None, fin=None):
+        """Drapeaux par frame (ex. DRAPEAU_ESTIMEE) pour les lignes [debut, fin)"""
+        # Aucun landmark sélectionné : seule la petite colonne de drapeaux est copiée
+        return self._lire(debut, fin, slice(0, 0))[4]
+
+    def _lire(self, debut, fin, zone=slice(None)):
+        debut, fin, _ = slice(debut, fin).indices(self.taille)
+        if fin <= debut:
+            vide = StockageLandmarks(self.composantes, taille_bloc=1)
+            landmarks, *colonnes = vide.tranche()
+            return (landmarks[:, zone], *colonnes, vide.drapeaux)
+
+        premier = int(np.searchsorted(self._debuts, debut, side='right')) - 1
+        dernier = int(np.searchsorted(self._debuts, fin - 1, side='right')) - 1
+        morceaux = []
+        for index in range(premier, dernier + 1):
+            ligne_bloc = self.blocs[index][0]
+            intervalle = slice(max(debut - ligne_bloc, 0), fin - ligne_bloc)
+            landmarks, *colonnes = (vue[intervalle] for vue in self._vues_bloc(index))
+            # Sélection des landmarks avant concaténation : seule la zone est copiée
+            morceaux.append((landmarks[:, zone], *colonnes))
+
+        if len(morceaux) == 1:
+            return morceaux[0]
+        return tuple(np.concatenate(colonne) for colonne in zip(*morceaux))
+
+    def partie(self, nom, debut=None, fin=None):
+        """Landmarks (frames, n, composantes) d'une partie du corps"""
+        return self.lire(debut, fin, nom)[0]
+
+    @property
+    def frames(self):
+        """Numéros de frame de tout l'enregistrement (petite colonne int64)"""
+        if not self.blocs:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([self._vues_bloc(i)[2] for i in range(len(self.blocs))])
+
+    def ligne_de_frame(self, frame_number):
+        """Ligne correspondant à un numéro de frame (frames croissantes)"""
+        return int(np.searchsorted(self.frames, frame_number))
+
+    def lire_frames(self, frame_debut, frame_fin):
+        """Intervalle exprimé en numéros de frame [frame_debut, frame_fin)"""
+        return self.lire(self.ligne_de_frame(frame_debut), self.ligne_de_frame(frame_fin))
+
+    def vers_stockage(self, debut=None, fin=None):
+        """Copie un intervalle dans un StockageLandmarks"""
+        return StockageLandmarks.depuis_tableaux(*self._lire(debut, fin))
+
+
+def convertir_en_csv(chemin_lmk, chemin_csv, debut=None, fin=None):
+    """Conversion optionnelle d'un enregistrement .lmk vers l'ancien format CSV"""
+    lecteur = LecteurLandmarks(chemin_lmk)
+    exporter_csv(lecteur.vers_stockage(debut, fin), chemin_csv)
+    print(f"{chemin_lmk} converti vers {chemin_csv}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python format_binaire.py enregistrement.lmk sortie.csv
+    if len(sys.argv) != 3:
+        print("Usage: python format_binaire.py enregistrement.lmk sortie.csv")
+        sys.exit(1)
+    convertir_en_csv(sys.argv[1], sys.argv[2])
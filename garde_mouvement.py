@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inférence conditionnée au mouvement : holistic.process() sauté sur les scènes statiques
+Par Dady Akrou Cyrille - Data Scientist
+
+Sur une borne, la caméra filme souvent une scène vide ou immobile pendant de
+longues périodes, et le modèle tournait quand même sur chaque frame. Un
+pré-traitement peu coûteux décide avant l'inférence :
+- la frame est réduite (64 px de large par défaut) et passée en niveaux de gris
+- 'difference' : écart avec la frame de la dernière inférence (un mouvement
+  lent finit donc par être vu) ; 'mog2' : soustraction de fond
+  cv2.createBackgroundSubtractorMOG2
+- sans mouvement, les résultats de la dernière inférence sont réutilisés
+  (rafraîchis au plus tard toutes les `reutilisation_max` frames)
+- sans personne détectée depuis `frames_avant_veille` frames, passage en
+  veille : le modèle n'est plus sondé que toutes les `intervalle_veille` frames,
+  ou dès qu'un mouvement est détecté (une personne qui arrive est vue aussitôt)
+
+Même interface que PlanificateurInference : traiter() renvoie une FrameEmise,
+les frames réutilisées sont marquées estimées (DRAPEAU_ESTIMEE).
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from roi import ConversionRGB
+from planificateur import FrameEmise
+from stockage_landmarks import PARTIES, TOTAL_LANDMARKS, extraire_landmarks
+
+METHODES_MOUVEMENT = ('difference', 'mog2')
+
+
+class GardeMouvement:
+    """Exécute le modèle seulement quand la scène change ou qu'il faut sonder"""
+
+    def __init__(self, methode='difference', largeur=64, seuil_pixel=15, seuil_mouvement=0.005,
+                 reutilisation_max=30, frames_avant_veille=90, intervalle_veille=15):
+        if methode not in METHODES_MOUVEMENT:
+            raise ValueError(f"Méthode de détection de mouvement inconnue: {methode} "
+                             f"(choix: {', '.join(METHODES_MOUVEMENT)})")
+        self.methode = methode
+        self.largeur = largeur
+        # Écart de niveau de gris (0-255) à partir duquel un pixel a changé
+        self.seuil_pixel = seuil_pixel
+        # Fraction de pixels changés à partir de laquelle la scène a bougé
+        self.seuil_mouvement = seuil_mouvement
+        self.reutilisation_max = reutilisation_max
+        self.frames_avant_veille = frames_avant_veille
+        self.intervalle_veille = max(1, intervalle_veille)
+
+        self.numero = 0
+        self.depuis_inference = 0
+        self.depuis_personne = 0
+        self.derniere = None
+        self.mouvement = 0.0
+
+        # Tampons de la frame réduite, réutilisés d'une frame à l'autre
+        self._reduite = None
+        self._gris = None
+        self._reference = None
+        self._masque = None
+        self._fond = None
+        if methode == 'mog2':
+            self._fond = cv2.createBackgroundSubtractorMOG2(history=300, varThreshold=16,
+                                                            detectShadows=False)
+        self._conversion = ConversionRGB()
+
+        self.frames_inferees = 0
+        self.frames_reutilisees = 0
+        self.frames_veille = 0
+        self._cpu_garde_s = 0.0
+        self._cpu_inference_s = 0.0
+
+    @property
+    def en_veille(self):
+        """Aucune personne détectée depuis frames_avant_veille frames"""
+        return self.derniere is not None and self.depuis_personne >= self.frames_avant_veille
+
+    def mesurer_mouvement(self, frame_bgr):
+        """Fraction des pixels de la frame réduite qui ont changé"""
+        hauteur, largeur = frame_bgr.shape[:2]
+        taille = (self.largeur, max(1, round(hauteur * self.largeur / largeur)))
+        if self._reduite is None or self._reduite.shape[1::-1] != taille:
+            self._reduite = np.empty((taille[1], taille[0], 3), dtype=np.uint8)
+            self._gris = np.empty(taille[::-1], dtype=np.uint8)
+            self._masque = np.empty(taille[::-1], dtype=np.uint8)
+            self._reference = None
+        cv2.resize(frame_bgr, taille, dst=self._reduite, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._reduite, cv2.COLOR_BGR2GRAY, dst=self._gris)
+
+        if self._fond is not None:
+            self._fond.apply(self._gris, self._masque)
+        elif self._reference is None:
+            return 1.0
+        else:
+            cv2.absdiff(self._gris, self._reference, dst=self._masque)
+            cv2.threshold(self._masque, self.seuil_pixel, 255, cv2.THRESH_BINARY, dst=self._masque)
+        return cv2.countNonZero(self._masque) / self._masque.size
+
+    def doit_inferer(self):
+        if self.derniere is None:
+            return True
+        # Le mouvement réveille aussi la veille
+        if self.mouvement >= self.seuil_mouvement:
+            return True
+        if self.en_veille:
+            return self.depuis_inference >= self.intervalle_veille
+        return self.depuis_inference >= self.reutilisation_max
+
+    def traiter(self, frame_bgr, inferer):
+        """
+        Traite une frame BGR ; `inferer(image_rgb)` exécute le modèle.
+        Renvoie une FrameEmise pour chaque frame
+        """
+        self.numero += 1
+        self.depuis_inference += 1
+        self.depuis_personne += 1
+        debut = time.process_time()
+        self.mouvement = self.mesurer_mouvement(frame_bgr)
+        veille = self.en_veille
+        inference = self.doit_inferer()
+        self._cpu_garde_s += time.process_time() - debut
+        if veille:
+            self.frames_veille += 1
+
+        if not inference:
+            self.frames_reutilisees += 1
+            _, landmarks, presence, results = self.derniere
+            return FrameEmise(self.numero, landmarks, presence, False, 'reutilisation', results)
+
+        debut = time.process_time()
+        results = inferer(self._conversion.convertir(frame_bgr))
+        self._cpu_inference_s += time.process_time() - debut
+
+        landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+        presence = np.zeros(len(PARTIES), dtype=bool)
+        extraire_landmarks(results, landmarks, presence)
+        self.derniere = (self.numero, landmarks, presence, results)
+        self.depuis_inference = 0
+        if presence.any():
+            self.depuis_personne = 0
+        if self._fond is None:
+            # Référence = frame de la dernière inférence : les changements lents s'accumulent
+            if self._reference is None:
+                self._reference = self._gris.copy()
+            else:
+                self._reference[...] = self._gris
+        self.frames_inferees += 1
+        return FrameEmise(self.numero, landmarks, presence, True, 'inference', results)
+
+    def statistiques(self):
+        """Frames filtrées et temps CPU économisé (estimé sur le coût moyen d'une inférence)"""
+        total = self.frames_inferees + self.frames_reutilisees
+        cpu_inference_ms = 1000 * self._cpu_inference_s / self.frames_inferees if self.frames_inferees else 0.0
+        economise_s = self.frames_reutilisees * cpu_inference_ms / 1000 - self._cpu_garde_s
+        return {
+            'frames_inferees': self.frames_inferees,
+            'frames_reutilisees': self.frames_reutilisees,
+            'frames_veille': self.frames_veille,
+            'taux_filtrage': round(self.frames_reutilisees / total, 3) if total else 0.0,
+            'cpu_inference_ms': round(cpu_inference_ms, 2),
+            'cpu_garde_ms': round(1000 * self._cpu_garde_s / total, 3) if total else 0.0,
+            'cpu_economise_s': round(economise_s, 2),
+            'etat': 'veille' if self.en_veille else 'actif',
+        }
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moteur de gestes vectorisé
+Par Dady Akrou Cyrille - Data Scientist
+
+Chaque geste est un ensemble déclaratif de conditions sur les indices des
+landmarks de la main (extrémités, articulations PIP, MCP...). Toutes les
+conditions de tous les gestes enregistrés sont évaluées en un seul passage
+NumPy sur un tableau (21, 3) ou (N, 21, 3) : les deux mains d'une frame ou
+des milliers de frames enregistrées sont classées d'un coup.
+
+Indices des landmarks de la main :
+- 0 : Poignet
+- 1-4 : Pouce (4 = extrémité)
+- 5-8 : Index (5 = MCP, 6 = PIP, 8 = extrémité)
+- 9-12 : Majeur, 13-16 : Annulaire, 17-20 : Auriculaire
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+AXES = {'x': 0, 'y': 1, 'z': 2}
+
+# Condition élémentaire : main[a, axe] <op> main[b, axe]
+Condition = namedtuple('Condition', ['axe', 'a', 'operateur', 'b'])
+
+
+class Geste:
+    """Geste déclaratif : un nom, des conditions et le nombre minimal à satisfaire"""
+
+    def __init__(self, nom, conditions, minimum=None):
+        if not conditions:
+            raise ValueError(f"Le geste '{nom}' n'a aucune condition")
+        self.nom = nom
+        self.conditions = [Condition(*c) for c in conditions]
+        for condition in self.conditions:
+            if condition.axe not in AXES or condition.operateur not in ('<', '>'):
+                raise ValueError(f"Condition invalide pour le geste '{nom}': {condition}")
+        # Par défaut toutes les conditions doivent être vraies
+        self.minimum = len(self.conditions) if minimum is None else minimum
+
+    def __repr__(self):
+        return f"Geste({self.nom!r}, {len(self.conditions)} conditions, minimum={self.minimum})"
+
+
+def geste_poing():
+    """Main fermée : au moins 4 doigts pliés sur 5"""
+    return Geste('Poing', [
+        ('x', 4, '<', 3),    # Pouce replié (il bouge horizontalement)
+        ('y', 8, '>', 6),    # Index plié
+        ('y', 12, '>', 10),  # Majeur plié
+        ('y', 16, '>', 14),  # Annulaire plié
+        ('y', 20, '>', 18),  # Auriculaire plié
+    ], minimum=4)
+
+
+def geste_paix():
+    """V avec l'index et le majeur, annulaire et auriculaire pliés"""
+    return Geste('Paix', [
+        ('y', 8, '<', 6),
+        ('y', 12, '<', 10),
+        ('y', 16, '>', 14),
+        ('y', 20, '>', 18),
+    ])
+
+
+class MoteurGestes:
+    """Registre de gestes compilé en tableaux d'indices pour une évaluation vectorisée"""
+
+    def __init__(self, gestes=None):
+        self.gestes = []
+        for geste in (gestes if gestes is not None else [geste_poing(), geste_paix()]):
+            self.enregistrer(geste)
+
+    def enregistrer(self, geste):
+        """Ajoute un geste au registre ; l'ordre d'enregistrement fixe la priorité"""
+        if any(g.nom == geste.nom for g in self.gestes):
+            raise ValueError(f"Geste déjà enregistré: {geste.nom}")
+        self.gestes.append(geste)
+        self._compiler()
+        return geste
+
+    def retirer(self, nom):
+        self.gestes = [g for g in self.gestes if g.nom != nom]
+        self._compiler()
+
+    @property
+    def noms(self):
+        return [g.nom for g in self.gestes]
+
+    def _compiler(self):
+        """Aplati toutes les conditions en tableaux d'indices"""
+        conditions = [c for g in self.gestes for c in g.conditions]
+        self._a = np.array([c.a for c in conditions], dtype=np.intp)
+        self._b = np.array([c.b for c in conditions], dtype=np.intp)
+        self._axes = np.array([AXES[c.axe] for c in conditions], dtype=np.intp)
+        # a < b  <=>  signe * (a - b) > 0 avec signe = -1
+        self._signes = np.array([-1.0 if c.operateur == '<' else 1.0 for c in conditions], dtype=np.float32)
+        self._debuts = np.cumsum([0] + [len(g.conditions) for g in self.gestes[:-1]]).astype(np.intp)
+        self._minimums = np.array([g.minimum for g in self.gestes], dtype=np.intp)
+
+    def evaluer(self, mains):
+        """
+        Évalue tous les gestes sur (21, 3) ou (N, 21, 3)
+        Renvoie un tableau booléen (G,) ou (N, G) ; une main absente (NaN) ne valide aucun geste
+        """
+        mains = np.asarray(mains, dtype=np.float32)
+        unitaire = mains.ndim == 2
+        if unitaire:
+            mains = mains[np.newaxis]
+        if not self.gestes:
+            resultat = np.zeros((len(mains), 0), dtype=bool)
+            return resultat[0] if unitaire else resultat
+
+        ecarts = mains[:, self._a, self._axes] - mains[:, self._b, self._axes]
+        satisfaites = (ecarts * self._signes) > 0
+        comptes = np.add.reduceat(satisfaites, self._debuts, axis=1)
+        resultat = comptes >= self._minimums
+        return resultat[0] if unitaire else resultat
+
+    def classifier(self, mains):
+        """
+        Renvoie, pour chaque main, le nom du premier geste reconnu (ordre du registre) ou None
+        """
+        resultat = self.evaluer(mains)
+        unitaire = resultat.ndim == 1
+        if unitaire:
+            resultat = resultat[np.newaxis]
+        premiers = np.argmax(resultat, axis=1)
+        trouves = resultat.any(axis=1) if resultat.shape[1] else np.zeros(len(resultat), dtype=bool)
+        noms = [self.gestes[i].nom if ok else None for i, ok in zip(premiers, trouves)]
+        return noms[0] if unitaire else noms
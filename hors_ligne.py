@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mode hors ligne sans affichage, piloté en ligne de commande
+Par Dady Akrou Cyrille - Data Scientist
+
+Aucun appel à cv2.imshow / cv2.waitKey ni à input() : utilisable sur un
+serveur sans écran et dans les benchmarks automatisés. La boucle tourne
+aussi vite que l'inférence le permet.
+
+Sources : index de webcam, fichier vidéo ou URL de flux, dossier d'images
+Sorties : landmarks (.lmk en flux ou .csv), vidéo annotée, ou aucune
+
+Exemples :
+    python hors_ligne.py clip.mp4 --landmarks clip.lmk
+    python hors_ligne.py images/ --video annotee.mp4 --complexite 2
+    python hors_ligne.py clip.mp4 --rechauffage 30 --rapport debit.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from stockage_landmarks import (
+    COMPOSANTES_PAR_DEFAUT, StockageLandmarks, TOTAL_LANDMARKS, PARTIES, exporter_csv, extraire_landmarks
+)
+from format_binaire import EcrivainLandmarks
+from roi import RecadrageROI, ConversionRGB
+from rendu import NIVEAUX, RenduLandmarks
+from planificateur import PlanificateurInference
+from garde_mouvement import GardeMouvement, METHODES_MOUVEMENT
+from instrumentation import ETAPES, MesureLatences
+from sous_modeles import MODES, creer_session
+from lissage import FILTRES, creer_filtre
+from caracteristiques import MoteurCaracteristiques, exporter_caracteristiques_csv
+
+EXTENSIONS_IMAGE = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+
+class SourceImages:
+    """Dossier d'images lu comme un cv2.VideoCapture (ordre alphabétique)"""
+
+    def __init__(self, dossier, fps=30.0):
+        self.chemins = sorted(
+            os.path.join(dossier, nom) for nom in os.listdir(dossier)
+            if nom.lower().endswith(EXTENSIONS_IMAGE)
+        )
+        self.position = 0
+        self.fps = fps
+
+    def isOpened(self):
+        return self.position < len(self.chemins)
+
+    def read(self, image=None):
+        """Comme VideoCapture.read(image) : `image` est réutilisée si sa forme convient"""
+        while self.position < len(self.chemins):
+            lue = cv2.imread(self.chemins[self.position])
+            self.position += 1
+            if lue is not None:
+                if image is not None and image.shape == lue.shape and image.dtype == lue.dtype:
+                    np.copyto(image, lue)
+                    return True, image
+                return True, lue
+            print(f"Image illisible ignorée: {self.chemins[self.position - 1]}")
+        return False, None
+
+    def get(self, propriete):
+        if propriete == cv2.CAP_PROP_FPS:
+            return self.fps
+        if propriete == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.chemins)
+        return 0
+
+    def release(self):
+        self.position = len(self.chemins)
+
+
+def ouvrir_source(source):
+    """Index de webcam ('0'), dossier d'images, fichier vidéo ou URL"""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    if isinstance(source, str) and os.path.isdir(source):
+        cap = SourceImages(source)
+    else:
+        cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Impossible d'ouvrir la source: {source}")
+    return cap
+
+
+class SortieLandmarks:
+    """Landmarks écrits en flux (.lmk) ou accumulés puis exportés (.csv)"""
+
+    def __init__(self, chemin, composantes=COMPOSANTES_PAR_DEFAUT):
+        self.chemin = chemin
+        self.binaire = not chemin.lower().endswith('.csv')
+        if self.binaire:
+            self.cible = EcrivainLandmarks(chemin, composantes)
+        else:
+            self.cible = StockageLandmarks(composantes)
+
+    def ajouter(self, landmarks, presence, numero, drapeaux=0):
+        self.cible.ajouter_tableau(landmarks, presence, numero, drapeaux=drapeaux)
+
+    def fermer(self):
+        if self.binaire:
+            self.cible.fermer()
+        else:
+            exporter_csv(self.cible, self.chemin)
+        print(f"Landmarks écrits dans {self.chemin} ({len(self.cible)} frames)")
+
+
+def traiter_hors_ligne(source, sortie_landmarks=None, sortie_video=None, max_frames=None,
+                       rechauffage=0, complexite=1, min_detection_confidence=0.5,
+                       min_tracking_confidence=0.5, images_statiques=None, lissage=True,
+                       mode_roi=False, resolution_max=None, intervalle_inference=1,
+                       niveau_rendu='complet', fichier_latences=None, raffiner_visage=False,
+                       dessin=False, mode='holistic', filtre_temporel=None, sortie_caracteristiques=None,
+                       chemin_cache=None, taille_cache_mo=1024, port_diffusion=None,
+                       mouvement=None, seuil_mouvement=0.005, frames_avant_veille=90,
+                       intervalle_veille=15):
+    """
+    Traite une source sans affichage et renvoie un rapport de débit
+    Les `rechauffage` premières frames sont exclues de la mesure de débit
+    dessin=True dessine les landmarks même sans vidéo en sortie (coût du rendu seul)
+    mode ('holistic', 'pose', 'mains', 'visage') n'exécute que le sous-modèle utile
+    filtre_temporel ('one_euro' ou 'kalman') lisse les landmarks avant export et dessin
+    sortie_caracteristiques : CSV des angles, distances et vitesses par frame
+    chemin_cache : cache d'inférence sur disque, les frames déjà inférées d'un fichier
+    vidéo ne repassent pas par le modèle (sans effet avec intervalle_inference > 1),
+    sauf celles qui précèdent de peu une frame absente (réchauffage du suivi)
+    port_diffusion : publie les landmarks de chaque frame aux abonnés locaux (diffusion.py)
+    mouvement ('difference' ou 'mog2') : modèle sauté sans mouvement, veille après
+    frames_avant_veille frames sans personne (sondage toutes les intervalle_veille frames)
+    """
+    cap = ouvrir_source(source)
+    if images_statiques is None:
+        # Un dossier d'images n'a pas de continuité temporelle : pas de suivi
+        images_statiques = isinstance(cap, SourceImages)
+
+    recadrage = None
+    if mode_roi or resolution_max:
+        recadrage = RecadrageROI(resolution_max=resolution_max, actif=mode_roi)
+    planificateur = None
+    if mouvement:
+        planificateur = GardeMouvement(mouvement, seuil_mouvement=seuil_mouvement,
+                                       frames_avant_veille=frames_avant_veille,
+                                       intervalle_veille=intervalle_veille)
+    elif intervalle_inference > 1:
+        planificateur = PlanificateurInference(intervalle_inference)
+
+    # Cache d'inférence : uniquement pour un fichier, dont le contenu peut être haché
+    cache = cle_cache = None
+    if chemin_cache and not planificateur and os.path.isfile(str(source)):
+        from cache_inference import CacheInference, RECHAUFFAGE_SUIVI, rechauffage_requis
+        cache = CacheInference(chemin_cache, taille_cache_mo)
+        cle_cache = cache.cle(
+            source, mode=mode, static_image_mode=images_statiques, model_complexity=complexite,
+            smooth_landmarks=lissage, refine_face_landmarks=raffiner_visage,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            mode_roi=mode_roi, resolution_max=resolution_max, segmentation='continu')
+        en_cache = cache.frames_presentes(cle_cache)
+        # Dernière frame utile : pas de réchauffage pour des frames qui n'existent pas
+        derniere = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        if max_frames is not None:
+            derniere = min(derniere or max_frames, max_frames)
+        # Sans suivi (images statiques), chaque frame est indépendante
+        fenetre = 0 if images_statiques else RECHAUFFAGE_SUIVI
+        frames_rechauffage_cache = 0
+
+    landmarks_sortie = SortieLandmarks(sortie_landmarks) if sortie_landmarks else None
+    diffuseur = None
+    if port_diffusion is not None:
+        from diffusion import DiffuseurLandmarks
+        diffuseur = DiffuseurLandmarks(port=port_diffusion).demarrer()
+    rendu = RenduLandmarks(niveau_rendu) if sortie_video or dessin else None
+    writer = None
+
+    # Pas de temps tiré de la cadence de la source, pas de la vitesse de traitement
+    fps_source = cap.get(cv2.CAP_PROP_FPS) or 30
+    filtre = creer_filtre(filtre_temporel, fps=fps_source) if filtre_temporel else None
+
+    caracteristiques = MoteurCaracteristiques(fps=fps_source) if sortie_caracteristiques else None
+    lignes_caracteristiques = []
+
+    mesure = MesureLatences(etapes=ETAPES + ('lissage', 'caracteristiques', 'export'))
+    landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+    lisses = np.empty_like(landmarks)
+    presence = np.zeros(len(PARTIES), dtype=bool)
+    # Frame et image RGB réutilisées d'une frame à l'autre
+    conversion = ConversionRGB()
+    frame = None
+    numero = 0
+    debut_mesure = None
+
+    with creer_session(
+        mode,
+        static_image_mode=images_statiques,
+        model_complexity=complexite,
+        smooth_landmarks=lissage,
+        refine_face_landmarks=raffiner_visage,
+        min_detection_confidence=min_detection_confidence,
+        min_tracking_confidence=min_tracking_confidence
+    ) as holistic:
+
+        def inferer(image):
+            if recadrage:
+                return recadrage.traiter(holistic, image)
+            return holistic.process(image)
+
+        try:
+            while max_frames is None or numero < max_frames:
+                mesure.nouvelle_frame()
+                ret, frame = cap.read(frame)
+                mesure.marquer('capture')
+                if not ret:
+                    break
+                numero += 1
+                if numero == rechauffage + 1:
+                    debut_mesure = time.perf_counter()
+
+                if planificateur:
+                    emission = planificateur.traiter(frame, inferer)
+                    mesure.marquer('inference')
+                    frame_landmarks, frame_presence = emission.landmarks, emission.presence
+                    drapeaux = emission.drapeaux
+                elif cache and cache.lire(cle_cache, numero, landmarks, presence):
+                    # Frame déjà inférée lors d'une passe précédente ; inférée quand
+                    # même (résultat ignoré) si une frame absente du cache suit de près
+                    if rechauffage_requis(numero, en_cache, fenetre, derniere=derniere):
+                        inferer(conversion.convertir(frame))
+                        frames_rechauffage_cache += 1
+                    mesure.marquer('inference')
+                    frame_landmarks, frame_presence, drapeaux = landmarks, presence, 0
+                else:
+                    image = conversion.convertir(frame)
+                    mesure.marquer('conversion')
+                    results = inferer(image)
+                    mesure.marquer('inference')
+                    extraire_landmarks(results, landmarks, presence)
+                    frame_landmarks, frame_presence, drapeaux = landmarks, presence, 0
+                    if cache:
+                        cache.ecrire(cle_cache, numero, landmarks, presence)
+
+                if filtre:
+                    frame_landmarks = filtre.filtrer(frame_landmarks, frame_presence, numero / fps_source, lisses)
+                    mesure.marquer('lissage')
+
+                if caracteristiques:
+                    lignes_caracteristiques.append(caracteristiques.mettre_a_jour(
+                        frame_landmarks, frame_presence, numero, numero / fps_source))
+                    mesure.marquer('caracteristiques')
+
+                if landmarks_sortie:
+                    landmarks_sortie.ajouter(frame_landmarks, frame_presence, numero, drapeaux)
+                    mesure.marquer('export')
+                if diffuseur:
+                    diffuseur.publier(frame_landmarks, frame_presence, numero, drapeaux=drapeaux)
+                    mesure.marquer('export')
+
+                if rendu:
+                    rendu.dessiner(frame, frame_landmarks, frame_presence)
+                    mesure.marquer('dessin')
+                if sortie_video:
+                    if writer is None:
+                        hauteur, largeur = frame.shape[:2]
+                        writer = cv2.VideoWriter(sortie_video, cv2.VideoWriter_fourcc(*'mp4v'),
+                                                 fps_source, (largeur, hauteur))
+                    writer.write(frame)
+                    mesure.marquer('ecriture_video')
+            mesure.nouvelle_frame()
+        finally:
+            # Fermeture des sorties comprise dans la durée mesurée (export CSV final)
+            cap.release()
+            if writer is not None:
+                writer.release()
+                print(f"Vidéo annotée écrite dans {sortie_video}")
+            if landmarks_sortie:
+                landmarks_sortie.fermer()
+            if cache:
+                cache.fermer()
+            if diffuseur:
+                diffuseur.arreter()
+            if caracteristiques:
+                exporter_caracteristiques_csv(caracteristiques.noms, lignes_caracteristiques,
+                                              np.arange(1, len(lignes_caracteristiques) + 1),
+                                              sortie_caracteristiques)
+                print(f"Caractéristiques écrites dans {sortie_caracteristiques}")
+            fin = time.perf_counter()
+
+    frames_mesurees = max(0, numero - rechauffage)
+    duree = fin - debut_mesure if debut_mesure is not None else 0.0
+    rapport = {
+        'source': str(source),
+        'mode': mode,
+        'frames': numero,
+        'frames_mesurees': frames_mesurees,
+        'duree_s': round(duree, 3),
+        'fps': round(frames_mesurees / duree, 2) if duree > 0 else 0.0,
+        'latences_ms': mesure.statistiques(),
+    }
+    if mouvement:
+        rapport['mouvement'] = planificateur.statistiques()
+    elif planificateur:
+        rapport['planificateur'] = planificateur.statistiques()
+    if cache:
+        rapport['cache'] = {'succes': cache.succes, 'echecs': cache.echecs,
+                            'evictions': cache.evictions, 'rechauffage': frames_rechauffage_cache}
+    if diffuseur:
+        rapport['diffusion'] = diffuseur.statistiques()
+    if fichier_latences:
+        mesure.exporter(fichier_latences)
+    return rapport
+
+
+def afficher_rapport(rapport):
+    """Affiche le débit et les percentiles de latence"""
+    print("=== Traitement hors ligne ===")
+    print(f"Source: {rapport['source']} (mode {rapport['mode']})")
+    print(f"Frames: {rapport['frames']} ({rapport['frames_mesurees']} mesurées)")
+    print(f"Durée: {rapport['duree_s']} s - Débit: {rapport['fps']} FPS")
+    if rapport.get('cache'):
+        print(f"Cache d'inférence: {rapport['cache']['succes']} succès, {rapport['cache']['echecs']} échecs "
+              f"({rapport['cache']['rechauffage']} frames en cache inférées pour le suivi)")
+    if rapport.get('mouvement'):
+        stats = rapport['mouvement']
+        print(f"Garde de mouvement: {100 * stats['taux_filtrage']:.0f} % des frames sans inférence "
+              f"({stats['frames_veille']} en veille), CPU économisé {stats['cpu_economise_s']} s")
+    for etape, valeurs in rapport['latences_ms'].items():
+        if valeurs['max'] > 0:
+            print(f"  {etape:<15} p50 {valeurs['p50']:>7.2f}  p95 {valeurs['p95']:>7.2f}  "
+                  f"p99 {valeurs['p99']:>7.2f} ms")
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Détection holistique hors ligne, sans affichage")
+    parser.add_argument('source', help="Index de webcam, fichier vidéo, URL ou dossier d'images")
+    parser.add_argument('--landmarks', default=None, help="Fichier de landmarks (.lmk ou .csv)")
+    parser.add_argument('--caracteristiques', default=None, help="CSV des angles, distances et vitesses")
+    parser.add_argument('--video', default=None, help="Vidéo annotée en sortie (.mp4)")
+    parser.add_argument('--max-frames', type=int, default=None, help="Nombre maximal de frames")
+    parser.add_argument('--rechauffage', type=int, default=0, help="Frames exclues de la mesure de débit")
+    parser.add_argument('--mode', choices=tuple(MODES), default='holistic',
+                        help="Sous-modèle exécuté (holistic, pose, mains ou visage)")
+    parser.add_argument('--complexite', type=int, choices=(0, 1, 2), default=1, help="model_complexity")
+    parser.add_argument('--detection', type=float, default=0.5, help="min_detection_confidence")
+    parser.add_argument('--suivi', type=float, default=0.5, help="min_tracking_confidence")
+    parser.add_argument('--statique', action='store_true', help="static_image_mode (pas de suivi)")
+    parser.add_argument('--sans-lissage', action='store_true', help="Désactive smooth_landmarks")
+    parser.add_argument('--filtre', choices=tuple(FILTRES), default=None,
+                        help="Lissage temporel des landmarks (One-Euro ou Kalman)")
+    parser.add_argument('--raffiner-visage', action='store_true', help="refine_face_landmarks (iris)")
+    parser.add_argument('--roi', action='store_true', help="Inférence sur un recadrage autour du sujet")
+    parser.add_argument('--resolution-max', type=int, default=None, help="Plus grand côté envoyé au modèle")
+    parser.add_argument('--intervalle', type=int, default=1, help="Inférence toutes les N frames")
+    parser.add_argument('--rendu', choices=NIVEAUX, default='complet', help="Niveau de détail de la vidéo annotée")
+    parser.add_argument('--latences', default=None, help="Export des latences par étape (.json ou .csv)")
+    parser.add_argument('--rapport', default=None, help="Export du rapport de débit en JSON")
+    parser.add_argument('--cache', default=None, help="Base du cache d'inférence (ex. cache_inference.sqlite)")
+    parser.add_argument('--cache-mo', type=float, default=1024, help="Taille maximale du cache en Mo")
+    parser.add_argument('--diffusion', type=int, default=None, metavar='PORT',
+                        help="Diffuse les landmarks en direct sur ce port TCP (diffusion.py)")
+    parser.add_argument('--mouvement', choices=METHODES_MOUVEMENT, default=None,
+                        help="Saute le modèle sur les frames sans mouvement")
+    parser.add_argument('--seuil-mouvement', type=float, default=0.005,
+                        help="Fraction de pixels changés qui déclenche l'inférence")
+    parser.add_argument('--veille', type=int, default=90,
+                        help="Frames sans personne avant le passage en veille")
+    parser.add_argument('--intervalle-veille', type=int, default=15,
+                        help="En veille, sondage du modèle toutes les N frames")
+    args = parser.parse_args()
+
+    rapport = traiter_hors_ligne(
+        args.source,
+        sortie_landmarks=args.landmarks,
+        sortie_video=args.video,
+        max_frames=args.max_frames,
+        rechauffage=args.rechauffage,
+        complexite=args.complexite,
+        min_detection_confidence=args.detection,
+        min_tracking_confidence=args.suivi,
+        images_statiques=True if args.statique else None,
+        lissage=not args.sans_lissage,
+        raffiner_visage=args.raffiner_visage,
+        mode_roi=args.roi,
+        resolution_max=args.resolution_max,
+        intervalle_inference=args.intervalle,
+        niveau_rendu=args.rendu,
+        fichier_latences=args.latences,
+        mode=args.mode,
+        filtre_temporel=args.filtre,
+        sortie_caracteristiques=args.caracteristiques,
+        chemin_cache=args.cache,
+        taille_cache_mo=args.cache_mo,
+        port_diffusion=args.diffusion,
+        mouvement=args.mouvement,
+        seuil_mouvement=args.seuil_mouvement,
+        frames_avant_veille=args.veille,
+        intervalle_veille=args.intervalle_veille
+    )
+    afficher_rapport(rapport)
+
+    if args.rapport:
+        with open(args.rapport, 'w') as f:
+            json.dump(rapport, f, indent=2)
+        print(f"Rapport écrit dans {args.rapport}")
+
+
+if __name__ == "__main__":
+    main()
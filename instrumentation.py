@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesure des latences par étape et affichage des performances en direct
+Par Dady Akrou Cyrille - Data Scientist
+
+Chaque frame est découpée en étapes (capture, conversion de couleur,
+holistic.process, dessin, écriture vidéo, affichage). Les durées sont
+gardées dans un tampon circulaire de taille fixe, d'où l'on tire des
+percentiles glissants p50/p95/p99. Le coût par frame se limite à un appel
+à time.perf_counter() par étape : l'instrumentation peut rester active en
+production.
+"""
+
+import csv
+import json
+import time
+
+import cv2
+import numpy as np
+
+ETAPES = ('capture', 'conversion', 'inference', 'dessin', 'ecriture_video', 'affichage')
+PERCENTILES = (50, 95, 99)
+
+
+class MesureLatences:
+    """Chronométrage par étape avec percentiles glissants sur les dernières frames"""
+
+    def __init__(self, etapes=ETAPES, taille=1024, rafraichissement=15):
+        self.etapes = tuple(etapes)
+        self._index = {nom: i for i, nom in enumerate(self.etapes)}
+        # Une ligne par étape plus le total, une colonne par frame (ms)
+        self._tampon = np.zeros((len(self.etapes) + 1, taille), dtype=np.float32)
+        self.taille = taille
+        self.position = 0
+        self.frames = 0
+
+        self._courante = [0.0] * len(self.etapes)
+        self._repere = time.perf_counter()
+        self._debut_frame = self._repere
+
+        # Percentiles recalculés toutes les `rafraichissement` frames pour le HUD
+        self.rafraichissement = rafraichissement
+        self._cache = None
+
+    def nouvelle_frame(self):
+        """Clôt la frame en cours (si elle a été mesurée) et démarre la suivante"""
+        maintenant = time.perf_counter()
+        if any(self._courante):
+            colonne = self.position
+            self._tampon[:-1, colonne] = self._courante
+            self._tampon[-1, colonne] = 1000 * (maintenant - self._debut_frame)
+            self.position = (colonne + 1) % self.taille
+            self.frames += 1
+            self._courante = [0.0] * len(self.etapes)
+            if self.frames % self.rafraichissement == 0:
+                self._cache = None
+        self._repere = maintenant
+        self._debut_frame = maintenant
+
+    def marquer(self, etape):
+        """Attribue à `etape` le temps écoulé depuis le repère précédent"""
+        maintenant = time.perf_counter()
+        self._courante[self._index[etape]] += 1000 * (maintenant - self._repere)
+        self._repere = maintenant
+
+    def enregistrer(self, durees):
+        """Ajoute une frame dont les durées (ms) par étape ont été mesurées ailleurs"""
+        colonne = self.position
+        self._tampon[:, colonne] = 0.0
+        for etape, duree in durees.items():
+            self._tampon[self._index[etape], colonne] = duree
+        self._tampon[-1, colonne] = sum(durees.values())
+        self.position = (colonne + 1) % self.taille
+        self.frames += 1
+        if self.frames % self.rafraichissement == 0:
+            self._cache = None
+
+    def ignorer(self):
+        """Replace le repère sans attribuer le temps écoulé à une étape"""
+        self._repere = time.perf_counter()
+
+    @property
+    def remplies(self):
+        return min(self.frames, self.taille)
+
+    def statistiques(self):
+        """Percentiles et moyenne (ms) par étape sur les frames du tampon"""
+        if self._cache is not None:
+            return self._cache
+        statistiques = {}
+        n = self.remplies
+        if n:
+            valeurs = self._tampon[:, :n]
+            quantiles = np.percentile(valeurs, PERCENTILES, axis=1)
+            moyennes = valeurs.mean(axis=1)
+            maximums = valeurs.max(axis=1)
+            for i, nom in enumerate(self.etapes + ('total',)):
+                statistiques[nom] = {f"p{p}": round(float(quantiles[j, i]), 3) for j, p in enumerate(PERCENTILES)}
+                statistiques[nom]['moyenne'] = round(float(moyennes[i]), 3)
+                statistiques[nom]['max'] = round(float(maximums[i]), 3)
+        self._cache = statistiques
+        return statistiques
+
+    def dessiner_hud(self, image, x=10, y=None):
+        """Superpose les percentiles par étape en bas à gauche de l'image BGR"""
+        statistiques = self.statistiques()
+        if not statistiques:
+            return image
+        lignes = [f"{'etape':<15}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for nom in self.etapes + ('total',):
+            s = statistiques[nom]
+            if s['max'] > 0:
+                lignes.append(f"{nom:<15}{s['p50']:>7.1f}{s['p95']:>7.1f}{s['p99']:>7.1f}")
+        total = statistiques['total']['moyenne']
+        lignes.append(f"fps ~ {1000 / total:.1f}" if total else "fps ~ -")
+
+        if y is None:
+            y = image.shape[0] - 18 * len(lignes) - 5
+        for ligne in lignes:
+            cv2.putText(image, ligne, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (0, 0, 0), 3)
+            cv2.putText(image, ligne, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1)
+            y += 18
+        return image
+
+    def exporter(self, chemin):
+        """Écrit les statistiques en JSON ou en CSV selon l'extension du fichier"""
+        self._cache = None
+        statistiques = self.statistiques()
+        if chemin.lower().endswith('.csv'):
+            with open(chemin, 'w', newline='') as f:
+                writer = csv.writer(f)
+                colonnes = [f"p{p}" for p in PERCENTILES] + ['moyenne', 'max']
+                writer.writerow(['etape'] + colonnes)
+                for nom, valeurs in statistiques.items():
+                    writer.writerow([nom] + [valeurs[c] for c in colonnes])
+        else:
+            with open(chemin, 'w') as f:
+                json.dump({'frames': self.frames, 'fenetre': self.remplies, 'etapes': statistiques}, f, indent=2)
+        print(f"Latences exportées vers {chemin}")
+
+    def afficher(self):
+        """Affiche le tableau des percentiles dans la console"""
+        self._cache = None
+        statistiques = self.statistiques()
+        print(f"\n{'Étape':<16} {'p50':>8} {'p95':>8} {'p99':>8} {'moyenne':>8}  (ms, {self.remplies} frames)")
+        for nom, s in statistiques.items():
+            if s['max'] > 0:
+                print(f"{nom:<16} {s['p50']:>8.2f} {s['p95']:>8.2f} {s['p99']:>8.2f} {s['moyenne']:>8.2f}")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lissage temporel des landmarks (filtre One-Euro ou Kalman à vitesse constante)
+Par Dady Akrou Cyrille - Data Scientist
+
+Les landmarks bruts de holistic.process() tremblent d'une frame à l'autre :
+les gestes clignotent et les données exportées sont bruitées. Les filtres
+travaillent sur le tableau (543, 3 ou 4) complet en quelques opérations
+NumPy, sans boucle Python par point (quelques dizaines de µs par frame) :
+- paramètres propres à chaque partie (visage, pose, mains)
+- un filtre est réinitialisé pour une partie dès qu'elle n'est plus détectée
+- seules x, y, z sont lissées ; la visibilité est recopiée telle quelle
+
+Utilisable en direct (une frame à la fois) ou en passe hors ligne sur un
+enregistrement .lmk :
+    python lissage.py capture.lmk capture_lisse.lmk --methode kalman
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from stockage_landmarks import NB_LANDMARKS, TOTAL_LANDMARKS, PARTIES, INDICES_PARTIES
+
+# Coordonnées normalisées (0-1) : vitesses de l'ordre de 0.1 à 2 unités/s
+PARAMETRES_ONE_EURO = {
+    'face': {'frequence_min': 1.0, 'beta': 10.0, 'frequence_derivee': 1.0},
+    'pose': {'frequence_min': 1.0, 'beta': 20.0, 'frequence_derivee': 1.0},
+    'left_hand': {'frequence_min': 1.5, 'beta': 30.0, 'frequence_derivee': 1.0},
+    'right_hand': {'frequence_min': 1.5, 'beta': 30.0, 'frequence_derivee': 1.0},
+}
+
+# bruit_processus : variance de l'accélération ; bruit_mesure : variance de la mesure (~3 px à 640)
+PARAMETRES_KALMAN = {
+    'face': {'bruit_processus': 0.5, 'bruit_mesure': 1e-5},
+    'pose': {'bruit_processus': 1.0, 'bruit_mesure': 1e-5},
+    'left_hand': {'bruit_processus': 2.0, 'bruit_mesure': 1e-5},
+    'right_hand': {'bruit_processus': 2.0, 'bruit_mesure': 1e-5},
+}
+
+# Index de la partie de chaque landmark (543,)
+PARTIE_PAR_POINT = np.repeat(np.arange(len(PARTIES)), [NB_LANDMARKS[p] for p in PARTIES])
+
+
+def _colonne_parametre(parametres, nom):
+    """Valeur d'un paramètre pour chaque landmark, en colonne (543, 1)"""
+    valeurs = np.array([parametres[partie][nom] for partie in PARTIES], dtype=np.float32)
+    return valeurs[PARTIE_PAR_POINT][:, None]
+
+
+class _FiltreTemporel:
+    """Partie commune : pas de temps, réinitialisation par partie, tampon de sortie"""
+
+    def __init__(self, parametres_defaut, parametres=None, fps=30.0):
+        self.parametres = {partie: dict(valeurs) for partie, valeurs in parametres_defaut.items()}
+        for partie, valeurs in (parametres or {}).items():
+            if partie not in self.parametres:
+                raise ValueError(f"Partie inconnue: {partie} (choix: {', '.join(PARTIES)})")
+            self.parametres[partie].update(valeurs)
+        self.fps = fps
+
+        # Points dont l'état est initialisé (partie suivie sans interruption)
+        self._actifs = np.zeros(TOTAL_LANDMARKS, dtype=bool)
+        self._instant = None
+        self.frames = 0
+        self.temps_total = 0.0
+
+    def reinitialiser(self, parties=None):
+        """Oublie l'état des parties données (toutes par défaut)"""
+        if parties is None:
+            self._actifs[:] = False
+            self._instant = None
+            return
+        for partie in parties:
+            self._actifs[INDICES_PARTIES[partie]] = False
+
+    def filtrer(self, landmarks, presence, instant_s=None, sortie=None):
+        """
+        Lisse une frame (543, 3 ou 4) ; renvoie `sortie` (nouveau tableau par défaut)
+        instant_s : horodatage en secondes, sinon frames espacées de 1/fps
+        """
+        debut = time.perf_counter()
+        if sortie is None:
+            sortie = np.empty_like(landmarks)
+        if sortie is not landmarks:
+            sortie[...] = landmarks
+
+        if instant_s is None:
+            instant_s = (self._instant or 0.0) + 1.0 / self.fps
+        dt = instant_s - self._instant if self._instant is not None else 1.0 / self.fps
+        # Horodatages identiques ou en arrière (rejeu, horloge) : pas nominal
+        if dt <= 0:
+            dt = 1.0 / self.fps
+        self._instant = instant_s
+
+        presents = presence[PARTIE_PAR_POINT]
+        # Perte de détection : la partie repart de la mesure à sa réapparition
+        nouveaux = presents & ~self._actifs
+        self._actifs = presents
+        mesures = landmarks[:, :3]
+        if nouveaux.any():
+            self._initialiser(nouveaux, mesures)
+        if presents.any():
+            # Tous les points sont mis à jour sans masque : l'état des parties absentes
+            # devient NaN et sera réinitialisé à leur retour ; leur sortie reste NaN
+            sortie[:, :3] = self._mettre_a_jour(mesures, np.float32(dt))
+
+        self.frames += 1
+        self.temps_total += time.perf_counter() - debut
+        return sortie
+
+    @property
+    def ms_par_frame(self):
+        return 1000 * self.temps_total / self.frames if self.frames else 0.0
+
+
+class FiltreOneEuro(_FiltreTemporel):
+    """Filtre One-Euro (Casiez et al.) : fréquence de coupure adaptée à la vitesse"""
+
+    def __init__(self, parametres=None, fps=30.0):
+        super().__init__(PARAMETRES_ONE_EURO, parametres, fps)
+        self._frequence_min = _colonne_parametre(self.parametres, 'frequence_min')
+        self._beta = _colonne_parametre(self.parametres, 'beta')
+        self._frequence_derivee = _colonne_parametre(self.parametres, 'frequence_derivee')
+        self._position = np.zeros((TOTAL_LANDMARKS, 3), dtype=np.float32)
+        self._derivee = np.zeros((TOTAL_LANDMARKS, 3), dtype=np.float32)
+
+    @staticmethod
+    def _alpha(frequence, dt):
+        return 1.0 / (1.0 + 1.0 / (2 * math.pi * frequence * dt))
+
+    def _initialiser(self, points, mesures):
+        self._position[points] = mesures[points]
+        self._derivee[points] = 0.0
+
+    def _mettre_a_jour(self, mesures, dt):
+        alpha_d = self._alpha(self._frequence_derivee, dt)
+        self._derivee += alpha_d * ((mesures - self._position) / dt - self._derivee)
+        frequence = self._frequence_min + self._beta * np.abs(self._derivee)
+        self._position += self._alpha(frequence, dt) * (mesures - self._position)
+        return self._position
+
+
+class FiltreKalman(_FiltreTemporel):
+    """Kalman à vitesse constante, indépendant pour chaque coordonnée de chaque point"""
+
+    def __init__(self, parametres=None, fps=30.0, variance_initiale=1.0):
+        super().__init__(PARAMETRES_KALMAN, parametres, fps)
+        self._q = _colonne_parametre(self.parametres, 'bruit_processus')
+        self._r = _colonne_parametre(self.parametres, 'bruit_mesure')
+        self.variance_initiale = variance_initiale
+        # État (position, vitesse) et covariance symétrique 2x2 par coordonnée
+        forme = (TOTAL_LANDMARKS, 3)
+        self._position = np.zeros(forme, dtype=np.float32)
+        self._vitesse = np.zeros(forme, dtype=np.float32)
+        self._p00 = np.zeros(forme, dtype=np.float32)
+        self._p01 = np.zeros(forme, dtype=np.float32)
+        self._p11 = np.zeros(forme, dtype=np.float32)
+
+    def _initialiser(self, points, mesures):
+        self._position[points] = mesures[points]
+        self._vitesse[points] = 0.0
+        self._p00[points] = self._r[points]
+        self._p01[points] = 0.0
+        self._p11[points] = self.variance_initiale
+
+    def _mettre_a_jour(self, mesures, dt):
+        # Prédiction : x = F x, P = F P F' + Q (accélération aléatoire de variance q)
+        q = self._q
+        position = self._position + dt * self._vitesse
+        p00 = self._p00 + dt * (2 * self._p01 + dt * self._p11) + q * dt ** 4 / 4
+        p01 = self._p01 + dt * self._p11 + q * dt ** 3 / 2
+        p11 = self._p11 + q * dt ** 2
+
+        # Correction par la mesure de position
+        innovation = mesures - position
+        inverse = 1 / (p00 + self._r)
+        gain0 = p00 * inverse
+        gain1 = p01 * inverse
+        self._position = position + gain0 * innovation
+        self._vitesse += gain1 * innovation
+        self._p00 = (1 - gain0) * p00
+        self._p01 = (1 - gain0) * p01
+        self._p11 = p11 - gain1 * p01
+        return self._position
+
+
+FILTRES = {'one_euro': FiltreOneEuro, 'kalman': FiltreKalman}
+
+
+def creer_filtre(methode='one_euro', parametres=None, fps=30.0):
+    """Filtre 'one_euro' ou 'kalman' ; parametres : {partie: {nom: valeur}}"""
+    if methode not in FILTRES:
+        raise ValueError(f"Méthode de lissage inconnue: {methode} (choix: {', '.join(FILTRES)})")
+    return FILTRES[methode](parametres, fps)
+
+
+def lisser_sequence(landmarks, presence, instants_s=None, methode='one_euro', parametres=None, fps=30.0):
+    """Passe hors ligne sur un enregistrement (n, 543, c) ; renvoie une copie lissée"""
+    filtre = creer_filtre(methode, parametres, fps)
+    sortie = np.empty_like(landmarks)
+    for i in range(len(landmarks)):
+        instant = None if instants_s is None else float(instants_s[i])
+        filtre.filtrer(landmarks[i], presence[i], instant, sortie[i])
+    return sortie
+
+
+def lisser_fichier(entree, sortie, methode='one_euro', parametres=None, fps=30.0, horodatage=False):
+    """
+    Lit un .lmk, le lisse et l'écrit dans un nouveau .lmk (mêmes frames et drapeaux)
+    Le pas de temps vient des numéros de frame / fps, ou des horodatages si horodatage=True
+    """
+    from format_binaire import EcrivainLandmarks, LecteurLandmarks
+
+    lecteur = LecteurLandmarks(entree)
+    landmarks, presence, frames, timestamps = lecteur.lire()
+    drapeaux = lecteur.lire_drapeaux()
+    instants = timestamps / 1e9 if horodatage else frames / fps
+    lisses = lisser_sequence(landmarks, presence, instants, methode, parametres, fps)
+
+    with EcrivainLandmarks(sortie, composantes=lecteur.composantes) as ecrivain:
+        for i in range(len(lisses)):
+            ecrivain.ajouter_tableau(lisses[i], presence[i], int(frames[i]), int(timestamps[i]), int(drapeaux[i]))
+    print(f"{len(lisses)} frames lissées ({methode}) écrites dans {sortie}")
+    return lisses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lissage temporel d'un enregistrement de landmarks .lmk")
+    parser.add_argument('entree', help="Enregistrement .lmk")
+    parser.add_argument('sortie', help="Enregistrement lissé (.lmk)")
+    parser.add_argument('--methode', choices=tuple(FILTRES), default='one_euro', help="Filtre temporel")
+    parser.add_argument('--fps', type=float, default=30.0, help="Cadence de la capture")
+    parser.add_argument('--horodatage', action='store_true',
+                        help="Pas de temps tiré des horodatages plutôt que des numéros de frame")
+    args = parser.parse_args()
+    lisser_fichier(args.entree, args.sortie, args.methode, fps=args.fps, horodatage=args.horodatage)
+
+
+if __name__ == "__main__":
+    main()
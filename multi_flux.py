@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur multi-caméras : plusieurs sessions Holistic dans un seul processus
+Par Dady Akrou Cyrille - Data Scientist
+
+Au lieu d'un processus detection_pose_holistic.py par caméra :
+- un thread de capture par source (webcam, fichier vidéo, URL)
+- un modèle Holistic par flux (le suivi temporel est propre à chaque flux)
+- un pool de travailleurs dimensionné sur les cœurs ; holistic.process()
+  s'exécute dans le graphe C++ de MediaPipe, les threads avancent en parallèle
+- ordonnancement équitable : un flux prêt passe en fin de file après chaque
+  inférence, aucun flux ne peut monopoliser les travailleurs
+- publication des résultats par abonnement (rappels) ou consultation du dernier
+  résultat de chaque flux
+
+Des fichiers vidéo locaux peuvent remplacer les caméras (temps_reel=True
+respecte leur cadence d'origine).
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from stockage_landmarks import TOTAL_LANDMARKS, PARTIES, extraire_landmarks
+from pipeline import FileEtape, StatistiquesEtape, FIN_FLUX
+from instrumentation import MesureLatences
+
+mp_holistic = mp.solutions.holistic
+
+# Résultat publié pour chaque frame traitée d'un flux
+ResultatFlux = namedtuple('ResultatFlux', ['flux', 'numero', 'timestamp_ns', 'landmarks', 'presence', 'results'])
+
+
+class Flux:
+    """Une source, sa file de frames, son modèle Holistic et ses statistiques"""
+
+    def __init__(self, identifiant, source, temps_reel=False, taille_file=4):
+        self.identifiant = identifiant
+        self.source = int(source) if isinstance(source, str) and source.isdigit() else source
+        self.temps_reel = temps_reel
+        # Une caméra (ou un fichier rejoué en temps réel) ne doit pas accumuler de retard
+        direct = temps_reel or isinstance(self.source, int)
+        self.file = FileEtape(1 if direct else taille_file, 'dernier' if direct else 'bloquer')
+
+        self.holistic = None
+        self.planifie = False
+        self.termine = False
+        self.dernier = None
+
+        self.stats = StatistiquesEtape(identifiant)
+        self.latences = MesureLatences(etapes=('attente', 'inference'))
+
+    def resume(self):
+        resume = self.stats.resume()
+        resume['frames_jetees'] = self.file.frames_jetees
+        latences = self.latences.statistiques()
+        for etape in ('attente', 'inference', 'total'):
+            if etape in latences:
+                resume[f'{etape}_p50_ms'] = latences[etape]['p50']
+                resume[f'{etape}_p95_ms'] = latences[etape]['p95']
+        return resume
+
+
+class ServeurMultiFlux:
+    """Exécute une session Holistic par flux sur un pool de travailleurs partagé"""
+
+    def __init__(self, sources, travailleurs=None, temps_reel=False, taille_file=4,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        self.flux = {}
+        for i, source in enumerate(sources):
+            identifiant = f"flux_{i}"
+            self.flux[identifiant] = Flux(identifiant, source, temps_reel, taille_file)
+        # Un flux n'est traité que par un travailleur à la fois : inutile d'en avoir plus que de flux
+        self.nb_travailleurs = min(travailleurs or os.cpu_count() or 1, len(self.flux))
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+
+        self.prets = queue.Queue()
+        self.verrou = threading.Lock()
+        self.arret = threading.Event()
+        self.abonnes = []
+        self.threads = []
+        self.debut = None
+
+    def abonner(self, rappel):
+        """rappel(ResultatFlux) est appelé depuis un thread travailleur pour chaque frame"""
+        self.abonnes.append(rappel)
+
+    def dernier_resultat(self, identifiant):
+        return self.flux[identifiant].dernier
+
+    def _signaler(self, flux):
+        """Place le flux dans la file des flux prêts s'il n'y est pas déjà"""
+        with self.verrou:
+            if not flux.planifie:
+                flux.planifie = True
+                self.prets.put(flux)
+
+    def _capturer(self, flux):
+        cap = cv2.VideoCapture(flux.source)
+        intervalle = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30) if flux.temps_reel else 0.0
+        prochaine = time.perf_counter()
+        numero = 0
+        try:
+            while not self.arret.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                numero += 1
+                flux.file.deposer((numero, time.perf_counter(), frame), self.arret)
+                self._signaler(flux)
+                if intervalle:
+                    prochaine += intervalle
+                    attente = prochaine - time.perf_counter()
+                    if attente > 0:
+                        time.sleep(attente)
+        finally:
+            cap.release()
+            flux.file.deposer(FIN_FLUX, self.arret)
+            self._signaler(flux)
+
+    def _travailler(self):
+        while True:
+            flux = self.prets.get()
+            if flux is None:
+                break
+            try:
+                element = flux.file.file.get_nowait()
+            except queue.Empty:
+                element = None
+            if element is FIN_FLUX:
+                self._terminer(flux)
+                continue
+            if element is not None:
+                self._inferer(flux, element)
+
+            # Fin de tour : le flux repasse en fin de file s'il reste des frames
+            with self.verrou:
+                if flux.file.file.empty():
+                    flux.planifie = False
+                else:
+                    self.prets.put(flux)
+
+    def _inferer(self, flux, element):
+        numero, capture, frame = element
+        debut = time.perf_counter()
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = flux.holistic.process(image)
+        fin = time.perf_counter()
+        flux.stats.enregistrer(fin - debut)
+        flux.latences.enregistrer({'attente': 1000 * (debut - capture), 'inference': 1000 * (fin - debut)})
+
+        landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+        presence = np.zeros(len(PARTIES), dtype=bool)
+        extraire_landmarks(results, landmarks, presence)
+        resultat = ResultatFlux(flux.identifiant, numero, time.time_ns(), landmarks, presence, results)
+        flux.dernier = resultat
+        for rappel in self.abonnes:
+            rappel(resultat)
+
+    def _terminer(self, flux):
+        flux.termine = True
+        flux.holistic.close()
+        with self.verrou:
+            flux.planifie = False
+            tous_termines = all(f.termine for f in self.flux.values())
+        if tous_termines:
+            for _ in range(self.nb_travailleurs):
+                self.prets.put(None)
+
+    def demarrer(self):
+        for flux in self.flux.values():
+            flux.holistic = mp_holistic.Holistic(
+                min_detection_confidence=self.min_detection_confidence,
+                min_tracking_confidence=self.min_tracking_confidence
+            )
+        self.debut = time.perf_counter()
+        for i in range(self.nb_travailleurs):
+            self.threads.append(threading.Thread(target=self._travailler, name=f'travailleur_{i}', daemon=True))
+        for flux in self.flux.values():
+            self.threads.append(threading.Thread(target=self._capturer, args=(flux,),
+                                                 name=f'capture_{flux.identifiant}', daemon=True))
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def attendre(self, delai=None):
+        """Attend la fin de toutes les sources ; renvoie False si le délai expire"""
+        limite = None if delai is None else time.perf_counter() + delai
+        for thread in self.threads:
+            restant = None if limite is None else max(0.0, limite - time.perf_counter())
+            thread.join(restant)
+            if thread.is_alive():
+                return False
+        return True
+
+    def arreter(self):
+        """Interrompt les captures puis laisse les travailleurs finir les frames en file"""
+        self.arret.set()
+        # Avec la politique 'bloquer', le marqueur de fin n'est pas déposé après l'arrêt
+        for thread in self.threads[self.nb_travailleurs:]:
+            thread.join()
+        for _ in range(self.nb_travailleurs):
+            self.prets.put(None)
+        for thread in self.threads[:self.nb_travailleurs]:
+            thread.join()
+        for flux in self.flux.values():
+            if not flux.termine:
+                flux.termine = True
+                flux.holistic.close()
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
+
+    def rapport(self):
+        duree = time.perf_counter() - self.debut if self.debut else 0.0
+        flux = [f.resume() for f in self.flux.values()]
+        total = sum(f['frames'] for f in flux)
+        return {
+            'duree_s': round(duree, 3),
+            'travailleurs': self.nb_travailleurs,
+            'fps_global': round(total / duree, 2) if duree > 0 else 0.0,
+            'flux': flux,
+        }
+
+
+def afficher_rapport(rapport):
+    """Affiche le débit et la latence de chaque flux"""
+    print("=== Serveur multi-flux ===")
+    print(f"Durée: {rapport['duree_s']} s - {rapport['travailleurs']} travailleurs - "
+          f"FPS global: {rapport['fps_global']}")
+    for flux in rapport['flux']:
+        print(f"  {flux['etape']:<8} {flux['frames']:>6} frames  {flux['fps']:>7.2f} fps  "
+              f"inférence p50 {flux.get('inference_p50_ms', 0):>6.1f} ms  "
+              f"attente p95 {flux.get('attente_p95_ms', 0):>6.1f} ms  "
+              f"jetées {flux['frames_jetees']}")
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Détection holistique sur plusieurs flux en parallèle")
+    parser.add_argument('sources', nargs='+', help="Index de webcam, fichiers vidéo ou URL")
+    parser.add_argument('--travailleurs', type=int, default=None, help="Taille du pool (défaut: nombre de cœurs)")
+    parser.add_argument('--temps-reel', action='store_true', help="Rejoue les fichiers à leur cadence d'origine")
+    parser.add_argument('--intervalle', type=float, default=2.0, help="Période d'affichage du rapport (s)")
+    args = parser.parse_args()
+
+    serveur = ServeurMultiFlux(args.sources, travailleurs=args.travailleurs, temps_reel=args.temps_reel)
+    serveur.demarrer()
+    try:
+        while not serveur.attendre(args.intervalle):
+            afficher_rapport(serveur.rapport())
+    except KeyboardInterrupt:
+        serveur.arreter()
+    afficher_rapport(serveur.rapport())
+
+
+if __name__ == "__main__":
+    main()
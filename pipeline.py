@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mode pipeline pour la détection de pose holistique
+Par Dady Akrou Cyrille - Data Scientist
+
+La capture, l'inférence MediaPipe et le rendu (dessin + affichage ou
+encodage) tournent chacun dans leur propre étape, reliées par des files
+bornées. Le débit global est alors limité par l'étape la plus lente et non
+plus par la somme des étapes.
+
+Politiques de file disponibles :
+- 'dernier' : on garde la frame la plus récente (les anciennes sont jetées)
+- 'bloquer' : l'étape précédente attend qu'une place se libère
+"""
+
+import queue
+import threading
+import time
+
+import cv2
+
+from detection_pose_holistic import dessiner_landmarks
+from roi import RecadrageROI
+from rendu import RenduLandmarks
+from sessions import POOL_SESSIONS
+
+POLITIQUES = ('dernier', 'bloquer')
+
+# Marqueur de fin de flux transmis d'une étape à l'autre
+FIN_FLUX = None
+
+
+class FileEtape:
+    """File bornée entre deux étapes avec politique de débordement"""
+
+    def __init__(self, taille=2, politique='dernier'):
+        if politique not in POLITIQUES:
+            raise ValueError(f"Politique inconnue: {politique} (choix: {', '.join(POLITIQUES)})")
+        self.file = queue.Queue(maxsize=taille)
+        self.politique = politique
+        self.frames_jetees = 0
+
+    def deposer(self, element, arret):
+        """Dépose un élément en respectant la politique de la file"""
+        if self.politique == 'bloquer':
+            while not arret.is_set():
+                try:
+                    self.file.put(element, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+
+        # Politique 'dernier' : on libère de la place en jetant la plus ancienne
+        while True:
+            try:
+                self.file.put_nowait(element)
+                return
+            except queue.Full:
+                try:
+                    self.file.get_nowait()
+                    self.frames_jetees += 1
+                except queue.Empty:
+                    pass
+
+    def retirer(self, arret):
+        """Retire un élément, renvoie FIN_FLUX si le pipeline est arrêté"""
+        while not arret.is_set():
+            try:
+                return self.file.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return FIN_FLUX
+
+
+class StatistiquesEtape:
+    """Compteurs de débit d'une étape du pipeline"""
+
+    def __init__(self, nom):
+        self.nom = nom
+        self.frames = 0
+        self.temps_travail = 0.0
+        self.debut = None
+        self.fin = None
+
+    def enregistrer(self, duree):
+        """Comptabilise une frame traitée en `duree` secondes"""
+        if self.debut is None:
+            self.debut = time.perf_counter() - duree
+        self.fin = time.perf_counter()
+        self.frames += 1
+        self.temps_travail += duree
+
+    @property
+    def fps(self):
+        """Débit réellement observé sur l'étape"""
+        if self.frames == 0 or self.fin is None or self.fin <= self.debut:
+            return 0.0
+        return self.frames / (self.fin - self.debut)
+
+    @property
+    def capacite(self):
+        """Débit maximal si l'étape ne faisait jamais d'attente"""
+        if self.temps_travail <= 0:
+            return 0.0
+        return self.frames / self.temps_travail
+
+    def resume(self):
+        return {
+            'etape': self.nom,
+            'frames': self.frames,
+            'fps': round(self.fps, 2),
+            'capacite_fps': round(self.capacite, 2),
+            'ms_par_frame': round(1000 * self.temps_travail / self.frames, 2) if self.frames else 0.0,
+        }
+
+
+class PipelineHolistique:
+    """Pipeline capture -> inférence -> rendu sur n'importe quelle source cv2.VideoCapture"""
+
+    def __init__(self, source=0, taille_file=2, politique='dernier', afficher=True,
+                 fichier_sortie=None, min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5, mode_roi=False, resolution_max=None,
+                 niveau_rendu=None, mode='holistic'):
+        self.source = source
+        self.mode = mode
+        self.afficher = afficher
+        self.fichier_sortie = fichier_sortie
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.recadrage = None
+        if mode_roi or resolution_max:
+            self.recadrage = RecadrageROI(resolution_max=resolution_max, actif=mode_roi)
+        self.rendu = RenduLandmarks(niveau_rendu) if niveau_rendu else None
+
+        self.file_capture = FileEtape(taille_file, politique)
+        self.file_inference = FileEtape(taille_file, politique)
+        self.arret = threading.Event()
+        # Première exception levée par une étape, relevée par executer() dans le thread principal
+        self.erreur = None
+        self.etape_en_erreur = None
+
+        self.stats = {
+            'capture': StatistiquesEtape('capture'),
+            'inference': StatistiquesEtape('inference'),
+            'rendu': StatistiquesEtape('rendu'),
+        }
+
+    def _etape_capture(self, cap):
+        """Lit les frames de la source et les pousse vers l'inférence"""
+        numero = 0
+        try:
+            while not self.arret.is_set():
+                debut = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.stats['capture'].enregistrer(time.perf_counter() - debut)
+                numero += 1
+                self.file_capture.deposer((numero, frame), self.arret)
+        except Exception as exc:
+            self._signaler_erreur('capture', exc)
+        finally:
+            self.file_capture.deposer(FIN_FLUX, self.arret)
+
+    def _etape_inference(self):
+        """Convertit en RGB et exécute le modèle holistique"""
+        try:
+            with POOL_SESSIONS.session(
+                mode=self.mode,
+                min_detection_confidence=self.min_detection_confidence,
+                min_tracking_confidence=self.min_tracking_confidence
+            ) as holistic:
+                while True:
+                    element = self.file_capture.retirer(self.arret)
+                    if element is FIN_FLUX:
+                        break
+                    numero, frame = element
+
+                    debut = time.perf_counter()
+                    image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    if self.recadrage:
+                        results = self.recadrage.traiter(holistic, image)
+                    else:
+                        results = holistic.process(image)
+                    self.stats['inference'].enregistrer(time.perf_counter() - debut)
+
+                    self.file_inference.deposer((numero, frame, results), self.arret)
+        except Exception as exc:
+            self._signaler_erreur('inference', exc)
+        finally:
+            self.file_inference.deposer(FIN_FLUX, self.arret)
+
+    def _signaler_erreur(self, etape, exc):
+        """Conserve l'exception d'une étape et arrête le pipeline (pas de fin de flux silencieuse)"""
+        if self.erreur is None:
+            self.erreur = exc
+            self.etape_en_erreur = etape
+        self.arret.set()
+
+    def _etape_rendu(self, writer):
+        """Dessine les landmarks puis affiche et/ou encode la frame"""
+        while True:
+            element = self.file_inference.retirer(self.arret)
+            if element is FIN_FLUX:
+                break
+            numero, frame, results = element
+
+            debut = time.perf_counter()
+            if self.rendu:
+                self.rendu.dessiner_resultats(frame, results)
+            else:
+                dessiner_landmarks(frame, results)
+            if writer is not None:
+                writer.write(frame)
+            if self.afficher:
+                cv2.imshow('Détection de Pose Holistique - Pipeline', frame)
+            self.stats['rendu'].enregistrer(time.perf_counter() - debut)
+
+            # HighGUI doit rester sur le thread principal
+            if self.afficher and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+    def executer(self):
+        """
+        Lance le pipeline et renvoie le rapport de débit par étape
+        Une exception levée dans la capture ou l'inférence est relevée ici
+        """
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            print(f"Erreur: Impossible d'ouvrir la source {self.source}")
+            return None
+
+        writer = None
+        if self.fichier_sortie:
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fps = cap.get(cv2.CAP_PROP_FPS) or 20
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            writer = cv2.VideoWriter(self.fichier_sortie, fourcc, fps, (width, height))
+
+        threads = [
+            threading.Thread(target=self._etape_capture, args=(cap,), name='capture', daemon=True),
+            threading.Thread(target=self._etape_inference, name='inference', daemon=True),
+        ]
+        debut = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._etape_rendu(writer)
+        finally:
+            self.arret.set()
+            for thread in threads:
+                thread.join()
+            cap.release()
+            if writer is not None:
+                writer.release()
+            if self.afficher:
+                cv2.destroyAllWindows()
+
+        if self.erreur is not None:
+            print(f"Erreur dans l'étape {self.etape_en_erreur} du pipeline: {self.erreur}")
+            raise self.erreur
+        return self.rapport(time.perf_counter() - debut)
+
+    def rapport(self, duree_totale):
+        """Construit le rapport de débit et identifie le goulot d'étranglement"""
+        etapes = [stat.resume() for stat in self.stats.values()]
+        goulot = min(etapes, key=lambda e: e['capacite_fps'] or float('inf'))
+        return {
+            'duree_s': round(duree_totale, 3),
+            'fps_global': round(self.stats['rendu'].frames / duree_totale, 2) if duree_totale > 0 else 0.0,
+            'politique': self.file_capture.politique,
+            'frames_jetees': {
+                'capture->inference': self.file_capture.frames_jetees,
+                'inference->rendu': self.file_inference.frames_jetees,
+            },
+            'etapes': etapes,
+            'goulot': goulot['etape'],
+        }
+
+
+def afficher_rapport(rapport):
+    """Affiche le rapport de débit par étape"""
+    if rapport is None:
+        return
+    print("=== Débit du pipeline ===")
+    print(f"Durée: {rapport['duree_s']} s - FPS global: {rapport['fps_global']} "
+          f"(politique '{rapport['politique']}')")
+    for etape in rapport['etapes']:
+        print(f"  {etape['etape']:<10} {etape['frames']:>6} frames  "
+              f"{etape['fps']:>7.2f} fps  capacité {etape['capacite_fps']:>7.2f} fps  "
+              f"{etape['ms_par_frame']:>6.2f} ms/frame")
+    for lien, nombre in rapport['frames_jetees'].items():
+        print(f"  Frames jetées {lien}: {nombre}")
+    print(f"Goulot d'étranglement: {rapport['goulot']}")
+    print("=" * 50)
+
+
+def detection_pipeline(source=0, taille_file=2, politique='dernier', afficher=True,
+                       fichier_sortie=None, mode_roi=False, resolution_max=None,
+                       niveau_rendu=None, mode='holistic'):
+    """
+    Lance la détection holistique en mode pipeline et affiche le rapport
+    La source peut être un index de webcam ou un chemin de fichier vidéo
+    """
+    pipeline = PipelineHolistique(
+        source=source,
+        taille_file=taille_file,
+        politique=politique,
+        afficher=afficher,
+        fichier_sortie=fichier_sortie,
+        mode_roi=mode_roi,
+        resolution_max=resolution_max,
+        niveau_rendu=niveau_rendu,
+        mode=mode
+    )
+    rapport = pipeline.executer()
+    afficher_rapport(rapport)
+    return rapport
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python pipeline.py [source] [dernier|bloquer]
+    source = sys.argv[1] if len(sys.argv) > 1 else 0
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    politique = sys.argv[2] if len(sys.argv) > 2 else 'dernier'
+    detection_pipeline(source, politique=politique)
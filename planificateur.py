@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planification de l'inférence par images clés et estimation des frames intermédiaires
+Par Dady Akrou Cyrille - Data Scientist
+
+Quand holistic.process() ne suit pas une caméra à 30/60 FPS, le modèle n'est
+exécuté que sur certaines frames (images clés) :
+- toutes les N frames (intervalle fixe)
+- ou de façon adaptative selon un budget de latence par frame
+
+Les frames intermédiaires sont estimées, et chaque frame émise indique si
+elle a été inférée ou estimée. Méthodes d'estimation :
+- 'extrapolation' : vitesse constante entre les deux dernières images clés (en direct)
+- 'flux_optique'  : suivi des landmarks par cv2.calcOpticalFlowPyrLK (en direct)
+- interpolation linéaire entre deux images clés (hors ligne, voir interpoler_video)
+
+Le flux de landmarks exporté garde ainsi la cadence complète de la source.
+"""
+
+import math
+import time
+
+import cv2
+import numpy as np
+
+from roi import ConversionRGB
+from stockage_landmarks import (
+    PARTIES, TOTAL_LANDMARKS, INDICES_PARTIES, DRAPEAU_ESTIMEE,
+    extraire_landmarks, tableau_vers_resultats
+)
+
+METHODES = ('extrapolation', 'flux_optique')
+
+
+class FrameEmise:
+    """Landmarks d'une frame, inférés par le modèle ou estimés"""
+
+    def __init__(self, numero, landmarks, presence, inferee, methode, results=None):
+        self.numero = numero
+        self.landmarks = landmarks
+        self.presence = presence
+        self.inferee = inferee
+        self.methode = methode
+        self._results = results
+
+    @property
+    def drapeaux(self):
+        return 0 if self.inferee else DRAPEAU_ESTIMEE
+
+    @property
+    def results(self):
+        """Résultats au format MediaPipe (reconstruits pour les frames estimées)"""
+        if self._results is None:
+            self._results = tableau_vers_resultats(self.landmarks, self.presence)
+        return self._results
+
+
+class PlanificateurInference:
+    """Décide quand exécuter le modèle et estime les frames intermédiaires"""
+
+    def __init__(self, intervalle=2, budget_ms=None, intervalle_max=8, methode='extrapolation'):
+        if methode not in METHODES:
+            raise ValueError(f"Méthode d'estimation inconnue: {methode} (choix: {', '.join(METHODES)})")
+        self.intervalle = max(1, intervalle)
+        self.budget_ms = budget_ms
+        self.intervalle_max = intervalle_max
+        self.methode = methode
+
+        self.latence_ms = None  # moyenne glissante de la latence d'inférence
+        self.numero = 0
+        self.depuis_cle = 0
+
+        # Deux dernières images clés : (numero, landmarks, presence)
+        self.cle_precedente = None
+        self.cle_courante = None
+
+        # État du flux optique
+        self._gris_precedent = None
+        self._landmarks_courants = np.full((TOTAL_LANDMARKS, 4), np.nan, dtype=np.float32)
+        self._presence_courante = np.zeros(len(PARTIES), dtype=bool)
+        self._conversion = ConversionRGB()
+
+        self.frames_inferees = 0
+        self.frames_estimees = 0
+
+    @property
+    def intervalle_courant(self):
+        """Intervalle fixe, ou déduit du budget de latence par frame"""
+        if self.budget_ms and self.latence_ms:
+            return min(self.intervalle_max, max(1, math.ceil(self.latence_ms / self.budget_ms)))
+        return self.intervalle
+
+    def doit_inferer(self):
+        return self.cle_courante is None or self.depuis_cle >= self.intervalle_courant
+
+    def traiter(self, frame_bgr, inferer):
+        """
+        Traite une frame BGR ; `inferer(image_rgb)` exécute le modèle (holistic.process,
+        RecadrageROI.traiter...). Renvoie une FrameEmise pour chaque frame
+        """
+        self.numero += 1
+        gris = None
+        if self.methode == 'flux_optique':
+            gris = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+
+        if self.doit_inferer():
+            image = self._conversion.convertir(frame_bgr)
+            debut = time.perf_counter()
+            results = inferer(image)
+            latence = 1000 * (time.perf_counter() - debut)
+            self.latence_ms = latence if self.latence_ms is None else 0.8 * self.latence_ms + 0.2 * latence
+
+            landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+            presence = np.zeros(len(PARTIES), dtype=bool)
+            extraire_landmarks(results, landmarks, presence)
+
+            self.cle_precedente = self.cle_courante
+            self.cle_courante = (self.numero, landmarks, presence)
+            self.depuis_cle = 1
+            self._landmarks_courants[:] = landmarks
+            self._presence_courante[:] = presence
+            self._gris_precedent = gris
+            self.frames_inferees += 1
+            return FrameEmise(self.numero, landmarks, presence, True, 'inference', results)
+
+        self.depuis_cle += 1
+        self.frames_estimees += 1
+        if self.methode == 'flux_optique':
+            landmarks = self._estimer_flux_optique(gris)
+        else:
+            landmarks = self._extrapoler()
+        return FrameEmise(self.numero, landmarks, self._presence_courante.copy(), False, self.methode)
+
+    def _extrapoler(self):
+        """Vitesse constante entre les deux dernières images clés"""
+        numero, landmarks, presence = self.cle_courante
+        if self.cle_precedente is None:
+            return landmarks.copy()
+
+        numero_prec, landmarks_prec, presence_prec = self.cle_precedente
+        # On limite l'horizon à un intervalle pour éviter la dérive
+        facteur = min(self.numero - numero, self.intervalle_courant) / (numero - numero_prec)
+        estimes = landmarks.copy()
+        for i, partie in enumerate(PARTIES):
+            if presence[i] and presence_prec[i]:
+                zone = INDICES_PARTIES[partie]
+                estimes[zone, :3] += facteur * (landmarks[zone, :3] - landmarks_prec[zone, :3])
+        return estimes
+
+    def _estimer_flux_optique(self, gris):
+        """Suit les landmarks de la frame précédente par flux optique pyramidal"""
+        landmarks = self._landmarks_courants
+        hauteur, largeur = gris.shape
+        valides = np.isfinite(landmarks[:, 0])
+
+        if self._gris_precedent is not None and valides.any():
+            echelle = np.array([largeur, hauteur], dtype=np.float32)
+            points = (landmarks[valides, :2] * echelle).reshape(-1, 1, 2)
+            suivis, statut, _ = cv2.calcOpticalFlowPyrLK(
+                self._gris_precedent, gris, points, None, winSize=(15, 15), maxLevel=2
+            )
+            ok = statut.ravel() == 1
+            indices = np.flatnonzero(valides)[ok]
+            landmarks[indices, :2] = suivis.reshape(-1, 2)[ok] / echelle
+
+        self._gris_precedent = gris
+        return landmarks.copy()
+
+    def statistiques(self):
+        total = self.frames_inferees + self.frames_estimees
+        return {
+            'frames_inferees': self.frames_inferees,
+            'frames_estimees': self.frames_estimees,
+            'taux_inference': round(self.frames_inferees / total, 3) if total else 0.0,
+            'intervalle_courant': self.intervalle_courant,
+            'latence_inference_ms': round(self.latence_ms, 2) if self.latence_ms else None,
+        }
+
+
+def interpoler_video(cap, inferer, intervalle=3):
+    """
+    Mode hors ligne : inférence toutes les `intervalle` frames et interpolation
+    linéaire entre images clés. Générateur de (frame_bgr, FrameEmise) dans l'ordre
+    des frames, avec un retard d'au plus `intervalle` frames
+    """
+    intervalle = max(1, intervalle)
+    en_attente = []
+    cle_precedente = None
+    numero = 0
+
+    def inferer_frame(frame, numero):
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = inferer(image)
+        landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+        presence = np.zeros(len(PARTIES), dtype=bool)
+        extraire_landmarks(results, landmarks, presence)
+        return FrameEmise(numero, landmarks, presence, True, 'inference', results)
+
+    def emettre_intermediaires(cle_debut, cle_fin):
+        ecart = cle_fin.numero - cle_debut.numero
+        for frame, numero_attente in en_attente:
+            t = (numero_attente - cle_debut.numero) / ecart
+            landmarks = cle_debut.landmarks.copy()
+            presence = cle_debut.presence & cle_fin.presence
+            for i, partie in enumerate(PARTIES):
+                if presence[i]:
+                    zone = INDICES_PARTIES[partie]
+                    landmarks[zone] = (1 - t) * cle_debut.landmarks[zone] + t * cle_fin.landmarks[zone]
+            yield frame, FrameEmise(numero_attente, landmarks, presence, False, 'interpolation')
+
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        numero += 1
+
+        if cle_precedente is None or numero - cle_precedente.numero >= intervalle:
+            cle = inferer_frame(frame, numero)
+            if cle_precedente is not None:
+                yield from emettre_intermediaires(cle_precedente, cle)
+            en_attente = []
+            yield frame, cle
+            cle_precedente = cle
+        else:
+            en_attente.append((frame, numero))
+
+    # Fin de vidéo : la dernière frame devient une image clé pour clore l'interpolation
+    if en_attente:
+        frame, numero_final = en_attente.pop()
+        cle = inferer_frame(frame, numero_final)
+        yield from emettre_intermediaires(cle_precedente, cle)
+        yield frame, cle
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analyse de qualité des enregistrements de landmarks, en lot et sans vidéo
+Par Dady Akrou Cyrille - Data Scientist
+
+Trouver les clips problématiques d'une archive demandait de les rejouer un à
+un. Ce module calcule en un passage NumPy vectorisé sur tout un .lmk :
+- le taux de détection de chaque partie du corps
+- les coupures : suites de frames consécutives sans la partie (nombre, plus
+  longue, liste des plus longues)
+- l'histogramme de visibilité des points de pose (composante visibility de
+  MediaPipe, enregistrée par défaut) et les points les moins visibles
+- les pires segments : fenêtres glissantes de score moyen le plus bas
+  (score d'une frame = moyenne des parties détectées au moins une fois dans
+  l'enregistrement, la pose comptant pour sa visibilité moyenne)
+
+Pour une archive, une ligne de synthèse par fichier, triée du pire au meilleur.
+Seules la présence et la pose sont lues (visage et mains restent sur le disque).
+
+    python qualite.py capture.lmk
+    python qualite.py archive/ --csv qualite.csv --processus 4
+"""
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from stockage_landmarks import PARTIES
+from format_binaire import LecteurLandmarks
+from caracteristiques import POSE
+
+INDEX_POSE = PARTIES.index('pose')
+NOMS_POINTS_POSE = {indice: nom for nom, indice in POSE.items()}
+
+
+def taux_detection(presence):
+    """Fraction des frames où chaque partie est détectée"""
+    if not len(presence):
+        return {partie: 0.0 for partie in PARTIES}
+    return dict(zip(PARTIES, presence.mean(axis=0).round(4).tolist()))
+
+
+def coupures(absent, frames):
+    """Suites de frames consécutives où `absent` est vrai : (frame de début, frame de fin, longueur)"""
+    bords = np.diff(np.concatenate(([0], absent.astype(np.int8), [0])))
+    debuts = np.flatnonzero(bords == 1)
+    fins = np.flatnonzero(bords == -1)
+    if not len(debuts):
+        return np.zeros((0, 3), dtype=np.int64)
+    return np.column_stack((frames[debuts], frames[fins - 1], fins - debuts))
+
+
+def visibilite_pose(pose, presence):
+    """Visibilité (frames, 33) des points de pose, NaN quand la pose est absente ou non enregistrée"""
+    if pose.shape[-1] < 4:
+        return np.full(pose.shape[:2], np.nan, dtype=np.float32)
+    visibilite = np.array(pose[..., 3], dtype=np.float32)
+    visibilite[~presence[:, INDEX_POSE]] = np.nan
+    return visibilite
+
+
+def score_frames(presence, visibilite, parties=None):
+    """
+    Score de qualité par frame dans [0, 1] : moyenne sur `parties` (par défaut celles
+    détectées au moins une fois) de la présence, ou de la visibilité moyenne pour la pose
+    """
+    if parties is None:
+        parties = [partie for i, partie in enumerate(PARTIES) if presence[:, i].any()] or list(PARTIES)
+    termes = presence[:, [PARTIES.index(partie) for partie in parties]].astype(np.float32)
+    if 'pose' in parties and not np.isnan(visibilite).all():
+        # Frames sans pose : 0 ; frame sans visibilité enregistrée : sa présence
+        detectee = presence[:, INDEX_POSE]
+        termes[detectee, parties.index('pose')] = np.nan_to_num(visibilite[detectee].mean(axis=1), nan=1.0)
+    return termes.mean(axis=1)
+
+
+def pires_segments(score, frames, taille=30, nombre=5):
+    """Fenêtres de `taille` frames, sans chevauchement, de score moyen le plus bas"""
+    if not len(score):
+        return []
+    taille = max(1, min(taille, len(score)))
+    cumul = np.concatenate(([0.0], np.cumsum(score, dtype=np.float64)))
+    moyennes = (cumul[taille:] - cumul[:-taille]) / taille
+
+    segments = []
+    libre = np.ones(len(moyennes), dtype=bool)
+    for debut in np.argsort(moyennes, kind='stable').tolist():
+        if len(segments) == nombre:
+            break
+        if not libre[debut]:
+            continue
+        segments.append({'frame_debut': int(frames[debut]), 'frame_fin': int(frames[debut + taille - 1]),
+                         'score': round(float(moyennes[debut]), 4)})
+        # Les fenêtres qui chevauchent celle-ci sont écartées
+        libre[max(0, debut - taille + 1):debut + taille] = False
+    return segments
+
+
+def analyser_qualite(pose, presence, frames, fps=30.0, duree_segment_s=1.0, nombre_segments=5,
+                     nombre_coupures=5, classes=10, drapeaux=None):
+    """
+    Rapport de qualité d'un enregistrement
+    pose : landmarks de pose (frames, 33, 3 ou 4), presence (frames, 4), frames (frames,)
+    """
+    frames = np.asarray(frames)
+    presence = np.asarray(presence, dtype=bool)
+    visibilite = visibilite_pose(pose, presence)
+    score = score_frames(presence, visibilite)
+
+    rapport_coupures = {}
+    for i, partie in enumerate(PARTIES):
+        suites = coupures(~presence[:, i], frames)
+        plus_longues = suites[np.argsort(-suites[:, 2], kind='stable')[:nombre_coupures]]
+        rapport_coupures[partie] = {
+            'nombre': len(suites),
+            'plus_longue': int(suites[:, 2].max()) if len(suites) else 0,
+            'plus_longues': [tuple(suite) for suite in plus_longues.tolist()],
+        }
+
+    rapport = {
+        'frames': len(frames),
+        'duree_s': round(len(frames) / fps, 2),
+        'frames_estimees': int(np.count_nonzero(drapeaux)) if drapeaux is not None else 0,
+        'taux_detection': taux_detection(presence),
+        'coupures': rapport_coupures,
+        'score_moyen': round(float(score.mean()), 4) if len(score) else 0.0,
+        'pires_segments': pires_segments(score, frames, round(duree_segment_s * fps), nombre_segments),
+        'visibilite': None,
+    }
+
+    valeurs = visibilite[presence[:, INDEX_POSE]]
+    valides = valeurs[~np.isnan(valeurs)]
+    if len(valides):
+        comptes, bornes = np.histogram(valides, bins=classes, range=(0.0, 1.0))
+        moyennes = np.nanmean(valeurs, axis=0)
+        ordre = np.argsort(moyennes)[:5]
+        rapport['visibilite'] = {
+            'moyenne': round(float(valides.mean()), 4),
+            'histogramme': comptes.tolist(),
+            'bornes': bornes.round(2).tolist(),
+            'moins_visibles': [(NOMS_POINTS_POSE.get(i, f"pose_{i}"), round(float(moyennes[i]), 4))
+                               for i in ordre.tolist()],
+        }
+    return rapport
+
+
+def analyser_fichier(chemin, fps=30.0, duree_segment_s=1.0, nombre_segments=5):
+    """Rapport de qualité d'un .lmk ; seules la pose, la présence et les drapeaux sont lus"""
+    lecteur = LecteurLandmarks(chemin)
+    pose, presence, frames, _ = lecteur.lire(partie='pose')
+    drapeaux = lecteur.lire_drapeaux()
+    rapport = analyser_qualite(pose, presence, frames, fps, duree_segment_s, nombre_segments,
+                               drapeaux=drapeaux)
+    rapport['chemin'] = chemin
+    return rapport
+
+
+def lister_enregistrements(entrees):
+    """Fichiers .lmk donnés directement ou contenus dans des dossiers (récursif)"""
+    chemins = []
+    for entree in entrees:
+        if os.path.isdir(entree):
+            for dossier, _, fichiers in os.walk(entree):
+                chemins.extend(os.path.join(dossier, f) for f in sorted(fichiers) if f.lower().endswith('.lmk'))
+        else:
+            chemins.append(entree)
+    return chemins
+
+
+def synthese(rapport):
+    """Ligne de synthèse d'un rapport (pour le classement d'une archive)"""
+    ligne = {'chemin': rapport['chemin'], 'frames': rapport['frames'], 'score_moyen': rapport['score_moyen']}
+    for partie in PARTIES:
+        ligne[f'taux_{partie}'] = rapport['taux_detection'][partie]
+        ligne[f'coupure_max_{partie}'] = rapport['coupures'][partie]['plus_longue']
+    ligne['visibilite_pose'] = rapport['visibilite']['moyenne'] if rapport['visibilite'] else ''
+    pire = rapport['pires_segments'][0] if rapport['pires_segments'] else None
+    ligne['pire_segment'] = f"{pire['frame_debut']}-{pire['frame_fin']}" if pire else ''
+    ligne['pire_score'] = pire['score'] if pire else ''
+    return ligne
+
+
+def analyser_archive(entrees, sortie_csv=None, processus=None, fps=30.0, duree_segment_s=1.0):
+    """Analyse tous les .lmk d'une archive ; renvoie les synthèses triées du pire au meilleur"""
+    chemins = lister_enregistrements(entrees)
+    debut = time.perf_counter()
+    if processus and processus > 1 and len(chemins) > 1:
+        with ProcessPoolExecutor(max_workers=processus) as executeur:
+            rapports = list(executeur.map(analyser_fichier, chemins, [fps] * len(chemins),
+                                          [duree_segment_s] * len(chemins)))
+    else:
+        rapports = [analyser_fichier(chemin, fps, duree_segment_s) for chemin in chemins]
+    lignes = sorted((synthese(rapport) for rapport in rapports), key=lambda ligne: ligne['score_moyen'])
+    duree = time.perf_counter() - debut
+
+    if sortie_csv:
+        with open(sortie_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(lignes[0]) if lignes else ['chemin'])
+            writer.writeheader()
+            writer.writerows(lignes)
+        print(f"Synthèse écrite dans {sortie_csv}")
+    frames = sum(ligne['frames'] for ligne in lignes)
+    print(f"{len(lignes)} enregistrements ({frames} frames) analysés en {duree:.3f} s")
+    return lignes
+
+
+def afficher_rapport(rapport):
+    """Affiche le rapport de qualité d'un enregistrement"""
+    print(f"=== Qualité de {rapport.get('chemin', 'l’enregistrement')} ===")
+    print(f"Frames: {rapport['frames']} ({rapport['duree_s']} s, {rapport['frames_estimees']} estimées)")
+    print(f"Score moyen: {rapport['score_moyen']:.3f}")
+    for partie in PARTIES:
+        coupures_partie = rapport['coupures'][partie]
+        print(f"  {partie:<11} détectée {100 * rapport['taux_detection'][partie]:5.1f} %  "
+              f"{coupures_partie['nombre']} coupure(s), la plus longue {coupures_partie['plus_longue']} frames")
+    visibilite = rapport['visibilite']
+    if visibilite:
+        print(f"Visibilité moyenne de la pose: {visibilite['moyenne']:.3f}")
+        total = max(1, sum(visibilite['histogramme']))
+        for i, compte in enumerate(visibilite['histogramme']):
+            barre = '#' * round(40 * compte / total)
+            print(f"  {visibilite['bornes'][i]:.1f}-{visibilite['bornes'][i + 1]:.1f} {barre}")
+        print("Points les moins visibles: " + ", ".join(f"{nom} ({valeur:.2f})"
+                                                        for nom, valeur in visibilite['moins_visibles']))
+    else:
+        print("Visibilité non enregistrée (fichier à 3 composantes)")
+    print("Pires segments:")
+    for segment in rapport['pires_segments']:
+        print(f"  frames {segment['frame_debut']}-{segment['frame_fin']}: score {segment['score']:.3f}")
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse de qualité d'enregistrements .lmk")
+    parser.add_argument('entrees', nargs='+', help="Fichiers .lmk ou dossiers d'archive")
+    parser.add_argument('--csv', default=None, help="Synthèse par fichier (archive)")
+    parser.add_argument('--fps', type=float, default=30.0, help="Cadence de la capture")
+    parser.add_argument('--segment', type=float, default=1.0, help="Durée des segments en secondes")
+    parser.add_argument('--pires', type=int, default=5, help="Nombre de pires segments affichés")
+    parser.add_argument('--processus', type=int, default=None, help="Processus parallèles (archive)")
+    args = parser.parse_args()
+
+    chemins = lister_enregistrements(args.entrees)
+    if len(chemins) == 1 and not args.csv:
+        afficher_rapport(analyser_fichier(chemins[0], args.fps, args.segment, args.pires))
+        return
+    for ligne in analyser_archive(chemins, args.csv, args.processus, args.fps, args.segment)[:10]:
+        print(f"  {ligne['score_moyen']:.3f}  {ligne['chemin']}  (pire segment {ligne['pire_segment']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rejeu hors ligne d'un enregistrement de landmarks, sans inférence
+Par Dady Akrou Cyrille - Data Scientist
+
+Changer une couleur de dessin ou ajouter un geste ne demande pas de
+relancer holistic.process() : les landmarks enregistrés (.lmk) suffisent.
+- re-rendu : dessins, libellés de gestes et texte du HUD sont redessinés
+  sur la vidéo source (enregistrement brut) à la vitesse de l'encodeur
+- ré-analyse : gestes et caractéristiques recalculés en lot sur les seuls
+  landmarks, sans vidéo ni modèle chargé
+- le .lmk est lu bloc par bloc (projection mémoire) au fil de la vidéo : la
+  mémoire ne dépend pas de la durée de l'enregistrement
+
+    python rejeu.py capture.lmk --video capture_brut.mp4 --sortie annotee.mp4
+    python rejeu.py capture.lmk --video capture_brut.mp4 --sortie annotee.mp4 --couleur pose=255,0,255
+    python rejeu.py capture.lmk --gestes gestes.csv --caracteristiques caracteristiques.csv
+
+La frame n (à partir de 1) de la vidéo correspond à la ligne de numéro de
+frame n du .lmk, comme l'écrivent l'enregistrement brut de la démo avancée
+et hors_ligne.py ; une frame sans ligne est recopiée sans dessin.
+"""
+
+import argparse
+import copy
+import csv
+import time
+
+import cv2
+import numpy as np
+
+from stockage_landmarks import INDICES_PARTIES, DRAPEAU_ESTIMEE
+from format_binaire import LecteurLandmarks
+from gestes import MoteurGestes
+from caracteristiques import MoteurCaracteristiques, exporter_caracteristiques_csv
+
+LIBELLES_MAINS = ("Main gauche", "Main droite")
+# Lignes précédentes relues pour les vitesses et accélérations en début de fenêtre
+RECOUVREMENT_CARACTERISTIQUES = 2
+
+
+def classifier_gestes(landmarks, moteur_gestes=None):
+    """Geste de chaque main pour un enregistrement (N, 543, c) -> liste de (gauche, droite)"""
+    moteur_gestes = moteur_gestes or MoteurGestes()
+    n = len(landmarks)
+    # Les deux mains de toutes les frames en un seul appel (2N, 21, 3)
+    mains = np.stack([landmarks[:, INDICES_PARTIES['left_hand'], :3],
+                      landmarks[:, INDICES_PARTIES['right_hand'], :3]], axis=1).reshape(2 * n, 21, 3)
+    noms = moteur_gestes.classifier(mains) if n else []
+    return list(zip(noms[0::2], noms[1::2]))
+
+
+def fenetres_analyse(lecteur, fps=30.0, moteur_gestes=None, moteur_caracteristiques=None):
+    """
+    Parcourt un .lmk bloc par bloc : (landmarks, presence, frames, drapeaux, gestes, caracteristiques)
+    caracteristiques vaut None sans moteur_caracteristiques
+    """
+    moteur_gestes = moteur_gestes or MoteurGestes()
+    for ligne, n, _ in lecteur.blocs:
+        landmarks, presence, frames, _ = lecteur.lire(ligne, ligne + n)
+        drapeaux = lecteur.lire_drapeaux(ligne, ligne + n)
+        gestes = classifier_gestes(landmarks, moteur_gestes)
+        caracteristiques = None
+        if moteur_caracteristiques is not None:
+            # Quelques lignes du bloc précédent : mêmes valeurs qu'un calcul sur tout le fichier
+            debut = max(0, ligne - RECOUVREMENT_CARACTERISTIQUES)
+            etendus, presence_etendue, frames_etendues, _ = lecteur.lire(debut, ligne + n)
+            caracteristiques = moteur_caracteristiques.calculer_lot(
+                etendus, presence_etendue, frames_etendues / fps)[ligne - debut:]
+        yield landmarks, presence, frames, drapeaux, gestes, caracteristiques
+
+
+def exporter_gestes_csv(frames, gestes, chemin):
+    """Une ligne par frame : numéro de frame, geste de la main gauche, geste de la main droite"""
+    with open(chemin, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['frame', 'main_gauche', 'main_droite'])
+        for frame, (gauche, droite) in zip(np.asarray(frames).tolist(), gestes):
+            writer.writerow([frame, gauche or '', droite or ''])
+
+
+def analyser_enregistrement(chemin_lmk, sortie_gestes=None, sortie_caracteristiques=None, fps=30.0,
+                            moteur_gestes=None, moteur_caracteristiques=None):
+    """
+    Ré-analyse gestes et caractéristiques d'un .lmk, sans vidéo ni modèle
+    Renvoie (frames, gestes, caracteristiques)
+    """
+    debut = time.perf_counter()
+    lecteur = LecteurLandmarks(chemin_lmk)
+    moteur_caracteristiques = moteur_caracteristiques or MoteurCaracteristiques(fps=fps)
+
+    # Seuls les résultats (petits) sont rassemblés, pas les landmarks
+    frames, gestes, caracteristiques = [np.zeros(0, dtype=np.int64)], [], []
+    for _, _, frames_bloc, _, gestes_bloc, caracteristiques_bloc in fenetres_analyse(
+            lecteur, fps, moteur_gestes, moteur_caracteristiques):
+        frames.append(np.array(frames_bloc))
+        gestes.extend(gestes_bloc)
+        caracteristiques.append(caracteristiques_bloc)
+    frames = np.concatenate(frames)
+    caracteristiques = (np.concatenate(caracteristiques) if caracteristiques
+                        else np.zeros((0, len(moteur_caracteristiques.noms)), dtype=np.float32))
+
+    if sortie_gestes:
+        exporter_gestes_csv(frames, gestes, sortie_gestes)
+        print(f"Gestes écrits dans {sortie_gestes}")
+    if sortie_caracteristiques:
+        exporter_caracteristiques_csv(moteur_caracteristiques.noms, caracteristiques, frames,
+                                      sortie_caracteristiques)
+        print(f"Caractéristiques écrites dans {sortie_caracteristiques}")
+
+    duree = time.perf_counter() - debut
+    print(f"{len(frames)} frames analysées en {duree:.3f} s, sans inférence")
+    return frames, gestes, caracteristiques
+
+
+def _dessiner_textes(image, numero, estimee, gestes, caracteristiques=None, noms=None):
+    """Texte du HUD, même disposition que la démo avancée"""
+    y_offset = 30
+    cv2.putText(image, f"Frame: {numero}", (10, y_offset),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    y_offset += 30
+    if estimee:
+        cv2.putText(image, "ESTIME", (10, y_offset),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
+        y_offset += 30
+    for libelle, geste in zip(LIBELLES_MAINS, gestes):
+        if geste:
+            cv2.putText(image, f"{libelle}: {geste}", (10, y_offset),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            y_offset += 30
+    if caracteristiques is not None:
+        for nom, valeur in zip(noms, caracteristiques.tolist()):
+            texte = f"{nom}: -" if np.isnan(valeur) else f"{nom}: {valeur:.2f}"
+            cv2.putText(image, texte, (10, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+            y_offset += 20
+    return y_offset
+
+
+def rejouer_video(chemin_lmk, chemin_video, sortie_video, niveau_rendu='complet', styles=None,
+                  afficher_caracteristiques=False, moteur_gestes=None, moteur_caracteristiques=None,
+                  max_frames=None):
+    """
+    Redessine landmarks, gestes et HUD sur la vidéo source et écrit la vidéo annotée
+    Gestes et caractéristiques sont calculés en lot sur chaque bloc du .lmk,
+    lu au fil de la vidéo
+    Renvoie un rapport de débit
+    """
+    from rendu import RenduLandmarks
+
+    debut = time.perf_counter()
+    lecteur = LecteurLandmarks(chemin_lmk)
+
+    cap = cv2.VideoCapture(chemin_video)
+    if not cap.isOpened():
+        print(f"Erreur: Impossible d'ouvrir {chemin_video}")
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+
+    noms = None
+    if afficher_caracteristiques:
+        moteur_caracteristiques = moteur_caracteristiques or MoteurCaracteristiques(fps=fps)
+        noms = moteur_caracteristiques.noms
+    else:
+        moteur_caracteristiques = None
+    fenetres = fenetres_analyse(lecteur, fps, moteur_gestes, moteur_caracteristiques)
+    analyse = 0.0
+
+    def bloc_suivant():
+        nonlocal analyse
+        debut_analyse = time.perf_counter()
+        suivant = next(fenetres, None)
+        analyse += time.perf_counter() - debut_analyse
+        return suivant
+
+    fenetre = bloc_suivant()
+
+    rendu = RenduLandmarks(niveau_rendu, styles)
+    writer = None
+    frame = None
+    numero = 0
+    ligne = 0
+    dessinees = 0
+    try:
+        while max_frames is None or numero < max_frames:
+            ret, frame = cap.read(frame)
+            if not ret:
+                break
+            numero += 1
+            # Frames croissantes : on avance dans le .lmk au rythme de la vidéo,
+            # bloc suivant chargé quand le bloc courant est dépassé
+            while fenetre is not None:
+                frames = fenetre[2]
+                while ligne < len(frames) and frames[ligne] < numero:
+                    ligne += 1
+                if ligne < len(frames):
+                    break
+                fenetre = bloc_suivant()
+                ligne = 0
+            if fenetre is not None and fenetre[2][ligne] == numero:
+                landmarks, presence, _, drapeaux, gestes, caracteristiques = fenetre
+                rendu.dessiner(frame, landmarks[ligne], presence[ligne])
+                _dessiner_textes(frame, numero, drapeaux[ligne] & DRAPEAU_ESTIMEE, gestes[ligne],
+                                 None if caracteristiques is None else caracteristiques[ligne], noms)
+                dessinees += 1
+            if writer is None:
+                hauteur, largeur = frame.shape[:2]
+                writer = cv2.VideoWriter(sortie_video, cv2.VideoWriter_fourcc(*'mp4v'),
+                                         fps, (largeur, hauteur))
+            writer.write(frame)
+    finally:
+        cap.release()
+        if writer is not None:
+            writer.release()
+
+    duree = time.perf_counter() - debut
+    rapport = {
+        'frames': numero,
+        'frames_dessinees': dessinees,
+        'analyse_s': round(analyse, 3),
+        'duree_s': round(duree, 3),
+        'fps': round(numero / duree, 2) if duree > 0 else 0.0,
+        'dessin_ms': round(rendu.temps_moyen_ms, 3),
+    }
+    print(f"Rejeu: {numero} frames ({dessinees} avec landmarks) en {rapport['duree_s']} s "
+          f"({rapport['fps']} FPS) -> {sortie_video}")
+    return rapport
+
+
+def lire_couleurs(valeurs):
+    """['pose=255,0,255', ...] -> styles de rendu (couleur BGR des points et des connexions)"""
+    from rendu import STYLES_PAR_DEFAUT
+
+    styles = copy.deepcopy(STYLES_PAR_DEFAUT)
+    for valeur in valeurs or ():
+        partie, _, couleur = valeur.partition('=')
+        if partie not in styles:
+            raise ValueError(f"Partie inconnue: {partie} (choix: {', '.join(styles)})")
+        bgr = tuple(int(c) for c in couleur.split(','))
+        if len(bgr) != 3:
+            raise ValueError(f"Couleur BGR attendue (ex. 255,0,255): {couleur}")
+        styles[partie]['couleur_points'] = bgr
+        styles[partie]['couleur_connexions'] = bgr
+    return styles
+
+
+def main():
+    from rendu import NIVEAUX
+
+    parser = argparse.ArgumentParser(description="Rejeu d'un enregistrement .lmk sans inférence")
+    parser.add_argument('entree', help="Enregistrement .lmk")
+    parser.add_argument('--video', default=None, help="Vidéo source (enregistrement brut)")
+    parser.add_argument('--sortie', default=None, help="Vidéo annotée en sortie (.mp4)")
+    parser.add_argument('--rendu', choices=NIVEAUX, default='complet', help="Niveau de détail du dessin")
+    parser.add_argument('--couleur', action='append', metavar='PARTIE=B,G,R',
+                        help="Couleur d'une partie (face, pose, left_hand, right_hand), répétable")
+    parser.add_argument('--afficher-caracteristiques', action='store_true',
+                        help="Affiche angles, distances et vitesses sur la vidéo")
+    parser.add_argument('--gestes', default=None, help="CSV des gestes par frame (sans vidéo)")
+    parser.add_argument('--caracteristiques', default=None, help="CSV des caractéristiques (sans vidéo)")
+    parser.add_argument('--fps', type=float, default=30.0, help="Cadence de la capture (analyse sans vidéo)")
+    parser.add_argument('--max-frames', type=int, default=None, help="Nombre maximal de frames")
+    args = parser.parse_args()
+
+    if args.video and args.sortie:
+        rejouer_video(args.entree, args.video, args.sortie, args.rendu, lire_couleurs(args.couleur),
+                      args.afficher_caracteristiques, max_frames=args.max_frames)
+    if args.gestes or args.caracteristiques:
+        analyser_enregistrement(args.entree, args.gestes, args.caracteristiques, args.fps)
+    if not (args.video and args.sortie) and not (args.gestes or args.caracteristiques):
+        parser.error("indiquer --video et --sortie, ou --gestes / --caracteristiques")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rendu rapide des landmarks avec NumPy et OpenCV
+Par Dady Akrou Cyrille - Data Scientist
+
+mp_drawing.draw_landmarks parcourt les connexions une par une en Python.
+Ici, les tableaux d'indices de FACEMESH_CONTOURS, HAND_CONNECTIONS et
+POSE_CONNECTIONS sont calculés une seule fois, puis chaque partie est
+dessinée avec quelques appels groupés à cv2.polylines à partir d'un
+tableau de landmarks (543, 3 ou 4).
+
+Niveaux de détail :
+- 'complet' : visage, mains et pose (équivalent à dessiner_landmarks)
+- 'reduit'  : contours du visage décimés sans points, mains et pose
+- 'pose'    : uniquement les 33 points du corps, quand le CPU est saturé
+"""
+
+import time
+
+import cv2
+import numpy as np
+import mediapipe as mp
+
+from stockage_landmarks import PARTIES, INDICES_PARTIES, TOTAL_LANDMARKS, extraire_landmarks
+
+mp_holistic = mp.solutions.holistic
+
+NIVEAUX = ('complet', 'reduit', 'pose')
+
+# Même seuil que mp_drawing pour les points de pose peu visibles
+SEUIL_VISIBILITE = 0.5
+COULEUR_BORDURE = (224, 224, 224)
+
+# Styles (BGR) : couleur des points, rayon, couleur des connexions, épaisseur
+STYLES_PAR_DEFAUT = {
+    'face': {'couleur_points': (0, 0, 255), 'rayon': 1, 'couleur_connexions': (0, 0, 255), 'epaisseur': 1},
+    'pose': {'couleur_points': (0, 255, 255), 'rayon': 4, 'couleur_connexions': (0, 240, 240), 'epaisseur': 2},
+    'left_hand': {'couleur_points': (0, 255, 0), 'rayon': 4, 'couleur_connexions': (0, 240, 0), 'epaisseur': 2},
+    'right_hand': {'couleur_points': (255, 0, 0), 'rayon': 4, 'couleur_connexions': (240, 0, 0), 'epaisseur': 2},
+}
+
+
+def _indices_connexions(connexions, decalage):
+    """frozenset de paires -> tableau (K, 2) d'indices dans le tableau global de 543 landmarks"""
+    return np.array(sorted(connexions), dtype=np.intp).reshape(-1, 2) + decalage
+
+
+CONNEXIONS = {
+    'face': _indices_connexions(mp_holistic.FACEMESH_CONTOURS, INDICES_PARTIES['face'].start),
+    'pose': _indices_connexions(mp_holistic.POSE_CONNECTIONS, INDICES_PARTIES['pose'].start),
+    'left_hand': _indices_connexions(mp_holistic.HAND_CONNECTIONS, INDICES_PARTIES['left_hand'].start),
+    'right_hand': _indices_connexions(mp_holistic.HAND_CONNECTIONS, INDICES_PARTIES['right_hand'].start),
+}
+
+
+class RenduLandmarks:
+    """Dessin groupé des landmarks à partir de tableaux NumPy"""
+
+    def __init__(self, niveau='complet', styles=None, decimation_visage=2):
+        if niveau not in NIVEAUX:
+            raise ValueError(f"Niveau de détail inconnu: {niveau} (choix: {', '.join(NIVEAUX)})")
+        self.niveau = niveau
+        self.styles = styles or STYLES_PAR_DEFAUT
+
+        # Plan de dessin précalculé : (partie, connexions, dessiner les points)
+        self.plan = []
+        for partie in PARTIES:
+            if niveau == 'pose' and partie != 'pose':
+                continue
+            connexions = CONNEXIONS[partie]
+            points = True
+            if partie == 'face' and niveau == 'reduit':
+                connexions = connexions[::decimation_visage]
+                points = False
+            self.plan.append((PARTIES.index(partie), partie, connexions, points))
+
+        # Tampons réutilisés d'une frame à l'autre
+        self._landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+        self._presence = np.zeros(len(PARTIES), dtype=bool)
+
+        self.frames = 0
+        self.temps_total = 0.0
+
+    def dessiner_resultats(self, image, results):
+        """Dessine directement les résultats MediaPipe"""
+        extraire_landmarks(results, self._landmarks, self._presence)
+        return self.dessiner(image, self._landmarks, self._presence)
+
+    def dessiner(self, image, landmarks, presence):
+        """Dessine une frame de landmarks (543, 3 ou 4) sur l'image BGR"""
+        debut = time.perf_counter()
+        hauteur, largeur = image.shape[:2]
+
+        # Coordonnées pixel de tous les points en une opération
+        x = landmarks[:, 0]
+        y = landmarks[:, 1]
+        valides = (x >= 0) & (x <= 1) & (y >= 0) & (y <= 1)
+        pixels = np.empty((len(landmarks), 2), dtype=np.int32)
+        pixels[:, 0] = np.minimum(np.nan_to_num(x) * largeur, largeur - 1)
+        pixels[:, 1] = np.minimum(np.nan_to_num(y) * hauteur, hauteur - 1)
+
+        if landmarks.shape[1] > 3:
+            zone_pose = INDICES_PARTIES['pose']
+            valides[zone_pose] &= landmarks[zone_pose, 3] >= SEUIL_VISIBILITE
+
+        for index_partie, partie, connexions, points in self.plan:
+            if not presence[index_partie]:
+                continue
+            style = self.styles[partie]
+
+            segments = connexions[valides[connexions].all(axis=1)]
+            if len(segments):
+                cv2.polylines(image, pixels[segments], False,
+                              style['couleur_connexions'], style['epaisseur'])
+
+            if points:
+                zone = INDICES_PARTIES[partie]
+                indices = np.flatnonzero(valides[zone]) + zone.start
+                if len(indices):
+                    # Segment de longueur nulle épais = disque plein, un seul appel pour tous les points
+                    disques = np.repeat(pixels[indices, np.newaxis], 2, axis=1)
+                    rayon = style['rayon']
+                    cv2.polylines(image, disques, False, COULEUR_BORDURE, 2 * (rayon + 1))
+                    cv2.polylines(image, disques, False, style['couleur_points'], 2 * rayon)
+
+        self.frames += 1
+        self.temps_total += time.perf_counter() - debut
+        return image
+
+    @property
+    def temps_moyen_ms(self):
+        """Temps moyen de dessin par frame"""
+        return 1000 * self.temps_total / self.frames if self.frames else 0.0
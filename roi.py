@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Recadrage sur la région d'intérêt (ROI) et réduction de résolution avant inférence
+Par Dady Akrou Cyrille - Data Scientist
+
+Sur CPU, la latence de holistic.process() dépend surtout du nombre de pixels.
+Ce module :
+- recadre l'image autour du sujet à partir des landmarks de pose de la frame précédente
+- revient à une recherche sur l'image complète quand le suivi est perdu
+- limite la résolution envoyée au modèle (plus grand côté <= resolution_max)
+- ramène les landmarks dans les coordonnées normalisées de l'image complète
+- convertit les frames BGR en RGB dans un tampon réutilisé (ConversionRGB)
+"""
+
+import cv2
+import numpy as np
+
+from stockage_landmarks import ATTRIBUTS_RESULTATS
+
+
+def redimensionner_max(image, resolution_max):
+    """Réduit l'image pour que son plus grand côté ne dépasse pas resolution_max"""
+    if not resolution_max:
+        return image
+    hauteur, largeur = image.shape[:2]
+    cote = max(hauteur, largeur)
+    if cote <= resolution_max:
+        return image
+    echelle = resolution_max / cote
+    taille = (max(1, round(largeur * echelle)), max(1, round(hauteur * echelle)))
+    return cv2.resize(image, taille, interpolation=cv2.INTER_AREA)
+
+
+class ConversionRGB:
+    """
+    Conversion BGR -> RGB dans un tampon persistant, sans allocation par frame
+    Le tampon est rendu en lecture seule : MediaPipe le référence au lieu de le copier
+    """
+
+    def __init__(self):
+        self.image = None
+
+    def convertir(self, frame_bgr):
+        """Image RGB de la frame, valable jusqu'à l'appel suivant"""
+        if self.image is None or self.image.shape != frame_bgr.shape:
+            self.image = np.empty_like(frame_bgr)
+        else:
+            self.image.flags.writeable = True
+        cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=self.image)
+        self.image.flags.writeable = False
+        return self.image
+
+
+class RecadrageROI:
+    """Recadrage adaptatif autour du sujet suivi"""
+
+    def __init__(self, marge=0.3, resolution_max=None, visibilite_min=0.5,
+                 taille_min=0.2, actif=True):
+        self.marge = marge
+        self.resolution_max = resolution_max
+        self.visibilite_min = visibilite_min
+        self.taille_min = taille_min
+        self.actif = actif
+
+        # ROI courante en coordonnées normalisées (x0, y0, x1, y1), None = image complète
+        self.roi = None
+        self.frames_recadrees = 0
+        self.frames_completes = 0
+
+    def reinitialiser(self):
+        """Force une recherche sur l'image complète à la prochaine frame"""
+        self.roi = None
+
+    def traiter(self, holistic, image_rgb):
+        """
+        Exécute holistic.process() sur la ROI (ou l'image complète) réduite
+        et renvoie des résultats exprimés dans l'image complète
+        """
+        hauteur, largeur = image_rgb.shape[:2]
+        roi = self.roi if self.actif else None
+
+        if roi is None:
+            self.frames_completes += 1
+            entree = image_rgb
+        else:
+            self.frames_recadrees += 1
+            x0, y0 = int(roi[0] * largeur), int(roi[1] * hauteur)
+            x1, y1 = int(roi[2] * largeur), int(roi[3] * hauteur)
+            entree = image_rgb[y0:y1, x0:x1]
+            # ROI réellement découpée, arrondie au pixel
+            roi = (x0 / largeur, y0 / hauteur, x1 / largeur, y1 / hauteur)
+
+        entree = redimensionner_max(entree, self.resolution_max)
+        if not entree.flags.c_contiguous:
+            # MediaPipe ne référence que des tableaux contigus : une seule copie, en lecture seule
+            entree = np.ascontiguousarray(entree)
+            entree.flags.writeable = False
+        results = holistic.process(entree)
+
+        if roi is not None:
+            self._remapper(results, roi)
+        if self.actif:
+            self._mettre_a_jour(results)
+        return results
+
+    def _remapper(self, results, roi):
+        """Ramène les landmarks de la ROI vers l'image complète"""
+        x0, y0, x1, y1 = roi
+        largeur_roi, hauteur_roi = x1 - x0, y1 - y0
+        for attribut in ATTRIBUTS_RESULTATS.values():
+            landmarks = getattr(results, attribut, None)
+            if not landmarks:
+                continue
+            for point in landmarks.landmark:
+                point.x = x0 + point.x * largeur_roi
+                point.y = y0 + point.y * hauteur_roi
+                # z suit l'échelle horizontale de l'image
+                point.z = point.z * largeur_roi
+
+    def _mettre_a_jour(self, results):
+        """Calcule la ROI de la frame suivante à partir de la pose détectée"""
+        if not results.pose_landmarks:
+            # Suivi perdu : retour à l'image complète
+            self.roi = None
+            return
+
+        xs, ys = [], []
+        for point in results.pose_landmarks.landmark:
+            if point.visibility >= self.visibilite_min:
+                xs.append(point.x)
+                ys.append(point.y)
+        for attribut in ('left_hand_landmarks', 'right_hand_landmarks'):
+            landmarks = getattr(results, attribut, None)
+            if landmarks:
+                xs.extend(p.x for p in landmarks.landmark)
+                ys.extend(p.y for p in landmarks.landmark)
+
+        if len(xs) < 2:
+            self.roi = None
+            return
+
+        cible = self._agrandir(min(xs), min(ys), max(xs), max(ys))
+        if cible is None:
+            self.roi = None
+            return
+
+        # Hystérésis : on garde la ROI actuelle si le sujet y tient toujours,
+        # pour ne pas perturber le suivi interne de MediaPipe à chaque frame
+        if self.roi is not None:
+            rx0, ry0, rx1, ry1 = self.roi
+            contenu = cible[0] >= rx0 and cible[1] >= ry0 and cible[2] <= rx1 and cible[3] <= ry1
+            aire_roi = (rx1 - rx0) * (ry1 - ry0)
+            aire_cible = (cible[2] - cible[0]) * (cible[3] - cible[1])
+            if contenu and aire_cible > 0.5 * aire_roi:
+                return
+        self.roi = cible
+
+    def _agrandir(self, x0, y0, x1, y1):
+        """Élargit la boîte du sujet de la marge et la borne à l'image (None si hors image)"""
+        largeur = max(x1 - x0, self.taille_min)
+        hauteur = max(y1 - y0, self.taille_min)
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        demi_l = largeur * (1 + 2 * self.marge) / 2
+        demi_h = hauteur * (1 + 2 * self.marge) / 2
+        roi = (
+            max(0.0, cx - demi_l), max(0.0, cy - demi_h),
+            min(1.0, cx + demi_l), min(1.0, cy + demi_h),
+        )
+        if roi[2] - roi[0] < self.taille_min or roi[3] - roi[1] < self.taille_min:
+            return None
+        return roi
+
+    def statistiques(self):
+        total = self.frames_recadrees + self.frames_completes
+        return {
+            'frames_recadrees': self.frames_recadrees,
+            'frames_completes': self.frames_completes,
+            'taux_recadrage': round(self.frames_recadrees / total, 3) if total else 0.0,
+        }
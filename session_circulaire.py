@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Session à mémoire bornée pour les captures de longue durée
+Par Dady Akrou Cyrille - Data Scientist
+
+StockageLandmarks grandit sans limite : une borne laissée allumée toute la
+nuit finit par manquer de mémoire, et l'export CSV de fin de session doit
+tout sérialiser d'un coup. SessionCirculaire garde seulement les frames
+récentes dans un anneau de blocs préalloués :
+- capacité fixe ; quand l'anneau est plein, le bloc le plus ancien est
+  déversé sur disque (optionnel) puis réutilisé pour les nouvelles frames
+- déversement en fichiers .lmk avec rotation par durée ou par taille
+- export des N dernières secondes (capture d'incident)
+La mémoire reste constante quelle que soit la durée de la session.
+"""
+
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+from stockage_landmarks import COMPOSANTES_PAR_DEFAUT, StockageLandmarks, exporter_csv
+from format_binaire import EcrivainLandmarks
+
+
+class DeversementRotatif:
+    """Écrit les blocs évincés dans une suite de fichiers .lmk, avec rotation"""
+
+    def __init__(self, dossier, prefixe='session', rotation_s=None, rotation_mo=None,
+                 composantes=COMPOSANTES_PAR_DEFAUT):
+        self.dossier = dossier
+        self.prefixe = prefixe
+        self.rotation_s = rotation_s
+        self.rotation_octets = rotation_mo * 1024 * 1024 if rotation_mo else None
+        self.composantes = composantes
+        os.makedirs(dossier, exist_ok=True)
+
+        self.fichiers = []
+        self.frames_deversees = 0
+        self._ecrivain = None
+        self._ouverture = None
+
+    def _ouvrir(self):
+        horodatage = datetime.now().strftime("%Y%m%d_%H%M%S")
+        chemin = os.path.join(self.dossier, f"{self.prefixe}_{horodatage}_{len(self.fichiers) + 1:04d}.lmk")
+        self._ecrivain = EcrivainLandmarks(chemin, composantes=self.composantes)
+        self._ouverture = time.monotonic()
+        self.fichiers.append(chemin)
+
+    def _rotation_due(self):
+        if self.rotation_s and time.monotonic() - self._ouverture >= self.rotation_s:
+            return True
+        return bool(self.rotation_octets) and self._ecrivain.octets_ecrits >= self.rotation_octets
+
+    def ecrire(self, bloc):
+        """Écrit un StockageLandmarks complet ; la rotation se fait entre deux blocs"""
+        if len(bloc) == 0:
+            return
+        if self._ecrivain is not None and self._rotation_due():
+            self._ecrivain.fermer()
+            self._ecrivain = None
+        if self._ecrivain is None:
+            self._ouvrir()
+        self._ecrivain.ajouter_bloc(*bloc.tranche(), bloc.drapeaux)
+        self.frames_deversees += len(bloc)
+
+    def fermer(self):
+        if self._ecrivain is not None:
+            self._ecrivain.fermer()
+            self._ecrivain = None
+
+
+class SessionCirculaire:
+    """
+    Anneau de blocs StockageLandmarks de capacité fixe
+    Même interface d'ajout que StockageLandmarks (ajouter, ajouter_tableau)
+    """
+
+    def __init__(self, capacite=9000, composantes=COMPOSANTES_PAR_DEFAUT, taille_bloc=256, deversement=None):
+        self.composantes = composantes
+        self.taille_bloc = taille_bloc
+        # Un bloc de plus que la capacité demandée : le bloc en cours de remplissage
+        self.nb_blocs = max(1, -(-capacite // taille_bloc)) + 1
+        self.capacite = (self.nb_blocs - 1) * taille_bloc
+        self.deversement = deversement
+
+        self._blocs = deque([StockageLandmarks(composantes, taille_bloc)])
+        self.frames_evincees = 0
+
+    def _bloc_courant(self):
+        """Bloc qui reçoit la prochaine frame ; évince le plus ancien si l'anneau est plein"""
+        bloc = self._blocs[-1]
+        if len(bloc) < self.taille_bloc:
+            return bloc
+        if len(self._blocs) < self.nb_blocs:
+            bloc = StockageLandmarks(self.composantes, self.taille_bloc)
+        else:
+            bloc = self._blocs.popleft()
+            if self.deversement is not None:
+                self.deversement.ecrire(bloc)
+            self.frames_evincees += len(bloc)
+            # La mémoire du bloc évincé est réutilisée : aucune allocation en régime établi
+            bloc.vider()
+        self._blocs.append(bloc)
+        return bloc
+
+    def ajouter(self, results, frame_number, timestamp_ns=None, drapeaux=0):
+        """Enregistre les landmarks d'un résultat MediaPipe"""
+        self._bloc_courant().ajouter(results, frame_number, timestamp_ns, drapeaux)
+
+    def ajouter_tableau(self, landmarks, presence, frame_number, timestamp_ns=None, drapeaux=0):
+        """Enregistre une frame déjà sous forme de tableau (543, composantes)"""
+        self._bloc_courant().ajouter_tableau(landmarks, presence, frame_number, timestamp_ns, drapeaux)
+
+    def __len__(self):
+        return sum(len(bloc) for bloc in self._blocs)
+
+    def vider(self):
+        """Efface les frames en mémoire (les fichiers déjà déversés restent sur le disque)"""
+        while len(self._blocs) > 1:
+            self._blocs.popleft()
+        self._blocs[0].vider()
+
+    def vers_stockage(self):
+        """
+        Copie chronologique des frames en mémoire dans un StockageLandmarks
+        (une seule copie par export : à appeler une fois, pas par colonne)
+        """
+        return StockageLandmarks.concatener(self._blocs, self.composantes)
+
+    def dernieres_secondes(self, secondes):
+        """Frames des `secondes` précédant la dernière frame enregistrée"""
+        dernier = self._blocs[-1] if len(self._blocs[-1]) else None
+        if dernier is None:
+            return StockageLandmarks(self.composantes, taille_bloc=1)
+        limite = int(dernier.timestamps[-1]) - int(secondes * 1e9)
+        # Seuls les blocs qui recouvrent la fenêtre sont copiés
+        blocs = [bloc for bloc in self._blocs if len(bloc) and bloc.timestamps[-1] >= limite]
+        stockage = StockageLandmarks.concatener(blocs, self.composantes)
+        debut = int((stockage.timestamps < limite).sum())
+        return StockageLandmarks.depuis_tableaux(*stockage.tranche(debut), stockage.drapeaux[debut:])
+
+    def exporter_dernieres_secondes(self, secondes, chemin):
+        """Export d'incident : les N dernières secondes en .lmk ou en .csv"""
+        stockage = self.dernieres_secondes(secondes)
+        if chemin.lower().endswith('.lmk'):
+            with EcrivainLandmarks(chemin, composantes=self.composantes) as ecrivain:
+                ecrivain.ajouter_stockage(stockage)
+        else:
+            exporter_csv(stockage, chemin)
+        return len(stockage)
+
+    def memoire_octets(self):
+        """Mémoire réservée par l'anneau (constante une fois tous les blocs alloués)"""
+        return sum(bloc.memoire_octets() for bloc in self._blocs)
+
+    def fermer(self):
+        """Déverse les frames restantes et ferme le fichier en cours"""
+        if self.deversement is None:
+            return
+        for bloc in self._blocs:
+            self.deversement.ecrire(bloc)
+        self.vider()
+        self.deversement.fermer()
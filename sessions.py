@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de sessions Holistic préchauffées
+Par Dady Akrou Cyrille - Data Scientist
+
+Créer un mp_holistic.Holistic et exécuter son premier process() coûte bien
+plus qu'une frame en régime établi (chargement des modèles TFLite,
+initialisation du graphe). Le pool crée les sessions une fois, les réchauffe
+sur une image noire 640x480 (comme test_simple.py) et les prête aux appelants.
+Une session rendue au pool traite de nouveau l'image noire : le suivi de
+l'appelant précédent est oublié et la prochaine frame repart d'une détection.
+
+mediapipe n'est importé qu'à la création de la première session ; le
+préchauffage peut tourner en arrière-plan pendant que le menu s'affiche.
+L'option mode ('holistic', 'pose', 'mains', 'visage') choisit le sous-modèle
+(voir sous_modeles.py) ; chaque mode a ses propres sessions dans le pool.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from sous_modeles import creer_session
+
+# Même image que test_mediapipe_simple() dans test_simple.py
+IMAGE_RECHAUFFAGE = np.zeros((480, 640, 3), dtype=np.uint8)
+
+OPTIONS_PAR_DEFAUT = {'mode': 'holistic', 'min_detection_confidence': 0.5, 'min_tracking_confidence': 0.5}
+
+
+class PoolSessions:
+    """Sessions Holistic (ou sous-modèles) réutilisables, regroupées par jeu d'options"""
+
+    def __init__(self, sessions_max=4):
+        self.sessions_max = sessions_max
+        self._libres = {}
+        self._en_cours = {}
+        self._verrou = threading.Lock()
+
+        # Durées de démarrage (s) de la dernière session créée
+        self.temps_import = None
+        self.dernier_demarrage = None
+
+    @staticmethod
+    def _cle(options):
+        return tuple(sorted({**OPTIONS_PAR_DEFAUT, **options}.items()))
+
+    def _creer(self, cle):
+        """Importe mediapipe si besoin, crée la session et la réchauffe"""
+        debut = time.perf_counter()
+        import mediapipe
+        if self.temps_import is None:
+            self.temps_import = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        session = creer_session(**dict(cle))
+        creation = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        session.process(IMAGE_RECHAUFFAGE)
+        rechauffage = time.perf_counter() - debut
+
+        self.dernier_demarrage = {
+            'import_s': round(self.temps_import, 3),
+            'creation_s': round(creation, 3),
+            'rechauffage_s': round(rechauffage, 3),
+        }
+        return session
+
+    def _annoncer(self, cle):
+        """Signale un préchauffage en cours pour que obtenir() l'attende"""
+        evenement = threading.Event()
+        with self._verrou:
+            self._en_cours[cle] = evenement
+        return evenement
+
+    def _prechauffer(self, cle, nombre, evenement):
+        try:
+            for _ in range(nombre):
+                session = self._creer(cle)
+                with self._verrou:
+                    self._libres.setdefault(cle, []).append(session)
+        finally:
+            with self._verrou:
+                if self._en_cours.get(cle) is evenement:
+                    del self._en_cours[cle]
+            evenement.set()
+
+    def prechauffer(self, nombre=1, **options):
+        """Crée et réchauffe `nombre` sessions pour ces options"""
+        cle = self._cle(options)
+        self._prechauffer(cle, nombre, self._annoncer(cle))
+
+    def prechauffer_en_fond(self, nombre=1, **options):
+        """Préchauffage sur un thread de fond (par exemple pendant l'affichage du menu)"""
+        cle = self._cle(options)
+        thread = threading.Thread(target=self._prechauffer, args=(cle, nombre, self._annoncer(cle)),
+                                  name='prechauffage', daemon=True)
+        thread.start()
+        return thread
+
+    def obtenir(self, **options):
+        """Prête une session réchauffée (attend un préchauffage en cours, sinon en crée une)"""
+        cle = self._cle(options)
+        with self._verrou:
+            evenement = self._en_cours.get(cle)
+        if evenement is not None:
+            evenement.wait()
+        with self._verrou:
+            libres = self._libres.get(cle)
+            if libres:
+                return libres.pop()
+        return self._creer(cle)
+
+    def rendre(self, session, **options):
+        """Remet la session dans le pool après avoir oublié le suivi en cours"""
+        cle = self._cle(options)
+        session.process(IMAGE_RECHAUFFAGE)
+        with self._verrou:
+            libres = self._libres.setdefault(cle, [])
+            if len(libres) < self.sessions_max:
+                libres.append(session)
+                return
+        session.close()
+
+    @contextmanager
+    def session(self, **options):
+        """with pool.session(...) as holistic: la session est rendue à la sortie"""
+        session = self.obtenir(**options)
+        try:
+            yield session
+        finally:
+            self.rendre(session, **options)
+
+    def fermer(self):
+        with self._verrou:
+            sessions = [s for libres in self._libres.values() for s in libres]
+            self._libres = {}
+        for session in sessions:
+            session.close()
+
+
+# Pool partagé par les scripts du projet
+POOL_SESSIONS = PoolSessions()
+
+
+def session_holistic(**options):
+    """Session préchauffée du pool partagé, à utiliser dans un bloc with"""
+    return POOL_SESSIONS.session(**options)
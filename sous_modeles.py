@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exécution sélective des sous-modèles MediaPipe
+Par Dady Akrou Cyrille - Data Scientist
+
+Holistic enchaîne pose, deux mains et maillage du visage à chaque frame, même
+quand l'appelant n'utilise qu'une partie des landmarks. Ce module choisit la
+solution MediaPipe la moins coûteuse pour les parties demandées :
+- 'pose'     : mp.solutions.pose (33 points)
+- 'mains'    : mp.solutions.hands (2 x 21 points)
+- 'visage'   : mp.solutions.face_mesh (468 points, 478 avec les iris)
+- 'holistic' : mp.solutions.holistic (543 points)
+
+Les résultats gardent l'interface de holistic.process() (face_landmarks,
+pose_landmarks, left_hand_landmarks, right_hand_landmarks) : dessin,
+sauvegarde, planificateur et rendu rapide fonctionnent sans modification.
+Les parties non calculées valent None.
+"""
+
+from stockage_landmarks import PARTIES, ResultatsLandmarks
+
+# Parties produites par chaque mode, du moins coûteux au plus complet
+MODES = {
+    'pose': ('pose',),
+    'mains': ('left_hand', 'right_hand'),
+    'visage': ('face',),
+    'holistic': PARTIES,
+}
+
+
+def mode_pour_parties(parties):
+    """Mode le moins coûteux qui fournit toutes les parties demandées"""
+    demandees = set(parties)
+    inconnues = demandees - set(PARTIES)
+    if inconnues:
+        raise ValueError(f"Parties inconnues: {', '.join(sorted(inconnues))} (choix: {', '.join(PARTIES)})")
+    for mode, fournies in MODES.items():
+        if demandees <= set(fournies):
+            return mode
+    return 'holistic'
+
+
+class SessionSelective:
+    """Sous-modèle MediaPipe unique présenté comme une session Holistic"""
+
+    def __init__(self, mode, static_image_mode=False, model_complexity=1, smooth_landmarks=True,
+                 refine_face_landmarks=False, min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5, miroir=False):
+        import mediapipe as mp
+
+        if mode not in MODES or mode == 'holistic':
+            raise ValueError(f"Mode de sous-modèle inconnu: {mode} (choix: pose, mains, visage)")
+        self.mode = mode
+        # Hands suppose une image en miroir (selfie) pour étiqueter gauche/droite
+        self.miroir = miroir
+
+        confiances = {
+            'static_image_mode': static_image_mode,
+            'min_detection_confidence': min_detection_confidence,
+            'min_tracking_confidence': min_tracking_confidence,
+        }
+        if mode == 'pose':
+            self.modele = mp.solutions.pose.Pose(
+                model_complexity=model_complexity, smooth_landmarks=smooth_landmarks, **confiances
+            )
+        elif mode == 'mains':
+            # Hands n'existe qu'en complexité 0 et 1
+            self.modele = mp.solutions.hands.Hands(
+                max_num_hands=2, model_complexity=min(model_complexity, 1), **confiances
+            )
+        else:
+            self.modele = mp.solutions.face_mesh.FaceMesh(
+                max_num_faces=1, refine_landmarks=refine_face_landmarks, **confiances
+            )
+
+    def process(self, image):
+        """Image RGB -> résultats au format de holistic.process()"""
+        results = self.modele.process(image)
+        if self.mode == 'pose':
+            return ResultatsLandmarks(None, results.pose_landmarks, None, None)
+        if self.mode == 'visage':
+            visages = results.multi_face_landmarks
+            return ResultatsLandmarks(visages[0] if visages else None, None, None, None)
+
+        mains = {'left_hand': None, 'right_hand': None}
+        for landmarks, cote in zip(results.multi_hand_landmarks or (), results.multi_handedness or ()):
+            etiquette = cote.classification[0].label
+            # Sur une image non inversée l'étiquette de Hands est celle du côté opposé
+            if not self.miroir:
+                etiquette = 'Left' if etiquette == 'Right' else 'Right'
+            partie = 'left_hand' if etiquette == 'Left' else 'right_hand'
+            if mains[partie] is None:
+                mains[partie] = landmarks
+        return ResultatsLandmarks(None, None, mains['left_hand'], mains['right_hand'])
+
+    def close(self):
+        self.modele.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def creer_session(mode='holistic', **options):
+    """Session du mode demandé ; 'holistic' renvoie directement mp_holistic.Holistic"""
+    if mode == 'holistic':
+        import mediapipe as mp
+        options.pop('miroir', None)
+        return mp.solutions.holistic.Holistic(**options)
+    return SessionSelective(mode, **options)
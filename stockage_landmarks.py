@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stockage colonnaire des landmarks en tableaux NumPy
+Par Dady Akrou Cyrille - Data Scientist
+
+Remplace la liste de dictionnaires (un dict par landmark) par :
+- un tableau float32 préalloué de forme (frames, 543, 4) : x, y, z et la
+  visibilité fournie par MediaPipe (0 pour le visage et les mains), ou
+  (frames, 543, 3) quand seules les coordonnées sont utiles
+- un masque de présence par partie du corps (frames, 4)
+- une colonne int64 de numéros de frame et une colonne int64 de timestamps (ns)
+- une colonne uint8 de drapeaux par frame (ex. frame estimée sans inférence)
+
+Les landmarks d'une frame sont rangés dans l'ordre visage (468), pose (33),
+main gauche (21), main droite (21). Les parties absentes valent NaN.
+"""
+
+import csv
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+# Ordre et taille des parties du corps dans un tableau de landmarks
+PARTIES = ('face', 'pose', 'left_hand', 'right_hand')
+NB_LANDMARKS = {'face': 468, 'pose': 33, 'left_hand': 21, 'right_hand': 21}
+TOTAL_LANDMARKS = sum(NB_LANDMARKS.values())
+
+INDICES_PARTIES = {}
+_debut = 0
+for _partie in PARTIES:
+    INDICES_PARTIES[_partie] = slice(_debut, _debut + NB_LANDMARKS[_partie])
+    _debut += NB_LANDMARKS[_partie]
+del _debut, _partie
+
+# x, y, z, visibility : la visibilité est conservée pour l'analyse de qualité
+COMPOSANTES_PAR_DEFAUT = 4
+
+# Drapeaux par frame (champ de bits)
+DRAPEAU_ESTIMEE = 1  # landmarks estimés entre deux inférences, pas issus du modèle
+
+# Attribut correspondant dans les résultats MediaPipe
+ATTRIBUTS_RESULTATS = {
+    'face': 'face_landmarks',
+    'pose': 'pose_landmarks',
+    'left_hand': 'left_hand_landmarks',
+    'right_hand': 'right_hand_landmarks',
+}
+
+
+# Étiquettes protobuf des champs float de NormalizedLandmark (x, y, z, visibility, presence)
+_ETIQUETTES_CHAMPS = {0x0d: 0, 0x15: 1, 0x1d: 2, 0x25: 3, 0x2d: 4}
+
+
+def _decoder_liste(landmarks, composantes):
+    """
+    Décode une NormalizedLandmarkList sérialisée en un seul passage NumPy
+    Renvoie None si la mise en page binaire n'est pas régulière
+    """
+    brut = landmarks.SerializeToString()
+    if len(brut) < 2 or brut[0] != 0x0a or brut[1] >= 0x80:
+        return None
+    pas = brut[1] + 2
+    if len(brut) % pas:
+        return None
+
+    # Position des champs dans le premier landmark
+    positions = {}
+    curseur = 2
+    while curseur < pas:
+        champ = _ETIQUETTES_CHAMPS.get(brut[curseur])
+        if champ is None or curseur + 5 > pas:
+            return None
+        positions[champ] = curseur + 1
+        curseur += 5
+
+    # Tous les landmarks doivent avoir exactement la même structure
+    octets = np.frombuffer(brut, dtype=np.uint8).reshape(-1, pas)
+    colonnes = [0, 1] + [position - 1 for position in positions.values()]
+    if not np.array_equal(octets[:, colonnes], np.broadcast_to(octets[0, colonnes], (len(octets), len(colonnes)))):
+        return None
+
+    valeurs = np.zeros((len(octets), composantes), dtype=np.float32)
+    for champ in range(composantes):
+        if champ in positions:
+            debut = positions[champ]
+            valeurs[:, champ] = np.ascontiguousarray(octets[:, debut:debut + 4]).view('<f4')[:, 0]
+    return valeurs
+
+
+def _lire_champs(landmarks, composantes):
+    """Lecture champ par champ (repli de _decoder_liste et référence des tests)"""
+    points = landmarks.landmark
+    if composantes == 4:
+        iterateur = (v for p in points for v in (p.x, p.y, p.z, p.visibility))
+    else:
+        iterateur = (v for p in points for v in (p.x, p.y, p.z))
+    return np.fromiter(iterateur, dtype=np.float32, count=len(points) * composantes).reshape(-1, composantes)
+
+
+def landmarks_vers_tableau(landmarks, composantes=3):
+    """Convertit une NormalizedLandmarkList en tableau float32 (n, composantes)"""
+    valeurs = _decoder_liste(landmarks, composantes)
+    if valeurs is not None:
+        return valeurs
+    # Repli champ par champ si la sérialisation n'est pas régulière
+    return _lire_champs(landmarks, composantes)
+
+
+def extraire_landmarks(results, sortie, presence):
+    """
+    Copie les landmarks des résultats MediaPipe dans `sortie` (543, 3 ou 4)
+    et remplit `presence` (4,) ; les parties absentes sont mises à NaN
+    """
+    composantes = sortie.shape[-1]
+    for i, partie in enumerate(PARTIES):
+        zone = sortie[INDICES_PARTIES[partie]]
+        landmarks = getattr(results, ATTRIBUTS_RESULTATS[partie], None)
+        if not landmarks:
+            zone.fill(np.nan)
+            presence[i] = False
+            continue
+
+        valeurs = landmarks_vers_tableau(landmarks, composantes)
+        n = min(len(valeurs), NB_LANDMARKS[partie])
+        zone[:n] = valeurs[:n]
+        presence[i] = True
+    return sortie, presence
+
+
+# Résultats reconstruits depuis des tableaux, même interface que holistic.process()
+ResultatsLandmarks = namedtuple('ResultatsLandmarks', [ATTRIBUTS_RESULTATS[p] for p in PARTIES])
+
+
+def tableau_vers_resultats(landmarks, presence):
+    """
+    Reconstruit des résultats au format MediaPipe (NormalizedLandmarkList) depuis
+    un tableau (543, 3 ou 4), pour les fonctions de dessin et de sauvegarde existantes
+    """
+    from mediapipe.framework.formats import landmark_pb2
+
+    listes = []
+    for i, partie in enumerate(PARTIES):
+        if not presence[i]:
+            listes.append(None)
+            continue
+        valeurs = landmarks[INDICES_PARTIES[partie]]
+        # La visibilité n'a de sens que pour la pose
+        if partie != 'pose':
+            valeurs = valeurs[:, :3]
+        liste = landmark_pb2.NormalizedLandmarkList()
+        if valeurs.shape[-1] == 4:
+            for x, y, z, visibilite in valeurs.tolist():
+                liste.landmark.add(x=x, y=y, z=z, visibility=visibilite)
+        else:
+            for x, y, z in valeurs.tolist():
+                liste.landmark.add(x=x, y=y, z=z)
+        listes.append(liste)
+    return ResultatsLandmarks(*listes)
+
+
+class StockageLandmarks:
+    """Conteneur de landmarks préalloué, agrandi par blocs"""
+
+    _COLONNES = ('_landmarks', '_presence', '_frames', '_timestamps', '_drapeaux')
+
+    def __init__(self, composantes=COMPOSANTES_PAR_DEFAUT, taille_bloc=1024):
+        if composantes not in (3, 4):
+            raise ValueError("composantes doit valoir 3 (x, y, z) ou 4 (x, y, z, visibility)")
+        self.composantes = composantes
+        self.taille_bloc = taille_bloc
+        self.taille = 0
+        self._allouer(taille_bloc)
+
+    def _allouer(self, capacite):
+        self._landmarks = np.full((capacite, TOTAL_LANDMARKS, self.composantes), np.nan, dtype=np.float32)
+        self._presence = np.zeros((capacite, len(PARTIES)), dtype=bool)
+        self._frames = np.zeros(capacite, dtype=np.int64)
+        self._timestamps = np.zeros(capacite, dtype=np.int64)
+        self._drapeaux = np.zeros(capacite, dtype=np.uint8)
+
+    @property
+    def capacite(self):
+        return len(self._frames)
+
+    def _agrandir(self):
+        """Agrandit la capacité d'au moins un bloc (croissance géométrique)"""
+        nouvelle = self.capacite + max(self.taille_bloc, self.capacite // 2)
+        anciens = [getattr(self, nom) for nom in self._COLONNES]
+        self._allouer(nouvelle)
+        for nom, ancien in zip(self._COLONNES, anciens):
+            getattr(self, nom)[:self.taille] = ancien[:self.taille]
+
+    def _prochaine_ligne(self, frame_number, timestamp_ns, drapeaux):
+        if self.taille == self.capacite:
+            self._agrandir()
+        ligne = self.taille
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        # Colonne de temps monotone même si l'horloge murale recule
+        if ligne > 0 and timestamp_ns <= self._timestamps[ligne - 1]:
+            timestamp_ns = int(self._timestamps[ligne - 1]) + 1
+        self._frames[ligne] = frame_number
+        self._timestamps[ligne] = timestamp_ns
+        self._drapeaux[ligne] = drapeaux
+        self.taille += 1
+        return ligne
+
+    def ajouter(self, results, frame_number, timestamp_ns=None, drapeaux=0):
+        """Enregistre les landmarks d'un résultat MediaPipe"""
+        ligne = self._prochaine_ligne(frame_number, timestamp_ns, drapeaux)
+        extraire_landmarks(results, self._landmarks[ligne], self._presence[ligne])
+        return ligne
+
+    def ajouter_tableau(self, landmarks, presence, frame_number, timestamp_ns=None, drapeaux=0):
+        """Enregistre une frame déjà sous forme de tableau (543, 3 ou 4) ; visibilité absente = NaN"""
+        ligne = self._prochaine_ligne(frame_number, timestamp_ns, drapeaux)
+        c = min(landmarks.shape[-1], self.composantes)
+        self._landmarks[ligne, :, :c] = landmarks[..., :c]
+        self._landmarks[ligne, :, c:] = np.nan
+        self._presence[ligne] = presence
+        return ligne
+
+    def vider(self):
+        """Efface les données sans libérer la mémoire déjà allouée"""
+        self._landmarks[:self.taille] = np.nan
+        self._presence[:self.taille] = False
+        self.taille = 0
+
+    def __len__(self):
+        return self.taille
+
+    # Vues sans copie sur les frames enregistrées
+
+    @property
+    def landmarks(self):
+        return self._landmarks[:self.taille]
+
+    @property
+    def presence(self):
+        return self._presence[:self.taille]
+
+    @property
+    def frames(self):
+        return self._frames[:self.taille]
+
+    @property
+    def timestamps(self):
+        return self._timestamps[:self.taille]
+
+    @property
+    def drapeaux(self):
+        return self._drapeaux[:self.taille]
+
+    def tranche(self, debut=None, fin=None):
+        """Vues (landmarks, presence, frames, timestamps) sur un intervalle de lignes"""
+        intervalle = slice(*slice(debut, fin).indices(self.taille)[:2])
+        return (
+            self._landmarks[intervalle],
+            self._presence[intervalle],
+            self._frames[intervalle],
+            self._timestamps[intervalle],
+        )
+
+    def partie(self, nom, debut=None, fin=None):
+        """Vue (frames, n, composantes) sur une partie du corps"""
+        intervalle = slice(*slice(debut, fin).indices(self.taille)[:2])
+        return self._landmarks[intervalle, INDICES_PARTIES[nom]]
+
+    def presence_partie(self, nom, debut=None, fin=None):
+        intervalle = slice(*slice(debut, fin).indices(self.taille)[:2])
+        return self._presence[intervalle, PARTIES.index(nom)]
+
+    def __getstate__(self):
+        # Seules les lignes remplies sont sérialisées (envoi entre processus)
+        etat = self.__dict__.copy()
+        for nom in self._COLONNES:
+            etat[nom] = etat[nom][:self.taille].copy()
+        return etat
+
+    def memoire_octets(self):
+        """Mémoire réservée par les tableaux"""
+        return sum(getattr(self, nom).nbytes for nom in self._COLONNES)
+
+    @classmethod
+    def depuis_tableaux(cls, landmarks, presence, frames, timestamps, drapeaux=None):
+        """Crée un stockage à partir de tableaux existants (copie)"""
+        n = len(frames)
+        stockage = cls(composantes=landmarks.shape[-1], taille_bloc=max(n, 1))
+        stockage._landmarks[:n] = landmarks
+        stockage._presence[:n] = presence
+        stockage._frames[:n] = frames
+        stockage._timestamps[:n] = timestamps
+        if drapeaux is not None:
+            stockage._drapeaux[:n] = drapeaux
+        stockage.taille = n
+        return stockage
+
+    @classmethod
+    def concatener(cls, stockages, composantes=None):
+        """Fusionne plusieurs stockages dans l'ordre donné"""
+        stockages = list(stockages)
+        if composantes is None:
+            composantes = stockages[0].composantes if stockages else COMPOSANTES_PAR_DEFAUT
+        total = sum(len(s) for s in stockages)
+        resultat = cls(composantes=composantes, taille_bloc=max(total, 1))
+        for stockage in stockages:
+            n = len(stockage)
+            fin = resultat.taille + n
+            c = min(stockage.composantes, composantes)
+            resultat._landmarks[resultat.taille:fin, :, :c] = stockage.landmarks[..., :c]
+            resultat._presence[resultat.taille:fin] = stockage.presence
+            resultat._frames[resultat.taille:fin] = stockage.frames
+            resultat._timestamps[resultat.taille:fin] = stockage.timestamps
+            resultat._drapeaux[resultat.taille:fin] = stockage.drapeaux
+            resultat.taille = fin
+        return resultat
+
+
+def exporter_csv(donnees, filename):
+    """
+    Écrit une ligne CSV par landmark détecté (frame, timestamp, type, landmark_id, x, y, z)
+    `donnees` expose landmarks, presence, frames et timestamps (StockageLandmarks ou lecteur binaire)
+    """
+    landmarks, presence = donnees.landmarks, donnees.presence
+    frames, timestamps = donnees.frames, donnees.timestamps
+
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['frame', 'timestamp', 'type', 'landmark_id', 'x', 'y', 'z'])
+
+        for ligne in range(len(frames)):
+            frame_num = int(frames[ligne])
+            timestamp = datetime.fromtimestamp(timestamps[ligne] / 1e9).isoformat()
+
+            # Une ligne par landmark pour chaque partie détectée
+            for i, partie in enumerate(PARTIES):
+                if not presence[ligne, i]:
+                    continue
+                points = landmarks[ligne, INDICES_PARTIES[partie], :3].tolist()
+                writer.writerows(
+                    (frame_num, timestamp, partie, landmark_id, x, y, z)
+                    for landmark_id, (x, y, z) in enumerate(points)
+                )
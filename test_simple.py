@@ -9,6 +9,9 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+from instrumentation import MesureLatences
+from sessions import POOL_SESSIONS
+
 def test_imports():
     """Test des imports"""
     print("Test des imports...")
@@ -30,8 +33,11 @@ def test_webcam_simple():
     print("Appuyez sur 'q' pour quitter")
     
     frame_count = 0
+    mesure = MesureLatences(etapes=('capture', 'dessin', 'affichage'))
     while True:
+        mesure.nouvelle_frame()
         ret, frame = cap.read()
+        mesure.marquer('capture')
         
         if not ret:
             print("Erreur: Impossible de lire le frame")
@@ -42,15 +48,20 @@ def test_webcam_simple():
         # Afficher le compteur de frames
         cv2.putText(frame, f"Frame: {frame_count}", (10, 30), 
                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        mesure.dessiner_hud(frame)
+        mesure.marquer('dessin')
         
         cv2.imshow('Test Webcam Simple', frame)
         
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        touche = cv2.waitKey(1) & 0xFF
+        mesure.marquer('affichage')
+        if touche == ord('q'):
             break
     
     cap.release()
     cv2.destroyAllWindows()
     print(f"Test terminé. {frame_count} frames capturés.")
+    mesure.afficher()
     return True
 
 def test_mediapipe_simple():
@@ -58,18 +69,17 @@ def test_mediapipe_simple():
     print("\nTest de MediaPipe...")
     
     try:
-        # Initialisation de MediaPipe
-        mp_holistic = mp.solutions.holistic
-        mp_drawing = mp.solutions.drawing_utils
-        
+        # Session du pool : créée et réchauffée une seule fois par processus
         print("MediaPipe initialisé avec succès!")
         
         # Test avec une image simple
-        with mp_holistic.Holistic(
+        with POOL_SESSIONS.session(
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         ) as holistic:
             print("Modèle Holistic créé avec succès!")
+            if POOL_SESSIONS.dernier_demarrage:
+                print(f"Démarrage de la session: {POOL_SESSIONS.dernier_demarrage}")
             
             # Créer une image de test
             test_image = np.zeros((480, 640, 3), dtype=np.uint8)
@@ -85,6 +95,424 @@ def test_mediapipe_simple():
         print(f"Erreur MediaPipe: {e}")
         return False
 
+def test_allocations_boucle():
+    """Boucle chaude en régime établi : aucune image allouée par frame"""
+    import gc
+    import tracemalloc
+    from rendu import RenduLandmarks
+    from roi import ConversionRGB
+    from stockage_landmarks import TOTAL_LANDMARKS, PARTIES, extraire_landmarks
+
+    print("\nTest des allocations de la boucle...")
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    conversion = ConversionRGB()
+    rendu = RenduLandmarks('complet')
+    landmarks = np.empty((TOTAL_LANDMARKS, 4), dtype=np.float32)
+    presence = np.zeros(len(PARTIES), dtype=bool)
+    frames = 20
+
+    with POOL_SESSIONS.session(
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    ) as holistic:
+
+        def iteration():
+            # Conversion dans un tampon persistant, dessin sur la frame BGR d'origine
+            results = holistic.process(conversion.convertir(frame))
+            extraire_landmarks(results, landmarks, presence)
+            rendu.dessiner(frame, landmarks, presence)
+
+        for _ in range(5):
+            iteration()
+        tracemalloc.start()
+        depart = tracemalloc.get_traced_memory()[0]
+        for _ in range(frames):
+            iteration()
+        # process() crée un type namedtuple par appel (cycle libéré par le ramasse-miettes)
+        gc.collect()
+        courant, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"Allocations: {(courant - depart) / frames:.0f} octets/frame conservés, "
+          f"pic {(pic - depart) / 1024:.1f} Kio (frame: {frame.nbytes / 1024:.0f} Kio)")
+    # Une seule image allouée (même temporairement) ferait dépasser le pic
+    assert pic - depart < frame.nbytes // 4
+    assert courant - depart < 1024 * frames
+
+def test_source_images():
+    """Traitement hors ligne d'un dossier d'images (tampon de frame réutilisé)"""
+    import os
+    import tempfile
+    from hors_ligne import SourceImages, traiter_hors_ligne
+
+    print("\nTest d'un dossier d'images...")
+    with tempfile.TemporaryDirectory() as dossier:
+        for i in range(3):
+            cv2.imwrite(os.path.join(dossier, f"image_{i}.png"), np.full((120, 160, 3), 40 * i, dtype=np.uint8))
+        # Image de taille différente : nouvelle frame au lieu du tampon
+        cv2.imwrite(os.path.join(dossier, "image_3.png"), np.zeros((60, 80, 3), dtype=np.uint8))
+
+        source = SourceImages(dossier)
+        ret, frame = source.read()
+        ret, suivante = source.read(frame)
+        assert ret and suivante is frame and int(frame[0, 0, 0]) == 40
+        ret, suivante = source.read(frame)
+        ret, suivante = source.read(frame)
+        assert ret and suivante is not frame and suivante.shape == (60, 80, 3)
+        assert source.read(frame) == (False, None)
+
+        rapport = traiter_hors_ligne(dossier, max_frames=3)
+    assert rapport['frames'] == 3
+    print("Dossier d'images traité!")
+
+def test_options_modes():
+    """Les options non prises en charge par les modes pipeline/multiprocessus sont refusées"""
+    from detection_pose_holistic import detection_pose_holistic
+
+    print("\nTest des options des modes pipeline et multiprocessus...")
+    for options in ({'mode_pipeline': True, 'hud': True},
+                    {'mode_pipeline': True, 'intervalle_inference': 3},
+                    {'mode_processus': True, 'mouvement': 'difference'},
+                    {'mode_processus': True, 'mode_roi': True}):
+        try:
+            detection_pose_holistic(source="inexistante.mp4", **options)
+        except ValueError as e:
+            assert "non prise(s) en charge" in str(e)
+        else:
+            raise AssertionError(f"Combinaison acceptée: {options}")
+    print("Combinaisons non prises en charge refusées!")
+
+def test_erreur_pipeline():
+    """Une exception de l'étape d'inférence est relevée par le thread principal"""
+    import os
+    import tempfile
+    from pipeline import PipelineHolistique
+
+    class RecadrageEnPanne:
+        def traiter(self, holistic, image):
+            raise RuntimeError("panne d'inférence")
+
+    print("\nTest d'une erreur dans le pipeline...")
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "clip.avi")
+        writer = cv2.VideoWriter(chemin, cv2.VideoWriter_fourcc(*'MJPG'), 30, (160, 120))
+        for _ in range(5):
+            writer.write(np.zeros((120, 160, 3), dtype=np.uint8))
+        writer.release()
+
+        pipeline = PipelineHolistique(chemin, afficher=False)
+        pipeline.recadrage = RecadrageEnPanne()
+        try:
+            pipeline.executer()
+        except RuntimeError as e:
+            assert "panne d'inférence" in str(e) and pipeline.etape_en_erreur == 'inference'
+        else:
+            raise AssertionError("Erreur d'inférence présentée comme une fin de flux")
+    print("Erreur relevée!")
+
+def test_arret_enregistrement():
+    """L'arrêt de l'enregistrement écrit toutes les frames en file, même file pleine"""
+    import os
+    import tempfile
+    from enregistrement import EnregistreurVideo
+
+    print("\nTest de l'arrêt de l'enregistrement...")
+    with tempfile.TemporaryDirectory() as dossier:
+        enregistreur = EnregistreurVideo(os.path.join(dossier, "video.avi"), 30, (160, 120),
+                                         taille_file=4, codec='MJPG')
+        for i in range(4):
+            enregistreur.ecrire(np.full((120, 160, 3), i, dtype=np.uint8))
+        enregistreur.arreter()
+        assert enregistreur.attendre(10)
+        assert enregistreur.frames_ecrites == 4 and enregistreur.frames_jetees == 0
+    print("Toutes les frames écrites!")
+
+def test_positionnement_segment():
+    """Un positionnement sur l'image clé précédente est complété frame par frame"""
+    from analyse_lot import positionner
+
+    class CaptureImageCle:
+        # Se place sur l'image clé (toutes les 10 frames) qui précède la frame demandée
+        def __init__(self):
+            self.position = 0
+
+        def set(self, propriete, valeur):
+            self.position = int(valeur) // 10 * 10
+
+        def get(self, propriete):
+            return float(self.position)
+
+        def grab(self):
+            self.position += 1
+            return True
+
+    print("\nTest du positionnement des segments...")
+    cap, position = positionner(CaptureImageCle(), "inutilise.mp4", 37)
+    assert position == 37 and cap.position == 37
+    cap, position = positionner(CaptureImageCle(), "inutilise.mp4", 40)
+    assert position == 40 and cap.position == 40
+    print("Segments numérotés depuis la position réelle!")
+
+def test_decodage_landmarks():
+    """Le décodage rapide des landmarks donne le même tableau que la lecture champ par champ"""
+    from mediapipe.framework.formats import landmark_pb2
+    from stockage_landmarks import _decoder_liste, _lire_champs, landmarks_vers_tableau
+
+    print("\nTest du décodage rapide des landmarks...")
+    generateur = np.random.default_rng(6)
+    valeurs = generateur.random((33, 5), dtype=np.float32)
+    listes = {
+        'xyz': [dict(x=x, y=y, z=z) for x, y, z, _, _ in valeurs.tolist()],
+        'visibilite': [dict(x=x, y=y, z=z, visibility=v) for x, y, z, v, _ in valeurs.tolist()],
+        'presence': [dict(x=x, y=y, z=z, visibility=v, presence=p) for x, y, z, v, p in valeurs.tolist()],
+        # Un point sans z : mise en page irrégulière, repli champ par champ
+        'irreguliere': [dict(x=x, y=y) if i == 5 else dict(x=x, y=y, z=z)
+                        for i, (x, y, z, _, _) in enumerate(valeurs.tolist())],
+    }
+    for nom, points in listes.items():
+        liste = landmark_pb2.NormalizedLandmarkList()
+        for point in points:
+            liste.landmark.add(**point)
+        for composantes in (3, 4):
+            reference = _lire_champs(liste, composantes)
+            rapide = _decoder_liste(liste, composantes)
+            assert (rapide is None) == (nom == 'irreguliere'), nom
+            if rapide is not None:
+                assert np.array_equal(rapide, reference), (nom, composantes)
+            assert np.array_equal(landmarks_vers_tableau(liste, composantes), reference)
+    print("Décodages identiques!")
+
+def test_garde_mouvement():
+    """La garde saute le modèle sur une scène statique et se réveille au premier mouvement"""
+    from garde_mouvement import GardeMouvement
+    from stockage_landmarks import ResultatsLandmarks
+
+    print("\nTest de la garde de mouvement...")
+    appels = []
+
+    def inferer(image):
+        # Modèle factice : personne n'est détecté
+        appels.append(image.shape)
+        return ResultatsLandmarks(None, None, None, None)
+
+    garde = GardeMouvement(frames_avant_veille=5, intervalle_veille=15, reutilisation_max=30)
+    statique = np.zeros((120, 160, 3), dtype=np.uint8)
+    emissions = [garde.traiter(statique, inferer) for _ in range(10)]
+    assert [e.inferee for e in emissions] == [True] + [False] * 9
+    assert garde.en_veille and len(appels) == 1
+
+    # Changement de toute la scène pendant la veille : inférence immédiate
+    emission = garde.traiter(np.full_like(statique, 255), inferer)
+    assert emission.inferee and emission.methode == 'inference' and len(appels) == 2
+    assert garde.statistiques()['frames_reutilisees'] == 9
+    print("Veille réveillée par le mouvement!")
+
+def _frames_aleatoires(n, graine=0):
+    """Landmarks (n, 543, 4) et présence (n, 4) reproductibles, sans modèle"""
+    from stockage_landmarks import TOTAL_LANDMARKS, PARTIES
+
+    generateur = np.random.default_rng(graine)
+    landmarks = generateur.random((n, TOTAL_LANDMARKS, 4), dtype=np.float32)
+    presence = generateur.random((n, len(PARTIES))) > 0.3
+    return landmarks, presence
+
+def test_format_binaire():
+    """Aller-retour .lmk : blocs, drapeaux, bloc tronqué et fichier version 1"""
+    import os
+    import tempfile
+    from format_binaire import (EcrivainLandmarks, LecteurLandmarks, EN_TETE, EN_TETE_BLOC,
+                                MAGIQUE, MAGIQUE_BLOC)
+    from stockage_landmarks import DRAPEAU_ESTIMEE, INDICES_PARTIES, TOTAL_LANDMARKS
+
+    print("\nTest du format binaire .lmk...")
+    landmarks, presence = _frames_aleatoires(10)
+    drapeaux = np.array([DRAPEAU_ESTIMEE if i % 3 else 0 for i in range(10)], dtype=np.uint8)
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "session.lmk")
+        with EcrivainLandmarks(chemin, frames_par_bloc=4) as ecrivain:
+            for i in range(10):
+                ecrivain.ajouter_tableau(landmarks[i], presence[i], i + 1, 1000 * i, drapeaux=int(drapeaux[i]))
+
+        lecteur = LecteurLandmarks(chemin)
+        assert len(lecteur) == 10 and len(lecteur.blocs) == 3
+        lus, presence_lue, frames, timestamps = lecteur.lire()
+        assert np.array_equal(lus, landmarks) and np.array_equal(presence_lue, presence)
+        assert frames.tolist() == list(range(1, 11)) and timestamps.tolist() == [1000 * i for i in range(10)]
+        assert np.array_equal(lecteur.lire_drapeaux(), drapeaux)
+        # Intervalle à cheval sur deux blocs, une seule partie du corps
+        assert np.array_equal(lecteur.partie('pose', 2, 7), landmarks[2:7, INDICES_PARTIES['pose']])
+
+        # Arrêt brutal pendant l'écriture du dernier bloc : seuls les blocs complets sont lus
+        with open(chemin, 'r+b') as fichier:
+            fichier.truncate(os.path.getsize(chemin) - 100)
+        lecteur = LecteurLandmarks(chemin)
+        assert len(lecteur) == 8 and np.array_equal(lecteur.lire()[0], landmarks[:8])
+
+        # Version 1 : pas de colonne de drapeaux
+        chemin_v1 = os.path.join(dossier, "ancien.lmk")
+        with open(chemin_v1, 'wb') as fichier:
+            fichier.write(EN_TETE.pack(MAGIQUE, 1, 3, TOTAL_LANDMARKS))
+            fichier.write(EN_TETE_BLOC.pack(MAGIQUE_BLOC, 2))
+            fichier.write(np.array([5, 6], dtype='<i8').tobytes() + np.array([50, 60], dtype='<i8').tobytes())
+            fichier.write(np.ascontiguousarray(landmarks[:2, :, :3], dtype='<f4').tobytes())
+            fichier.write(presence[:2].astype(np.uint8).tobytes())
+        lecteur = LecteurLandmarks(chemin_v1)
+        assert lecteur.version == 1 and lecteur.composantes == 3
+        assert np.array_equal(lecteur.lire()[0], landmarks[:2, :, :3])
+        assert lecteur.lire_drapeaux().tolist() == [0, 0]
+    print("Format .lmk relu à l'identique!")
+
+def test_gestes():
+    """Règles de gestes sur des mains construites à la main"""
+    from gestes import MoteurGestes
+
+    print("\nTest des gestes...")
+    # Doigts tendus : bout plus haut (y plus petit) que l'articulation
+    ouverte = np.zeros((21, 3), dtype=np.float32)
+    ouverte[3, 0], ouverte[4, 0] = 0.0, 0.1
+    for bout, articulation in ((8, 6), (12, 10), (16, 14), (20, 18)):
+        ouverte[bout, 1], ouverte[articulation, 1] = 0.2, 0.5
+    poing = ouverte.copy()
+    poing[4, 0] = -0.1
+    for bout in (8, 12, 16, 20):
+        poing[bout, 1] = 0.8
+    paix = ouverte.copy()
+    paix[16, 1] = paix[20, 1] = 0.8
+    absente = np.full((21, 3), np.nan, dtype=np.float32)
+
+    moteur = MoteurGestes()
+    assert moteur.classifier(np.stack([poing, paix, ouverte, absente])) == ['Poing', 'Paix', None, None]
+    assert moteur.classifier(paix) == 'Paix'
+    # Poing : 4 doigts pliés sur 5 suffisent
+    poing[4, 0] = 0.1
+    assert moteur.classifier(poing) == 'Poing'
+    print("Gestes reconnus!")
+
+def test_reinitialisation_filtre():
+    """Après réinitialisation, un filtre repart de la mesure au lieu de la lisser"""
+    from lissage import FILTRES, creer_filtre
+    from stockage_landmarks import INDICES_PARTIES, PARTIES
+
+    print("\nTest de la réinitialisation des filtres...")
+    landmarks, _ = _frames_aleatoires(2, graine=1)
+    presence = np.ones(len(PARTIES), dtype=bool)
+    for methode in FILTRES:
+        filtre = creer_filtre(methode)
+        filtre.filtrer(landmarks[0], presence)
+        assert not np.allclose(filtre.filtrer(landmarks[1], presence)[:, :3], landmarks[1, :, :3])
+
+        filtre.reinitialiser(['pose'])
+        sortie = filtre.filtrer(landmarks[1], presence)
+        pose = INDICES_PARTIES['pose']
+        assert np.allclose(sortie[pose, :3], landmarks[1, pose, :3])
+        assert not np.allclose(sortie[INDICES_PARTIES['face'], :3], landmarks[1, INDICES_PARTIES['face'], :3])
+
+        filtre.reinitialiser()
+        assert np.allclose(filtre.filtrer(landmarks[0], presence)[:, :3], landmarks[0, :, :3])
+    print("Filtres réinitialisés!")
+
+def test_caracteristiques_lot():
+    """Calcul par lot et calcul frame par frame donnent les mêmes caractéristiques"""
+    from caracteristiques import MoteurCaracteristiques
+
+    print("\nTest des caractéristiques par lot et incrémentales...")
+    landmarks, presence = _frames_aleatoires(12, graine=2)
+    instants = np.cumsum(np.full(12, 1 / 30))
+    moteur = MoteurCaracteristiques()
+    lot = moteur.calculer_lot(landmarks, presence, instants)
+    incremental = np.stack([moteur.mettre_a_jour(landmarks[i], presence[i], i + 1, instants[i]).copy()
+                            for i in range(12)])
+    assert lot.shape == (12, len(moteur.noms))
+    np.testing.assert_allclose(incremental, lot, rtol=1e-4, atol=1e-4, equal_nan=True)
+    print("Caractéristiques identiques!")
+
+def test_cache_lru():
+    """Le cache d'inférence évince la frame la moins récemment lue"""
+    import os
+    import tempfile
+    import time
+    from cache_inference import CacheInference, TAILLE_LANDMARKS, empreinte_parametres
+    from stockage_landmarks import PARTIES
+
+    print("\nTest de l'éviction LRU du cache...")
+    landmarks, presence = _frames_aleatoires(4, graine=3)
+    cle = ('source', empreinte_parametres(model_complexity=1))
+    with tempfile.TemporaryDirectory() as dossier:
+        # Place pour exactement trois frames, écriture immédiate
+        taille_mo = 3.5 * (TAILLE_LANDMARKS + len(PARTIES)) / (1024 * 1024)
+        with CacheInference(os.path.join(dossier, "cache.sqlite"), taille_mo, frames_par_transaction=1) as cache:
+            for numero in (1, 2, 3):
+                cache.ecrire(cle, numero, landmarks[numero - 1], presence[numero - 1])
+                time.sleep(0.01)
+            lus = np.empty_like(landmarks[0])
+            presence_lue = np.empty_like(presence[0])
+            assert cache.lire(cle, 1, lus, presence_lue)
+            assert np.array_equal(lus, landmarks[0]) and np.array_equal(presence_lue, presence[0])
+            time.sleep(0.01)
+            cache.ecrire(cle, 4, landmarks[3], presence[3])
+
+            assert cache.evictions == 1
+            assert sorted(cache.frames_presentes(cle)) == [1, 3, 4]
+            assert not cache.lire(cle, 2, lus, presence_lue)
+            assert (cache.succes, cache.echecs) == (1, 1)
+    print("Éviction LRU correcte!")
+
+def test_deversement_anneau():
+    """Les frames déversées puis restées dans l'anneau se suivent sans trou"""
+    import tempfile
+    from format_binaire import LecteurLandmarks
+    from session_circulaire import DeversementRotatif, SessionCirculaire
+
+    print("\nTest du déversement de l'anneau...")
+    landmarks, presence = _frames_aleatoires(30, graine=4)
+    with tempfile.TemporaryDirectory() as dossier:
+        anneau = SessionCirculaire(capacite=8, taille_bloc=4, deversement=DeversementRotatif(dossier))
+        for i in range(30):
+            anneau.ajouter_tableau(landmarks[i], presence[i], i + 1, 1000 * i)
+
+        deversees = anneau.deversement.frames_deversees
+        assert deversees + len(anneau) == 30 and len(anneau) <= anneau.capacite + anneau.taille_bloc
+        en_memoire = anneau.vers_stockage()
+        assert en_memoire.frames.tolist() == list(range(deversees + 1, 31))
+
+        anneau.fermer()
+        frames = np.concatenate([LecteurLandmarks(chemin).frames for chemin in anneau.deversement.fichiers])
+        assert frames.tolist() == list(range(1, 31))
+        relus = np.concatenate([LecteurLandmarks(chemin).lire()[0] for chemin in anneau.deversement.fichiers])
+        assert np.array_equal(relus, landmarks)
+    print("Numéros de frame continus!")
+
+def test_encodage_diffusion():
+    """Aller-retour encoder_frame / decoder_frame"""
+    from diffusion import LONGUEUR, decoder_frame, encoder_frame
+    from lissage import PARTIE_PAR_POINT
+
+    print("\nTest de l'encodage de diffusion...")
+    landmarks, _ = _frames_aleatoires(1, graine=5)
+    presence = np.array([True, False, True, False])
+    message = encoder_frame(landmarks[0], presence, 42, 123456789, drapeaux=1)
+    longueur, = LONGUEUR.unpack_from(message)
+    assert longueur == len(message) - LONGUEUR.size
+
+    decodes, presence_lue, numero, timestamp_ns, drapeaux = decoder_frame(message[LONGUEUR.size:])
+    assert (numero, timestamp_ns, drapeaux) == (42, 123456789, 1)
+    assert np.array_equal(presence_lue, presence)
+    presents = presence[PARTIE_PAR_POINT]
+    assert np.array_equal(decodes[presents], landmarks[0][presents])
+    assert np.isnan(decodes[~presents]).all()
+    print("Frame décodée à l'identique!")
+
+def test_coupures():
+    """Suites de frames sans détection sur un masque connu"""
+    from qualite import coupures
+
+    print("\nTest des coupures de détection...")
+    frames = np.arange(10, 20)
+    absent = np.array([0, 1, 1, 0, 0, 1, 0, 1, 1, 1], dtype=bool)
+    assert coupures(absent, frames).tolist() == [[11, 12, 2], [15, 15, 1], [17, 19, 3]]
+    assert coupures(np.zeros(10, dtype=bool), frames).shape == (0, 3)
+    print("Coupures correctes!")
+
 def main():
     print("="*50)
     print("    TEST SIMPLE DU PROJET")
@@ -101,6 +529,29 @@ def main():
         print("\n❌ Problème avec MediaPipe")
         return
     
+    # Allocations de la boucle de détection
+    test_allocations_boucle()
+    print("\n✅ Aucune image allouée par frame")
+    
+    # Traitements avec le modèle
+    test_source_images()
+    test_erreur_pipeline()
+    
+    # Tests déterministes, sans modèle
+    test_options_modes()
+    test_arret_enregistrement()
+    test_positionnement_segment()
+    test_decodage_landmarks()
+    test_garde_mouvement()
+    test_format_binaire()
+    test_gestes()
+    test_reinitialisation_filtre()
+    test_caracteristiques_lot()
+    test_cache_lru()
+    test_deversement_anneau()
+    test_encodage_diffusion()
+    test_coupures()
+    
     # Test de la webcam
     print("\nVoulez-vous tester la webcam? (o/n): ", end="")
     choix = input().lower()
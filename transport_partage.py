@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transport de frames sans copie entre processus (mémoire partagée)
+Par Dady Akrou Cyrille - Data Scientist
+
+Pour contourner le GIL, l'inférence peut tourner dans un processus séparé de
+la capture et de l'affichage. Envoyer les frames par multiprocessing.Queue
+les sérialise (pickle) puis les recopie : en 1080p cela coûte plus que le
+parallélisme ne rapporte. Ici :
+- les frames vivent dans un anneau d'emplacements multiprocessing.shared_memory ;
+  la capture écrit chaque frame une seule fois, directement dans un emplacement
+  (cap.read(image=...)), et le processus d'inférence l'enveloppe dans un
+  tableau NumPy sans copie
+- les landmarks reviennent dans un tampon partagé à disposition fixe
+  (numéro de frame, landmarks (543, 4), présence (4,)), un par emplacement
+- seuls les numéros d'emplacement transitent par les files
+
+Le processus principal possède les emplacements libres : il capture, soumet,
+récupère les résultats dans l'ordre, dessine, affiche puis libère.
+"""
+
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from stockage_landmarks import TOTAL_LANDMARKS, PARTIES, extraire_landmarks
+
+# Disposition fixe d'un résultat dans le tampon partagé
+DTYPE_RESULTAT = np.dtype([
+    ('numero', '<i8'),
+    ('inference_ns', '<i8'),
+    ('landmarks', '<f4', (TOTAL_LANDMARKS, 4)),
+    ('presence', '?', (len(PARTIES),)),
+])
+
+FIN_TRAVAIL = -1
+
+
+def _travailleur_inference(nom_frames, nom_resultats, forme, emplacements, a_inferer, inferees, options):
+    """Processus d'inférence : lit les frames en place, écrit les landmarks en place"""
+    from sous_modeles import creer_session
+
+    # Processus enfant : il partage le suivi de ressources du parent, seul responsable de unlink()
+    segment_frames = shared_memory.SharedMemory(name=nom_frames)
+    segment_resultats = shared_memory.SharedMemory(name=nom_resultats)
+    frames = np.ndarray((emplacements,) + forme, dtype=np.uint8, buffer=segment_frames.buf)
+    resultats = np.ndarray((emplacements,), dtype=DTYPE_RESULTAT, buffer=segment_resultats.buf)
+    image_rgb = np.empty(forme, dtype=np.uint8)
+
+    session = creer_session(**options)
+    try:
+        while True:
+            message = a_inferer.get()
+            if message == FIN_TRAVAIL:
+                break
+            emplacement, numero = message
+            debut = time.perf_counter_ns()
+            cv2.cvtColor(frames[emplacement], cv2.COLOR_BGR2RGB, dst=image_rgb)
+            results = session.process(image_rgb)
+            extraire_landmarks(results, resultats['landmarks'][emplacement], resultats['presence'][emplacement])
+            resultats['numero'][emplacement] = numero
+            resultats['inference_ns'][emplacement] = time.perf_counter_ns() - debut
+            inferees.put(emplacement)
+    finally:
+        session.close()
+        # Les vues NumPy doivent disparaître avant la fermeture des segments
+        del frames, resultats
+        segment_frames.close()
+        segment_resultats.close()
+
+
+class TransportFrames:
+    """
+    Anneau d'emplacements de frames partagés avec un processus d'inférence
+    travailleur : fonction de niveau module, même signature que _travailleur_inference
+    """
+
+    def __init__(self, forme, emplacements=4, travailleur=None, **options):
+        self.forme = tuple(forme)
+        self.emplacements = emplacements
+        taille_frame = int(np.prod(self.forme))
+        self._segment_frames = shared_memory.SharedMemory(create=True, size=emplacements * taille_frame)
+        self._segment_resultats = shared_memory.SharedMemory(create=True,
+                                                             size=emplacements * DTYPE_RESULTAT.itemsize)
+        self.frames = np.ndarray((emplacements,) + self.forme, dtype=np.uint8, buffer=self._segment_frames.buf)
+        self.resultats = np.ndarray((emplacements,), dtype=DTYPE_RESULTAT, buffer=self._segment_resultats.buf)
+
+        contexte = multiprocessing.get_context('spawn')
+        self._a_inferer = contexte.Queue()
+        self._inferees = contexte.Queue()
+        self._libres = deque(range(emplacements))
+        self.en_cours = 0
+        self._processus = contexte.Process(
+            target=travailleur or _travailleur_inference,
+            args=(self._segment_frames.name, self._segment_resultats.name, self.forme, emplacements,
+                  self._a_inferer, self._inferees, options),
+            name='inference', daemon=True)
+
+    def demarrer(self):
+        self._processus.start()
+        return self
+
+    def reserver(self):
+        """Emplacement libre et sa vue (à remplir par la capture), ou (None, None)"""
+        if not self._libres:
+            return None, None
+        emplacement = self._libres.popleft()
+        return emplacement, self.frames[emplacement]
+
+    def soumettre(self, emplacement, numero):
+        """Confie l'emplacement rempli au processus d'inférence"""
+        self._a_inferer.put((emplacement, numero))
+        self.en_cours += 1
+
+    def recevoir(self, delai=None):
+        """
+        Prochain résultat dans l'ordre de soumission :
+        (emplacement, frame, landmarks, presence) ; vues valables jusqu'à liberer()
+        """
+        emplacement = self._inferees.get(timeout=delai)
+        self.en_cours -= 1
+        resultats = self.resultats
+        return (emplacement, self.frames[emplacement],
+                resultats['landmarks'][emplacement], resultats['presence'][emplacement])
+
+    def inference_ms(self, emplacement):
+        """Durée d'inférence mesurée dans le processus dédié pour cet emplacement"""
+        return float(self.resultats['inference_ns'][emplacement]) / 1e6
+
+    def liberer(self, emplacement):
+        """Rend l'emplacement à la capture une fois la frame affichée"""
+        self._libres.append(emplacement)
+
+    def arreter(self):
+        """Termine le processus d'inférence et libère la mémoire partagée"""
+        if self._processus.is_alive():
+            self._a_inferer.put(FIN_TRAVAIL)
+            self._processus.join(timeout=10)
+            if self._processus.is_alive():
+                self._processus.terminate()
+        del self.frames, self.resultats
+        for segment in (self._segment_frames, self._segment_resultats):
+            segment.close()
+            segment.unlink()
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
+
+
+def lire_dans(cap, vue):
+    """Lit la frame suivante directement dans `vue` (copie seulement si OpenCV réalloue)"""
+    ret, frame = cap.read(vue)
+    if ret and frame is not vue and frame.ctypes.data != vue.ctypes.data:
+        if frame.shape != vue.shape:
+            return False
+        vue[...] = frame
+    return ret
+
+
+def detection_multiprocessus(source=0, emplacements=4, niveau_rendu='complet', afficher=True,
+                             max_frames=None, mode='holistic',
+                             min_detection_confidence=0.5, min_tracking_confidence=0.5):
+    """
+    Capture et affichage dans ce processus, inférence dans un processus dédié
+    Renvoie un rapport de débit
+    """
+    from rendu import RenduLandmarks
+
+    cap = cv2.VideoCapture(source)
+    ret, premiere = cap.read()
+    if not ret:
+        print("Erreur: Impossible de lire la source")
+        cap.release()
+        return None
+
+    rendu = RenduLandmarks(niveau_rendu)
+    options = {'mode': mode, 'min_detection_confidence': min_detection_confidence,
+               'min_tracking_confidence': min_tracking_confidence}
+    numero = 0
+    affichees = 0
+    inference_ms = 0.0
+    fin_source = False
+    debut = time.perf_counter()
+
+    with TransportFrames(premiere.shape, emplacements, **options) as transport:
+        try:
+            while True:
+                # Remplit les emplacements libres : la capture avance pendant l'inférence
+                while not fin_source and (max_frames is None or numero < max_frames):
+                    emplacement, vue = transport.reserver()
+                    if emplacement is None:
+                        break
+                    if numero == 0:
+                        vue[...] = premiere
+                    elif not lire_dans(cap, vue):
+                        transport.liberer(emplacement)
+                        fin_source = True
+                        break
+                    numero += 1
+                    transport.soumettre(emplacement, numero)
+
+                if transport.en_cours == 0:
+                    break
+
+                emplacement, frame, landmarks, presence = transport.recevoir()
+                inference_ms += transport.inference_ms(emplacement)
+                if afficher:
+                    rendu.dessiner(frame, landmarks, presence)
+                    cv2.imshow('Détection de Pose Holistique - multiprocessus', frame)
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        fin_source = True
+                transport.liberer(emplacement)
+                affichees += 1
+        finally:
+            cap.release()
+            if afficher:
+                cv2.destroyAllWindows()
+
+    duree = time.perf_counter() - debut
+    rapport = {
+        'frames': affichees,
+        'duree_s': round(duree, 3),
+        'fps': round(affichees / duree, 2) if duree > 0 else 0.0,
+        'inference_ms': round(inference_ms / affichees, 2) if affichees else 0.0,
+        'emplacements': emplacements,
+    }
+    print(f"Multiprocessus: {rapport['frames']} frames en {rapport['duree_s']} s "
+          f"({rapport['fps']} FPS, inférence {rapport['inference_ms']} ms/frame)")
+    return rapport
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python transport_partage.py [source] [emplacements]
+    source = sys.argv[1] if len(sys.argv) > 1 else 0
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    detection_multiprocessus(source, int(sys.argv[2]) if len(sys.argv) > 2 else 4)